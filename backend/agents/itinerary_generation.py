@@ -1,12 +1,25 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+import time
 import openai
 from datetime import datetime, timedelta
 from config import settings
+from agents.scheduler import WeatherAwareScheduler
+from agents.ranking import AttractionRanker, format_compact
+from agents.llm_gateway import (PRIORITY_BATCH, PRIORITY_FOLLOW_UP, PRIORITY_INTERACTIVE,
+                                estimate_tokens, get_llm_gateway)
+from models.itinerary import Itinerary
+from utils.exceptions import LLMOverloadedError
+from utils.tracing import record_tokens, span, traced
 
 class ItineraryGenerationAgent:
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
+        openai.api_base = settings.OPENAI_API_BASE
+        self.scheduler = WeatherAwareScheduler()
+        self.ranker = AttractionRanker(top_k=settings.PROMPT_TOP_K)
+        self.gateway = get_llm_gateway()
 
+    @traced("itinerary.generate")
     def generate_itinerary(self, 
                           city: str,
                           date: str,
@@ -14,8 +27,59 @@ class ItineraryGenerationAgent:
                           end_time: str,
                           attractions: List[Dict],
                           starting_point: Optional[str] = None,
-                          budget: Optional[float] = None) -> Dict:
+                          budget: Optional[float] = None,
+                          hourly_forecast: Optional[List[Dict]] = None,
+                          interests: Optional[List[str]] = None,
+                          events: Optional[List[Dict]] = None,
+                          deadline: Optional[float] = None) -> Itinerary:
         """Generate a complete itinerary based on user preferences and constraints."""
+        system_prompt = self.build_prompt(
+            city, date, start_time, end_time, attractions,
+            starting_point=starting_point,
+            budget=budget,
+            hourly_forecast=hourly_forecast,
+            interests=interests,
+            events=events
+        )
+        return self.complete_itinerary(system_prompt, deadline=deadline)
+    
+    def build_prompt(self,
+                     city: str,
+                     date: str,
+                     start_time: str,
+                     end_time: str,
+                     attractions: List[Dict],
+                     starting_point: Optional[str] = None,
+                     budget: Optional[float] = None,
+                     hourly_forecast: Optional[List[Dict]] = None,
+                     interests: Optional[List[str]] = None,
+                     top_k: Optional[int] = None,
+                     notes: Optional[str] = None,
+                     events: Optional[List[Dict]] = None) -> str:
+        """Rank the candidates, place them in weather-aware slots and build the planning prompt.
+        
+        Makes no LLM call, so alternative scenarios can prepare their prompts in parallel.
+        """
+        # Keep only the candidates that match the interests and could fit the day
+        with span("itinerary.rank_attractions"):
+            attractions = self.ranker.rank(attractions, interests, budget, start_time, end_time, top_k=top_k)
+        
+        # Place outdoor stops in dry, comfortable hours when an hourly forecast is available
+        slots = self.scheduler.plan_slots(attractions, hourly_forecast or [], start_time, end_time)
+        weather_section = ""
+        if slots:
+            weather_section = f"""
+        Weather-aware time slots (keep outdoor activities in these slots where possible):
+        {self.scheduler.format_slots(slots)}
+        """
+        
+        # Closures and events of the day, so the plan can route around them
+        events_section = ""
+        if events:
+            events_section = f"""
+        Known closures and events (avoid closed places and crowded areas at these times):
+        {self._format_events(events)}
+        """
         
         # Create a prompt for the LLM to generate an optimized itinerary
         system_prompt = f"""
@@ -25,69 +89,131 @@ class ItineraryGenerationAgent:
         
         Available attractions:
         {self._format_attractions(attractions)}
-        
+        {weather_section}{events_section}
         Consider:
         1. Opening hours
         2. Travel time between locations
         3. Typical duration at each spot
         4. Budget constraints
         5. Optimal sequence to minimize travel time
+        6. Hourly weather (outdoor activities during dry hours)
         
         Provide a detailed schedule with:
         - Times for each activity
         - Travel methods and durations
         - Costs
+        - Latitude and longitude of each location
         - Suggested meal breaks
         """
+        if notes:
+            system_prompt += f"""
+        Plan variant: {notes}
+        """
+        return system_prompt
+    
+    def complete_itinerary(self,
+                           system_prompt: str,
+                           priority: int = PRIORITY_BATCH,
+                           deadline: Optional[float] = None) -> Itinerary:
+        """Send a planning prompt to the LLM and parse the answer into a structured itinerary."""
+        if deadline is None:
+            deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt}
-            ]
-        )
+        response = self._chat_completion([
+            {"role": "system", "content": system_prompt}
+        ], priority=priority, deadline=deadline)
         
-        return self._parse_itinerary(response.choices[0].message['content'])
+        return self._parse_itinerary(response.choices[0].message['content'], deadline=deadline)
     
+    @traced("itinerary.adjust")
     def adjust_itinerary(self, 
-                        current_itinerary: Dict,
+                        current_itinerary: Union[Itinerary, Dict],
                         adjustment_type: str,
-                        adjustment_details: Dict) -> Dict:
+                        adjustment_details: Dict,
+                        hourly_forecast: Optional[List[Dict]] = None,
+                        deadline: Optional[float] = None) -> Itinerary:
         """Adjust existing itinerary based on new constraints or preferences."""
+        if deadline is None:
+            deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
+        if not isinstance(current_itinerary, Itinerary):
+            current_itinerary = Itinerary.from_dict(current_itinerary)
+        
+        # Re-score the current stops against the latest forecast
+        weather_section = ""
+        if hourly_forecast and current_itinerary.stops:
+            stops = [
+                {
+                    "name": stop.location or stop.activity,
+                    "category": stop.activity,
+                    "duration": f"{stop.duration or 60} minutes"
+                }
+                for stop in current_itinerary.stops
+            ]
+            times = [stop.time for stop in current_itinerary.stops if stop.time]
+            start_time = times[0].split('-')[0] if times else "09:00"
+            end_time = times[-1].split('-')[-1] if times else "18:00"
+            slots = self.scheduler.plan_slots(stops, hourly_forecast, start_time, end_time)
+            if slots:
+                weather_section = f"""
+        Weather-aware time slots from the latest forecast:
+        {self.scheduler.format_slots(slots)}
+        """
         
         system_prompt = f"""
         Modify the following itinerary:
-        {current_itinerary}
+        {current_itinerary.to_prompt()}
         
         Adjustment type: {adjustment_type}
         New requirements: {adjustment_details}
-        
+        {weather_section}
         Maintain the original schedule structure while accommodating the new requirements.
         Ensure all timing and sequence adjustments are logical and maintain the flow of the day.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt}
-            ]
-        )
+        response = self._chat_completion([
+            {"role": "system", "content": system_prompt}
+        ], priority=PRIORITY_INTERACTIVE, deadline=deadline)
+        
+        return self._parse_itinerary(response.choices[0].message['content'], deadline=deadline)
+    
+    def _chat_completion(self,
+                         messages: List[Dict],
+                         priority: int = PRIORITY_BATCH,
+                         deadline: Optional[float] = None):
+        """Call the chat completion API through the LLM gateway, recording latency and token usage."""
+        def create():
+            with span("openai.chat_completion", upstream="openai"):
+                return openai.ChatCompletion.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages
+                )
         
-        return self._parse_itinerary(response.choices[0].message['content'])
+        response = self.gateway.call(
+            create,
+            estimated_tokens=estimate_tokens(messages),
+            priority=priority,
+            deadline=deadline,
+            usage=lambda result: (result.get('usage') or {}).get('total_tokens')
+        )
+        record_tokens("openai", response.get('usage'))
+        return response
     
     def _format_attractions(self, attractions: List[Dict]) -> str:
-        """Format attractions list for the prompt."""
-        formatted = []
-        for attraction in attractions:
-            formatted.append(
-                f"- {attraction['name']}\n"
-                f"  Duration: {attraction['duration']}\n"
-                f"  Cost: ${attraction['cost']}\n"
-                f"  Category: {attraction['category']}\n"
-            )
-        return "\n".join(formatted)
+        """Format attractions list for the prompt as a compact table."""
+        return format_compact(attractions)
+    
+    @staticmethod
+    def _format_events(events: List[Dict], limit: int = 10) -> str:
+        """One line per event: times, kind, name and where it happens."""
+        lines = []
+        for event in events[:limit]:
+            start, end = str(event['start'])[11:16], str(event['end'])[11:16]
+            where = event.get('venue') or ("citywide" if event.get('lat') is None else "nearby")
+            lines.append(f"- {start}-{end} {event.get('type', 'event')}: {event['name']} ({where})")
+        return "\n".join(lines)
     
-    def _parse_itinerary(self, response: str) -> Dict:
+    @traced("itinerary.parse")
+    def _parse_itinerary(self, response: str, deadline: Optional[float] = None) -> Itinerary:
         """Parse the LLM response into a structured itinerary format."""
         try:
             structuring_prompt = f"""
@@ -101,7 +227,9 @@ class ItineraryGenerationAgent:
                         'duration': 'duration in minutes',
                         'travel_method': 'how to get there',
                         'travel_time': 'time in minutes',
-                        'cost': 'cost in dollars'
+                        'cost': 'cost in dollars',
+                        'lat': 'latitude in decimal degrees',
+                        'lon': 'longitude in decimal degrees'
                     }}
                 ],
                 'total_cost': 'total cost in dollars',
@@ -112,11 +240,15 @@ class ItineraryGenerationAgent:
             {response}
             """
             
-            structured_response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": structuring_prompt}]
+            structured_response = self._chat_completion(
+                [{"role": "user", "content": structuring_prompt}],
+                priority=PRIORITY_FOLLOW_UP,
+                deadline=deadline
             )
             
-            return eval(structured_response.choices[0].message['content'])
+            with span("itinerary.eval_parse"):
+                return Itinerary.from_dict(eval(structured_response.choices[0].message['content']))
+        except LLMOverloadedError:
+            raise
         except Exception as e:
-            return {"error": str(e)}
+            return Itinerary(error=str(e))
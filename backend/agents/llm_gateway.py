@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional, TypeVar
+from config import settings
+from utils.exceptions import LLMOverloadedError
+from utils.tracing import registry
+
+T = TypeVar('T')
+
+# Lower value is served first
+PRIORITY_FOLLOW_UP = 0    # second call of a request that already holds one LLM answer
+PRIORITY_INTERACTIVE = 1  # adjustments of an existing itinerary
+PRIORITY_BATCH = 2        # new itineraries
+PRIORITY_SPECULATIVE = 3  # alternative scenarios and other work nobody is waiting on yet
+
+QUEUE_DEPTH = registry.gauge(
+    'tour_planner_llm_queue_depth', 'LLM calls waiting for admission.')
+IN_FLIGHT = registry.gauge(
+    'tour_planner_llm_in_flight', 'LLM calls currently running.')
+QUEUE_WAIT = registry.histogram(
+    'tour_planner_llm_queue_wait_seconds', 'Time LLM calls waited for admission.')
+SHED = registry.counter(
+    'tour_planner_llm_shed_total', 'LLM calls rejected by admission control.', ('reason',))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` / 60 tokens per second.
+
+    Not thread-safe on its own; the gateway calls it under its lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def time_until(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until `amount` tokens are available."""
+        self._refill(now or time.monotonic())
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float):
+        """Take tokens; a negative amount refunds. The balance may go into debt."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMGateway:
+    """
+    Central admission control for LLM calls.
+
+    Calls wait in a bounded priority queue until a concurrency slot is free and both the
+    requests-per-minute and tokens-per-minute buckets allow them. A call is rejected
+    straight away when the queue is full or the expected wait already exceeds its
+    deadline, and rejected later if its deadline passes while queued, so overload turns
+    into quick 503s with a Retry-After instead of upstream rate-limit errors.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 requests_per_minute: float = 3500,
+                 tokens_per_minute: float = 90000,
+                 max_queue: int = 64):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._active = 0
+        # Moving average of call duration, used to predict queueing delay (0 until the first call ends)
+        self._service_time = 0.0
+
+    def call(self,
+             func: Callable[[], T],
+             estimated_tokens: int,
+             priority: int = PRIORITY_BATCH,
+             deadline: Optional[float] = None,
+             usage: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        """
+        Run `func` once admitted.
+
+        Args:
+            func (Callable): The LLM call
+            estimated_tokens (int): Prompt plus expected completion tokens
+            priority (int): Lower is served first
+            deadline (float): `time.monotonic()` value after which the call is useless
+            usage (Callable): Extracts the actual token count from the result to settle the estimate
+
+        Returns:
+            The result of `func`
+
+        Raises:
+            LLMOverloadedError: If the call cannot be admitted before its deadline
+        """
+        self._acquire(estimated_tokens, priority, deadline)
+        start = time.monotonic()
+        actual = estimated_tokens
+        try:
+            result = func()
+            if usage is not None:
+                actual = usage(result) or estimated_tokens
+            return result
+        finally:
+            self._release(estimated_tokens, actual, time.monotonic() - start)
+
+    def expected_wait(self, estimated_tokens: int = 0, priority: int = PRIORITY_SPECULATIVE) -> float:
+        """Predicted seconds before a new call of `priority` would be admitted."""
+        with self._cond:
+            return self._expected_wait(estimated_tokens, time.monotonic(), priority)
+
+    def _expected_wait(self, estimated_tokens: float, now: float, priority: int = PRIORITY_SPECULATIVE) -> float:
+        # Only calls of the same or a more urgent priority are served before this one
+        ahead = [entry for entry in self._queue if entry[0] <= priority]
+        waiting = len(ahead)
+        rate_wait = max(
+            self.requests.time_until(waiting + 1, now),
+            self.tokens.time_until(sum(entry[2] for entry in ahead) + estimated_tokens, now)
+        )
+        slots_ahead = waiting + self._active - self.max_concurrency + 1
+        slot_wait = max(0, slots_ahead) * self._service_time / self.max_concurrency
+        return max(rate_wait, slot_wait)
+
+    def check_admission(self,
+                        estimated_tokens: int = 0,
+                        priority: int = PRIORITY_BATCH,
+                        deadline: Optional[float] = None):
+        """
+        Shed a request up front, without waiting, when its first call could not be queued.
+
+        Meant for the event loop, before a worker thread is committed to the request.
+
+        Raises:
+            LLMOverloadedError: If the queue is full or the expected wait exceeds the deadline
+        """
+        with self._cond:
+            self._check(estimated_tokens, priority, deadline, time.monotonic())
+
+    def reject(self, reason: str):
+        """Shed a call for a reason found outside the gateway, e.g. no request thread left."""
+        self._shed(reason, self.expected_wait())
+
+    def _check(self, estimated_tokens: float, priority: int, deadline: Optional[float], now: float):
+        expected = self._expected_wait(estimated_tokens, now, priority)
+        if len(self._queue) >= self.max_queue:
+            self._shed("queue_full", expected)
+        if deadline is not None and now + expected > deadline:
+            self._shed("deadline_unreachable", expected)
+
+    def _shed(self, reason: str, retry_after: float):
+        SHED.inc(reason)
+        raise LLMOverloadedError(f"LLM capacity exceeded ({reason})", retry_after=max(1.0, retry_after))
+
+    def _acquire(self, estimated_tokens: float, priority: int, deadline: Optional[float]):
+        enqueued = time.monotonic()
+        with self._cond:
+            self._check(estimated_tokens, priority, deadline, enqueued)
+
+            entry = (priority, next(self._sequence), estimated_tokens)
+            heapq.heappush(self._queue, entry)
+            QUEUE_DEPTH.set(len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    if self._queue[0] == entry and self._active < self.max_concurrency:
+                        timeout = max(
+                            self.requests.time_until(1, now),
+                            self.tokens.time_until(estimated_tokens, now)
+                        )
+                        if timeout <= 0:
+                            break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._shed("deadline_expired", self._expected_wait(estimated_tokens, now, priority))
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                QUEUE_DEPTH.set(len(self._queue))
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            self._active += 1
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+            QUEUE_DEPTH.set(len(self._queue))
+            IN_FLIGHT.set(self._active)
+            # The next entry may be admissible now
+            self._cond.notify_all()
+        QUEUE_WAIT.observe(time.monotonic() - enqueued)
+
+    def _release(self, estimated_tokens: float, actual_tokens: float, duration: float):
+        with self._cond:
+            self._active -= 1
+            # Settle the difference between estimated and reported usage
+            self.tokens.consume(actual_tokens - estimated_tokens)
+            self._service_time = duration if not self._service_time else 0.8 * self._service_time + 0.2 * duration
+            IN_FLIGHT.set(self._active)
+            self._cond.notify_all()
+
+
+def estimate_tokens(messages, completion_tokens: int = 600) -> int:
+    """Rough token estimate (~4 characters per token) for a chat request and its answer."""
+    return sum(len(str(m.get('content', ''))) for m in messages) // 4 + completion_tokens
+
+
+@lru_cache()
+def get_llm_gateway() -> LLMGateway:
+    """The process-wide gateway shared by every agent."""
+    return LLMGateway(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        max_queue=settings.LLM_MAX_QUEUE
+    )
@@ -1,17 +1,26 @@
 import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from ..config import settings
-from ..utils.exceptions import NewsAPIError
+from config import settings
+from database.event_store import get_event_store
+from utils.exceptions import NewsAPIError
+from utils.cache import TTLCache
+from utils.resilience import get_or_compute_fresh, get_upstream
+from utils.tracing import record_cache, span, traced
 
 logger = logging.getLogger(__name__)
 
 class NewsAgent:
     def __init__(self):
         self.api_key = settings.NEWS_API_KEY
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = settings.NEWS_API_URL
+        self.upstream = get_upstream("news")
+        # Fresh results shared by requests and dialog prefetches
+        self.cache = TTLCache(maxsize=1024, ttl=settings.CITY_DATA_CACHE_TTL)
+        self.events = get_event_store()
 
+    @traced("news.get_news")
     def get_news(self, city: str, days_ahead: int = 7) -> List[Dict]:
         """
         Get relevant news and events for a specific city.
@@ -23,23 +32,35 @@ class NewsAgent:
         Returns:
             List[Dict]: List of news articles and events
         """
+        news, hit = get_or_compute_fresh(
+            self.cache,
+            ("news", city.strip().lower(), days_ahead),
+            lambda: self._fetch_news(city, days_ahead)
+        )
+        record_cache("news", hit)
+        return news
+
+    def _fetch_news(self, city: str, days_ahead: int) -> List[Dict]:
+        """Request the news and keep the tourism-relevant articles."""
         try:
             logger.info(f"Fetching news for {city}")
             
             # Calculate date range
             end_date = datetime.now() + timedelta(days=days_ahead)
             
-            # Make API request
-            response = requests.get(
-                f"{self.base_url}/everything",
-                params={
-                    "apiKey": self.api_key,
-                    "q": f"{city} (event OR festival OR closure OR construction)",
-                    "from": datetime.now().strftime("%Y-%m-%d"),
-                    "to": end_date.strftime("%Y-%m-%d"),
-                    "language": "en",
-                    "sortBy": "relevancy"
-                }
+            # Make API request; hedged, bounded by the deadline and served stale on outages
+            params = {
+                "apiKey": self.api_key,
+                "q": f"{city} (event OR festival OR closure OR construction)",
+                "from": datetime.now().strftime("%Y-%m-%d"),
+                "to": end_date.strftime("%Y-%m-%d"),
+                "language": "en",
+                "sortBy": "relevancy"
+            }
+            response = self.upstream.call(
+                ("everything", city.lower(), days_ahead),
+                lambda timeout: self._request(params, timeout),
+                cacheable=lambda r: r.status_code == 200
             )
             
             if response.status_code != 200:
@@ -59,6 +80,14 @@ class NewsAgent:
             logger.error(f"Unexpected error in news fetch: {str(e)}")
             raise
 
+    def _request(self, params: Dict, timeout: float) -> requests.Response:
+        """One request to the everything endpoint; server errors count as upstream failures."""
+        with span("http.news.everything", upstream="news"):
+            response = requests.get(f"{self.base_url}/everything", params=params, timeout=timeout)
+            if response.status_code >= 500:
+                raise NewsAPIError(f"News API returned status code {response.status_code}")
+        return response
+
     def _process_news(self, articles: List[Dict]) -> List[Dict]:
         """Process and filter news articles for relevancy."""
         processed_news = []
@@ -100,25 +129,24 @@ class NewsAgent:
             return "medium"
         return "low"
 
-    def get_events(self, city: str) -> List[Dict]:
-        """Get upcoming events in the city."""
+    @traced("news.get_events")
+    def get_events(self, city: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """
+        Get events and closures in the city overlapping a time window.
+        
+        Args:
+            city (str): City name
+            start (str): ISO start of the window, defaults to now
+            end (str): ISO end of the window, defaults to a week after `start`
+            
+        Returns:
+            List[Dict]: Events ordered by start time
+        """
         try:
-            # This could use a different API specifically for events
-            # For example, Eventbrite API or similar
             logger.info(f"Fetching events for {city}")
-            
-            # Placeholder for event data
-            # In a real implementation, you would integrate with an events API
-            events = [
-                {
-                    "name": "Local Food Festival",
-                    "date": "2024-01-01",
-                    "location": "City Center",
-                    "type": "Food & Culture"
-                }
-            ]
-            
-            return events
+            window_start = datetime.fromisoformat(start) if start else datetime.now()
+            window_end = datetime.fromisoformat(end) if end else window_start + timedelta(days=7)
+            return self.events.events_between(city, window_start, window_end)
             
         except Exception as e:
             logger.error(f"Error fetching events: {str(e)}")
@@ -0,0 +1,116 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Set, Tuple
+from utils.cache import TTLCache
+from utils.tracing import prefetching, registry
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_TASKS = registry.counter(
+    'tour_planner_prefetch_tasks_total', 'Speculative prefetch tasks per task and outcome.', ('task', 'outcome'))
+
+
+class Prefetcher:
+    """
+    Warm the shared caches while the dialog is still collecting slots.
+
+    Tasks are registered with the slots they need; `observe` starts every task whose
+    slots are filled. A task runs once per city and arguments while it is in flight or
+    recently finished, queued tasks of a session are cancelled when its city changes,
+    and no more than `budget` tasks are queued or running at a time.
+    """
+
+    def __init__(self, max_workers: int = 4, budget: int = 16, ttl: float = 600.0):
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._tasks: List[Tuple[str, Tuple[str, ...], Callable]] = []
+        # key -> (future, sessions that asked for it)
+        self._inflight: Dict[Hashable, Tuple[Future, Set[str]]] = {}
+        self._recent = TTLCache(maxsize=4096, ttl=ttl)
+        self._sessions = TTLCache(maxsize=10000, ttl=3600.0)
+        self._lock = threading.Lock()
+
+    def register(self, name: str, slots: Tuple[str, ...], func: Callable):
+        """Run `func(*slot_values)` once all of `slots` are filled; `slots` must start with "city"."""
+        self._tasks.append((name, slots, func))
+
+    def observe(self, session_id: str, slots: Dict) -> int:
+        """
+        Start the tasks whose slots are now filled.
+
+        Args:
+            session_id (str): Dialog owner, used to cancel its tasks when the city changes
+            slots (Dict): Slots collected so far
+
+        Returns:
+            int: Number of tasks started
+        """
+        city = str(slots.get('city') or '').strip().lower()
+        if not city:
+            return 0
+        previous = self._sessions.get(session_id)
+        if previous is not None and previous != city:
+            self.cancel(session_id)
+        self._sessions.set(session_id, city)
+
+        started = 0
+        for name, required, func in self._tasks:
+            values = tuple(slots.get(slot) for slot in required)
+            if not all(values):
+                continue
+            key = (name, city) + tuple(str(value).strip().lower() for value in values[1:])
+            started += self._submit(key, name, session_id, func, values)
+        return started
+
+    def cancel(self, session_id: str):
+        """Drop the session's interest in its queued tasks, cancelling those nobody else wants."""
+        with self._lock:
+            orphaned = []
+            for key, (future, sessions) in self._inflight.items():
+                sessions.discard(session_id)
+                if not sessions:
+                    orphaned.append((key, future))
+        # Cancelling runs the done callback, which takes the lock
+        for key, future in orphaned:
+            if future.cancel():
+                PREFETCH_TASKS.inc(key[0], 'cancelled')
+
+    def _submit(self, key: Hashable, name: str, session_id: str, func: Callable, values: Tuple) -> int:
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                entry[1].add(session_id)
+                PREFETCH_TASKS.inc(name, 'deduplicated')
+                return 0
+            if key in self._recent:
+                PREFETCH_TASKS.inc(name, 'deduplicated')
+                return 0
+            if len(self._inflight) >= self.budget:
+                PREFETCH_TASKS.inc(name, 'over_budget')
+                return 0
+            future = self._executor.submit(self._run, func, values)
+            self._inflight[key] = (future, {session_id})
+        PREFETCH_TASKS.inc(name, 'started')
+        future.add_done_callback(lambda f: self._finished(key, name, f))
+        return 1
+
+    @staticmethod
+    def _run(func: Callable, values: Tuple):
+        token = prefetching.set(True)
+        try:
+            return func(*values)
+        finally:
+            prefetching.reset(token)
+
+    def _finished(self, key: Hashable, name: str, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            PREFETCH_TASKS.inc(name, 'failed')
+            logger.debug(f"Prefetch {key!r} failed: {error}")
+        else:
+            self._recent.set(key, True)
@@ -0,0 +1,146 @@
+import re
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from agents.scheduler import parse_hour
+from utils.parsing import duration_minutes, parse_cost
+from utils.cache import TTLCache
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with a naive plural strip so 'museums' matches 'museum'."""
+    tokens = []
+    for token in _TOKEN.findall(str(text).lower()):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class AttractionIndex:
+    """TF-IDF index over a candidate list, with cost and duration kept as NumPy columns."""
+
+    def __init__(self, attractions: List[Dict]):
+        self.attractions = attractions
+        documents = [
+            tokenize(f"{a.get('name', '')} {a.get('category', '')} {a.get('description', '')}")
+            for a in attractions
+        ]
+        self.vocabulary = {term: i for i, term in enumerate(sorted({t for doc in documents for t in doc}))}
+
+        counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            for term in doc:
+                counts[row, self.vocabulary[term]] += 1.0
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1.0 + len(documents)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        weights = counts * self.idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        self.matrix = weights / np.where(norms == 0, 1.0, norms)
+
+        self.costs = np.fromiter((parse_cost(a.get('cost')) for a in attractions), dtype=np.float32,
+                                 count=len(attractions))
+        self.durations = np.fromiter((duration_minutes(a.get('duration')) for a in attractions), dtype=np.float32,
+                                     count=len(attractions))
+
+    def similarity(self, interests: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of every candidate to the interests."""
+        query = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term in tokenize(" ".join(interests)):
+            index = self.vocabulary.get(term)
+            if index is not None:
+                query[index] += 1.0
+        query *= self.idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.zeros(len(self.attractions), dtype=np.float32)
+        return self.matrix @ (query / norm)
+
+
+class AttractionRanker:
+    """
+    Pre-rank suggested attractions so only the top-k that fit the day reach the LLM prompt.
+
+    Candidates are scored by TF-IDF similarity to the requested interests; those over
+    budget or longer than the time window are dropped, and the best ones are taken
+    while their combined visit time still fits the day.
+    """
+
+    def __init__(self, top_k: int = 8, travel_minutes: float = 20.0, cache_size: int = 256):
+        self.top_k = top_k
+        self.travel_minutes = travel_minutes
+        self._indexes = TTLCache(maxsize=cache_size, ttl=3600.0)
+
+    def index_for(self, attractions: List[Dict]) -> AttractionIndex:
+        """Reuse the index for a candidate list that was already seen (e.g. on re-plans)."""
+        key = tuple((a.get('name'), a.get('category'), str(a.get('cost')), str(a.get('duration')))
+                    for a in attractions)
+        index = self._indexes.get(key)
+        if index is None:
+            index = AttractionIndex(attractions)
+            self._indexes.set(key, index)
+        return index
+
+    def rank(self,
+             attractions: List[Dict],
+             interests: Optional[Sequence[str]],
+             budget: Optional[float],
+             start_time: str,
+             end_time: str,
+             top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Select the candidates worth sending to the LLM.
+
+        Args:
+            attractions (List[Dict]): Suggested attractions
+            interests (Sequence[str]): Interests from the request
+            budget (float): Total budget in dollars, if any
+            start_time (str): Start of the day window
+            end_time (str): End of the day window
+            top_k (int): Maximum number of candidates, defaults to the ranker's `top_k`
+
+        Returns:
+            List[Dict]: Selected attractions, best first
+        """
+        attractions = [a for a in attractions if 'name' in a]
+        if not attractions:
+            return []
+        top_k = top_k or self.top_k
+
+        index = self.index_for(attractions)
+        scores = index.similarity(interests or [])
+        # Mild preference for cheaper candidates breaks ties between equally relevant ones
+        scores = scores - 0.01 * index.costs / (index.costs.max() + 1.0)
+
+        window_minutes = max(60.0, 60.0 * (parse_hour(end_time, 18) - parse_hour(start_time, 9)))
+        feasible = index.durations <= window_minutes
+        if budget:
+            feasible &= index.costs <= budget
+
+        order = np.argsort(-np.where(feasible, scores, -np.inf), kind='stable')
+        selected, used_minutes, spent = [], 0.0, 0.0
+        for i in order[:int(feasible.sum())]:
+            needed = float(index.durations[i]) + self.travel_minutes
+            if used_minutes + needed > window_minutes:
+                continue
+            if budget and spent + float(index.costs[i]) > budget:
+                continue
+            selected.append(attractions[i])
+            used_minutes += needed
+            spent += float(index.costs[i])
+            if len(selected) == top_k:
+                break
+        return selected
+
+
+def format_compact(attractions: List[Dict]) -> str:
+    """Encode attractions as a pipe-separated table, one row per attraction."""
+    rows = ["name|minutes|usd|category"]
+    for a in attractions:
+        rows.append(
+            f"{a['name']}|{int(duration_minutes(a.get('duration')))}|"
+            f"{parse_cost(a.get('cost')):g}|{a.get('category', '')}"
+        )
+    return "\n".join(rows)
@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from agents.itinerary_generation import ItineraryGenerationAgent
+from agents.llm_gateway import PRIORITY_BATCH, PRIORITY_SPECULATIVE
+from agents.scheduler import WeatherAwareScheduler
+from models.itinerary import Itinerary
+from utils.parsing import parse_cost
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+BASELINE = "baseline"
+SCENARIOS = (BASELINE, "wet_weather", "low_budget", "fewer_stops")
+
+# Fraction of the budget (or of the baseline candidates' cost) kept by the low-budget plan
+LOW_BUDGET_FACTOR = 0.5
+# Smallest low-budget plan in dollars; a zero budget would read as "not specified" in the prompt
+MIN_LOW_BUDGET = 5.0
+# Indoor candidates needed before outdoor ones are dropped from the wet-weather plan
+MIN_INDOOR_CANDIDATES = 3
+
+
+def scenario_request(name: str, request: Dict, ranker_top_k: int) -> Dict:
+    """
+    Derive the `build_prompt` arguments of scenario `name` from the shared request.
+
+    Every scenario starts from the same candidate set and hourly forecast; only the
+    constraints change.
+    """
+    params = dict(request)
+    if name == BASELINE:
+        return params
+
+    if name == "wet_weather":
+        forecast = request.get('hourly_forecast') or [
+            {"time": f"{request['date']} {hour:02d}:00", "temp_c": 15.0} for hour in range(24)
+        ]
+        params['hourly_forecast'] = [dict(hour, rain_chance=100, condition="Rain") for hour in forecast]
+        indoor = [a for a in request['attractions'] if not WeatherAwareScheduler.is_outdoor(a)]
+        if len(indoor) >= MIN_INDOOR_CANDIDATES:
+            params['attractions'] = indoor
+        params['notes'] = "Rain all day. Prefer indoor activities and keep walking between stops short."
+    elif name == "low_budget":
+        budget = request.get('budget')
+        if not budget:
+            costs = sorted(parse_cost(a.get('cost')) for a in request['attractions'])
+            budget = sum(costs[:ranker_top_k])
+        # Never above the user's own budget, however small
+        floor = min(MIN_LOW_BUDGET, request.get('budget') or MIN_LOW_BUDGET)
+        params['budget'] = max(round(budget * LOW_BUDGET_FACTOR, 2), floor)
+        params['notes'] = "Spend as little as possible: favour free sights and public transport."
+    elif name == "fewer_stops":
+        params['top_k'] = max(2, ranker_top_k // 2)
+        params['notes'] = "Relaxed pace: fewer stops, longer visits and generous breaks."
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+    return params
+
+
+@lru_cache()
+def _worker_agent() -> ItineraryGenerationAgent:
+    return ItineraryGenerationAgent()
+
+
+def prepare_scenario(name: str, request: Dict) -> str:
+    """Build the planning prompt of one scenario; runs in a worker process."""
+    agent = _worker_agent()
+    return agent.build_prompt(**scenario_request(name, request, agent.ranker.top_k))
+
+
+def _warm_up() -> bool:
+    _worker_agent()
+    return True
+
+
+class ScenarioPlanner:
+    """
+    Plan several variants of the same day in parallel.
+
+    Ranking, slot placement and prompt building run in a process pool so the variants
+    use separate cores. The LLM calls stay in this process, in threads, so they all go
+    through the shared LLM gateway and its budgets. Whatever finished by the deadline is
+    returned; the other scenarios are reported as errors.
+    """
+
+    def __init__(self, agent: ItineraryGenerationAgent, processes: int = 2, threads: int = 16):
+        self.agent = agent
+        self.processes = processes
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="scenario")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker processes ahead of the first request; otherwise the first scenario does."""
+        pool = self._process_pool()
+        for _ in range(self.processes):
+            pool.submit(_warm_up)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit locks held by this process's threads at fork time
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _prepare(self, name: str, request: Dict, deadline: float) -> str:
+        pool = self._process_pool()
+        try:
+            future = pool.submit(prepare_scenario, name, request)
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except BrokenProcessPool:
+            logger.warning("Scenario process pool broke; preparing scenarios in-process")
+            with self._lock:
+                # Several scenarios can see the same broken pool; replace it only once
+                if self._pool is pool:
+                    self._pool = None
+            # Reap the dead workers and their queues before the next pool is started
+            pool.shutdown(wait=False, cancel_futures=True)
+            return self.agent.build_prompt(**scenario_request(name, request, self.agent.ranker.top_k))
+
+    def _run(self, name: str, request: Dict, deadline: float) -> Itinerary:
+        with span(f"scenario.{name}"):
+            prompt = self._prepare(name, request, deadline)
+            priority = PRIORITY_BATCH if name == BASELINE else PRIORITY_SPECULATIVE
+            return self.agent.complete_itinerary(prompt, priority=priority, deadline=deadline)
+
+    def plan(self, request: Dict, scenarios: List[str], deadline: float) -> Tuple[Dict[str, Itinerary], Dict[str, Exception]]:
+        """
+        Plan every scenario in `scenarios` from the same `build_prompt` arguments.
+
+        Args:
+            request (Dict): Shared `build_prompt` arguments (candidates, forecast, window, budget)
+            scenarios (List[str]): Scenario names from SCENARIOS
+            deadline (float): `time.monotonic()` value after which unfinished scenarios are dropped
+
+        Returns:
+            Tuple[Dict[str, Itinerary], Dict[str, Exception]]: Finished itineraries and the errors of the rest
+        """
+        futures = {self._threads.submit(self._run, name, request, deadline): name for name in scenarios}
+        itineraries, errors = {}, {}
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    itinerary = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    continue
+                if itinerary.error is not None:
+                    errors[name] = ValueError(itinerary.error)
+                else:
+                    itineraries[name] = itinerary
+        for future in pending:
+            future.cancel()
+            errors[futures[future]] = TimeoutError(f"scenario {futures[future]} did not finish in time")
+        return itineraries, errors
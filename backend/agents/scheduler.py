@@ -0,0 +1,154 @@
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from utils.parsing import duration_minutes
+
+# Categories that are mostly spent outside and therefore exposed to the weather
+OUTDOOR_KEYWORDS = (
+    'park', 'garden', 'beach', 'hike', 'hiking', 'trail', 'nature', 'outdoor',
+    'zoo', 'viewpoint', 'lookout', 'walking', 'walk', 'boat', 'cruise',
+    'market', 'square', 'street', 'bridge', 'lake', 'river', 'mountain'
+)
+
+# Temperature band (in °C) considered comfortable for outdoor activities
+COMFORT_MIN_C = 16.0
+COMFORT_MAX_C = 27.0
+
+
+class WeatherAwareScheduler:
+    """Score activity × hour suitability from an hourly forecast and place stops in good slots."""
+
+    def __init__(self, rain_weight: float = 0.8, temp_weight: float = 0.2):
+        self.rain_weight = rain_weight
+        self.temp_weight = temp_weight
+
+    @staticmethod
+    def forecast_arrays(hourly_forecast: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert the hourly forecast returned by WeatherAgent into temperature and rain arrays."""
+        count = len(hourly_forecast)
+        temps = np.fromiter((hour['temp_c'] for hour in hourly_forecast), dtype=np.float64, count=count)
+        rain = np.fromiter((hour['rain_chance'] for hour in hourly_forecast), dtype=np.float64, count=count)
+        return temps, rain
+
+    @staticmethod
+    def is_outdoor(attraction: Dict) -> bool:
+        """Classify an attraction as outdoor using an explicit flag or its category."""
+        if 'indoor' in attraction:
+            return not attraction['indoor']
+        if 'outdoor' in attraction:
+            return bool(attraction['outdoor'])
+        category = str(attraction.get('category', '')).lower()
+        return any(keyword in category for keyword in OUTDOOR_KEYWORDS)
+
+    def suitability_matrix(self,
+                           attractions: List[Dict],
+                           temps: np.ndarray,
+                           rain: np.ndarray) -> np.ndarray:
+        """
+        Build the activity × hour suitability matrix.
+
+        Args:
+            attractions (List[Dict]): Candidate attractions
+            temps (np.ndarray): Hourly temperatures in °C
+            rain (np.ndarray): Hourly chance of rain in percent
+
+        Returns:
+            np.ndarray: Scores in [0, 1], one row per attraction and one column per hour
+        """
+        outdoor = np.fromiter((self.is_outdoor(a) for a in attractions), dtype=bool, count=len(attractions))
+
+        # Hourly weather penalty, shared by every outdoor activity
+        rain_penalty = np.clip(rain / 100.0, 0.0, 1.0)
+        discomfort = np.maximum(COMFORT_MIN_C - temps, 0.0) + np.maximum(temps - COMFORT_MAX_C, 0.0)
+        temp_penalty = np.clip(discomfort / 10.0, 0.0, 1.0)
+        penalty = self.rain_weight * rain_penalty + self.temp_weight * temp_penalty
+
+        # Indoor activities are unaffected; outdoor ones lose the hourly penalty
+        return 1.0 - np.outer(outdoor, penalty)
+
+    def plan_slots(self,
+                   attractions: List[Dict],
+                   hourly_forecast: List[Dict],
+                   start_time: str,
+                   end_time: str) -> List[Dict]:
+        """
+        Assign each attraction to the block of hours within the day window that suits it best.
+
+        The most weather-sensitive attractions are placed first so outdoor stops get the dry hours.
+        Attractions that do not fit in the remaining hours are left out and handled by the LLM.
+        """
+        if not attractions or not hourly_forecast:
+            return []
+
+        temps, rain = self.forecast_arrays(hourly_forecast)
+        scores = self.suitability_matrix(attractions, temps, rain)
+        hours = scores.shape[1]
+
+        first_hour = min(parse_hour(start_time, 9), hours)
+        last_hour = min(parse_hour(end_time, 18), hours)
+        free = np.zeros(hours, dtype=bool)
+        free[first_hour:last_hour] = True
+
+        # Spread between best and worst hour inside the window measures weather sensitivity
+        window = scores[:, first_hour:last_hour]
+        if window.size == 0:
+            return []
+        sensitivity = window.max(axis=1) - window.min(axis=1)
+        order = np.argsort(-sensitivity, kind='stable')
+
+        slots = []
+        for index in order:
+            attraction = attractions[index]
+            length = _duration_hours(attraction.get('duration'))
+            if length > hours:
+                continue
+
+            # Mean score of every block of `length` hours, masked to blocks that are entirely free
+            cumulative = np.concatenate(([0.0], np.cumsum(scores[index])))
+            block_scores = (cumulative[length:] - cumulative[:-length]) / length
+            free_cumulative = np.concatenate(([0], np.cumsum(free)))
+            block_free = (free_cumulative[length:] - free_cumulative[:-length]) == length
+            if not block_free.any():
+                continue
+
+            start = int(np.argmax(np.where(block_free, block_scores, -np.inf)))
+            free[start:start + length] = False
+            slots.append({
+                "name": attraction.get('name', 'Unknown'),
+                "start": f"{start:02d}:00",
+                "end": f"{start + length:02d}:00",
+                "outdoor": self.is_outdoor(attraction),
+                "score": round(float(block_scores[start]), 2)
+            })
+
+        slots.sort(key=lambda slot: slot['start'])
+        return slots
+
+    def format_slots(self, slots: List[Dict]) -> str:
+        """Format planned slots for the prompt."""
+        return "\n".join(
+            f"- {slot['start']}-{slot['end']} {slot['name']} "
+            f"({'outdoor' if slot['outdoor'] else 'indoor'}, suitability {slot['score']})"
+            for slot in slots
+        )
+
+
+def parse_hour(value: Optional[str], default: int) -> int:
+    """Parse '9', '09:30', '9am' or '5 PM' into an hour of the day."""
+    if not value:
+        return default
+    match = re.search(r'(\d{1,2})(?::\d{2})?\s*([ap]\.?m\.?)?', str(value).lower())
+    if not match:
+        return default
+    hour = int(match.group(1)) % 24
+    suffix = match.group(2)
+    if suffix and suffix.startswith('p') and hour < 12:
+        hour += 12
+    elif suffix and suffix.startswith('a') and hour == 12:
+        hour = 0
+    return hour
+
+
+def _duration_hours(value) -> int:
+    """Round a duration up to whole hours."""
+    return max(1, int(np.ceil(duration_minutes(value) / 60.0)))
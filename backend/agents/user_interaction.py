@@ -1,10 +1,25 @@
 from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
 from database.neo4j_client import Neo4jClient
 from typing import Dict, List, Optional
+from config import settings
+from agents.prefetch import Prefetcher
+from utils.cache import TTLCache
+from utils.tracing import record_cache, span, traced
+
+def split_interests(interests) -> List[str]:
+    """Interests as a list, accepting the comma-separated answer given in the dialog."""
+    if isinstance(interests, str):
+        return [interest.strip() for interest in interests.split(",") if interest.strip()]
+    return list(interests or [])
 
 class UserInteractionAgent:
-    def __init__(self):
+    def __init__(self, prefetcher: Optional[Prefetcher] = None):
         self.db = Neo4jClient()
+        self.prefetcher = prefetcher
+        # Suggestions are slow to generate; shared by requests and dialog prefetches
+        self.attractions_cache = TTLCache(maxsize=1024, ttl=settings.CITY_DATA_CACHE_TTL)
+        # Stored preferences per user, warmed once the dialog has written them
+        self.preferences_cache = TTLCache(maxsize=10000, ttl=settings.CITY_DATA_CACHE_TTL)
         
         # Load the model and tokenizer
         model_path = "models/EleutherAI/gpt-neo-125M"
@@ -12,6 +27,7 @@ class UserInteractionAgent:
         self.model = AutoModelForCausalLM.from_pretrained(model_path)
         self.pipeline = pipeline("text-generation", model=self.model, tokenizer=self.tokenizer)
         
+    @traced("user_interaction.process_initial_input")
     def process_initial_input(self, user_id: str, message: str) -> Dict:
         """Process initial user input interactively to gather all necessary details."""
         
@@ -41,18 +57,39 @@ class UserInteractionAgent:
                 # Store the answer in the extracted_info dictionary
                 extracted_info[key] = user_answer
                 print(f"Extracted {key}: {user_answer}")
+                
+                # Start fetching city data while the remaining questions are answered
+                if self.prefetcher is not None:
+                    self.prefetcher.observe(user_id, extracted_info)
 
             # Store the gathered preferences in the database
             self._store_preferences(user_id, extracted_info)
             
+            # Read them back for /trip-bundle while the client is still sending it
+            if self.prefetcher is not None:
+                self.prefetcher.observe(user_id, dict(extracted_info, user_id=user_id))
+            
             return extracted_info
         
         except Exception as e:
             print(f"Error: {str(e)}")
             return {"error": str(e)}
         
+    @traced("user_interaction.suggest_attractions")
     def suggest_attractions(self, city: str, interests: List[str]) -> List[Dict]:
         """Suggest attractions based on city and interests."""
+        key = (city.strip().lower(), tuple(sorted(interest.strip().lower() for interest in interests)))
+        attractions, hit = self.attractions_cache.get_or_compute(
+            key, lambda: self._generate_attractions(city, interests)
+        )
+        record_cache("attractions", hit)
+        if any('error' in attraction for attraction in attractions):
+            # Unparseable model output is not worth reusing
+            self.attractions_cache.pop(key)
+        return attractions
+    
+    def _generate_attractions(self, city: str, interests: List[str]) -> List[Dict]:
+        """Ask the text-generation model for attractions."""
         system_prompt = f"""
         Suggest popular attractions in {city} that match the following interests: {', '.join(interests)}.
         For each attraction, provide:
@@ -63,9 +100,18 @@ class UserInteractionAgent:
         - Brief description
         """
         
-        response = self.pipeline(system_prompt, max_length=200)
+        with span("gpt_neo.generate", upstream="gpt_neo"):
+            response = self.pipeline(system_prompt, max_length=200)
         return self._parse_attractions(response[0]['generated_text'])
 
+    def get_preferences(self, user_id: str) -> List[Dict]:
+        """Stored preferences of a user."""
+        preferences, hit = self.preferences_cache.get_or_compute(
+            user_id, lambda: self.db.get_user_preferences(user_id)
+        )
+        record_cache("preferences", hit)
+        return preferences
+
     def _store_preferences(self, user_id: str, info: Dict):
         """Store user preferences in Neo4j."""
         if 'interests' in info:
@@ -74,6 +120,9 @@ class UserInteractionAgent:
         
         if 'budget' in info:
             self.db.create_user_preference(user_id, 'Budget', 'HAS', str(info['budget']))
+        
+        # Never serve the preferences read before this dialog
+        self.preferences_cache.pop(user_id)
 
     def _parse_llm_response(self, response: str) -> Dict:
         """Parse LLM response into structured format."""
@@ -2,16 +2,23 @@ import requests
 import logging
 from datetime import datetime
 from typing import Dict, Optional
-from ..config import settings
-from ..utils.exceptions import WeatherAPIError
+from config import settings
+from utils.exceptions import WeatherAPIError
+from utils.cache import TTLCache
+from utils.resilience import get_or_compute_fresh, get_upstream
+from utils.tracing import record_cache, span, traced
 
 logger = logging.getLogger(__name__)
 
 class WeatherAgent:
     def __init__(self):
         self.api_key = settings.WEATHER_API_KEY
-        self.base_url = "http://api.weatherapi.com/v1"
+        self.base_url = settings.WEATHER_API_URL
+        self.upstream = get_upstream("weather")
+        # Fresh results shared by requests and dialog prefetches
+        self.cache = TTLCache(maxsize=1024, ttl=settings.CITY_DATA_CACHE_TTL)
 
+    @traced("weather.get_forecast")
     def get_forecast(self, city: str, date: str) -> Dict:
         """
         Get weather forecast for a specific city and date.
@@ -23,6 +30,16 @@ class WeatherAgent:
         Returns:
             Dict: Weather forecast information
         """
+        forecast, hit = get_or_compute_fresh(
+            self.cache,
+            ("forecast", city.strip().lower(), date),
+            lambda: self._fetch_forecast(city, date)
+        )
+        record_cache("weather_forecast", hit)
+        return forecast
+    
+    def _fetch_forecast(self, city: str, date: str) -> Dict:
+        """Request and summarize the daily forecast."""
         try:
             logger.info(f"Fetching weather forecast for {city} on {date}")
             
@@ -30,15 +47,17 @@ class WeatherAgent:
             parsed_date = datetime.strptime(date, "%Y-%m-%d")
             days_ahead = (parsed_date - datetime.now()).days
             
-            # Make API request
-            response = requests.get(
-                f"{self.base_url}/forecast.json",
-                params={
-                    "key": self.api_key,
-                    "q": city,
-                    "days": max(1, days_ahead + 1),
-                    "aqi": "no"
-                }
+            # Make API request; hedged, bounded by the deadline and served stale on outages
+            params = {
+                "key": self.api_key,
+                "q": city,
+                "days": max(1, days_ahead + 1),
+                "aqi": "no"
+            }
+            response = self.upstream.call(
+                ("forecast", city.lower(), date),
+                lambda timeout: self._request("http.weather.forecast", params, timeout),
+                cacheable=lambda r: r.status_code == 200
             )
             
             if response.status_code != 200:
@@ -72,6 +91,14 @@ class WeatherAgent:
             logger.error(f"Unexpected error in weather forecast: {str(e)}")
             raise
     
+    def _request(self, span_name: str, params: Dict, timeout: float) -> requests.Response:
+        """One request to forecast.json; server errors count as upstream failures."""
+        with span(span_name, upstream="weather"):
+            response = requests.get(f"{self.base_url}/forecast.json", params=params, timeout=timeout)
+            if response.status_code >= 500:
+                raise WeatherAPIError(f"Weather API returned status code {response.status_code}")
+        return response
+    
     def _generate_recommendations(self, forecast: Dict) -> list:
         """Generate weather-based recommendations."""
         recommendations = []
@@ -97,17 +124,30 @@ class WeatherAgent:
             
         return recommendations
 
+    @traced("weather.get_hourly_forecast")
     def get_hourly_forecast(self, city: str, date: str) -> Dict:
         """Get hourly weather forecast for better tour planning."""
+        forecast, hit = get_or_compute_fresh(
+            self.cache,
+            ("hourly", city.strip().lower(), date),
+            lambda: self._fetch_hourly_forecast(city, date)
+        )
+        record_cache("weather_hourly", hit)
+        return forecast
+    
+    def _fetch_hourly_forecast(self, city: str, date: str) -> Dict:
+        """Request the hourly forecast."""
         try:
-            response = requests.get(
-                f"{self.base_url}/forecast.json",
-                params={
-                    "key": self.api_key,
-                    "q": city,
-                    "days": 1,
-                    "hour": 24
-                }
+            params = {
+                "key": self.api_key,
+                "q": city,
+                "dt": date,
+                "days": 1
+            }
+            response = self.upstream.call(
+                ("hourly", city.lower(), date),
+                lambda timeout: self._request("http.weather.hourly", params, timeout),
+                cacheable=lambda r: r.status_code == 200
             )
             
             if response.status_code != 200:
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict
 
 class Settings(BaseSettings):
     NEO4J_URI: str = "bolt://localhost:7687"
@@ -7,6 +8,81 @@ class Settings(BaseSettings):
     NEO4J_PASSWORD: str = "password"
     OPENAI_API_KEY: str = "your-api-key"
     WEATHER_API_KEY: str = "your-weather-api-key"
+    NEWS_API_KEY: str = "your-news-api-key"
+    SECRET_KEY: str = "your-secret-key"
+    
+    # Upstream endpoints, overridable to point at local stand-ins
+    OPENAI_API_BASE: str = "https://api.openai.com/v1"
+    WEATHER_API_URL: str = "http://api.weatherapi.com/v1"
+    NEWS_API_URL: str = "https://newsapi.org/v2"
+    
+    # Fraction of traced spans that are also written to the debug log
+    SPAN_LOG_SAMPLE_RATE: float = 0.0
+    
+    # Number of ranked attractions included in the itinerary prompt
+    PROMPT_TOP_K: int = 8
+    
+    # LLM admission control
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_REQUESTS_PER_MINUTE: float = 3500
+    LLM_TOKENS_PER_MINUTE: float = 90000
+    LLM_MAX_QUEUE: int = 64
+    # Seconds a request may spend on its LLM calls, queueing included
+    LLM_REQUEST_DEADLINE: float = 30.0
+    
+    # Alternative scenarios: worker processes for prompt building, threads for their LLM calls
+    SCENARIO_PROCESSES: int = 2
+    SCENARIO_THREADS: int = 16
+    
+    # Per-part timeouts in seconds for /trip-bundle
+    TRIP_BUNDLE_TIMEOUTS: Dict[str, float] = {
+        "itinerary": 60.0,
+        "weather": 5.0,
+        "news": 5.0,
+        "preferences": 2.0,
+        "default": 10.0
+    }
+    
+    # Weather and news upstreams: per-call deadline in seconds, hedging, circuit breaker
+    UPSTREAM_TIMEOUTS: Dict[str, float] = {
+        "weather": 3.0,
+        "news": 3.0,
+        "default": 3.0
+    }
+    UPSTREAM_HEDGE_QUANTILE: float = 0.95
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    # How long the last good response may be served when the upstream is down
+    UPSTREAM_STALE_TTL: float = 21600.0
+    
+    # Seconds that fetched city data (forecasts, news, attraction suggestions) is reused
+    CITY_DATA_CACHE_TTL: float = 600.0
+    # Seconds that a stale fallback is reused, so the background refresh is picked up soon
+    CITY_DATA_STALE_TTL: float = 15.0
+    # Seconds that a generated itinerary is reused for an identical plan request
+    ITINERARY_CACHE_TTL: float = 900.0
+    # Background prefetch while the dialog collects slots: worker threads and queued task budget
+    PREFETCH_WORKERS: int = 4
+    PREFETCH_BUDGET: int = 16
+    
+    # Event store: JSON / JSON-lines file and HTTP feed loaded at startup, grid cell in degrees,
+    # and the distance in metres within which an event affects a stop
+    EVENTS_FILE: str = ""
+    EVENTS_FEED_URL: str = ""
+    EVENTS_CELL_SIZE: float = 0.01
+    EVENTS_CONFLICT_RADIUS: float = 500.0
+    
+    # Authentication
+    AUTH_HASH_WORKERS: int = 4
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL: float = 300.0
+    
+    # Logging
+    LOG_LEVEL: str = "DEBUG"
+    LOG_DIR: str = "logs"
+    LOG_JSON: bool = True
+    # Fraction of DEBUG records kept per logger, e.g. {"agents.news": 0.1}
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
     
     class Config:
         env_file = ".env"
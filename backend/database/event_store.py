@@ -0,0 +1,306 @@
+import json
+import logging
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import requests
+from config import settings
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+METRES_PER_DEGREE = 111_320.0
+# Bucket of events that name a venue but have no coordinates; matched by name
+NAMED = "named"
+
+# A stop: (start, end) as epoch seconds, coordinates if known, and its place name
+Stop = Tuple[float, float, Optional[float], Optional[float], str]
+
+
+def to_timestamp(value) -> float:
+    """
+    Epoch seconds of the wall-clock time of an ISO-8601 string, datetime or number.
+
+    Schedules are local times without an offset, so events are compared on the same
+    local wall clock: an offset is dropped rather than applied ("19:00+02:00" reads as
+    19:00), and the wall clock is counted as if it were UTC, whatever the host's
+    timezone. Feeds are expected to give times in the city's local time.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class IntervalIndex:
+    """
+    Sorted-array interval index.
+
+    Intervals are sorted by start and the longest duration is kept, so every interval
+    that can overlap [qs, qe) starts in [qs - max_duration, qe): two binary searches
+    bound the candidates, and a vectorized end check finishes the job.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, ids: np.ndarray):
+        order = np.argsort(starts, kind='stable')
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.ids = ids[order]
+        self.max_duration = float((self.ends - self.starts).max()) if len(self.starts) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def query(self, query_starts: np.ndarray, query_ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Overlaps of many query intervals at once.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Query positions and interval ids of every overlapping pair
+        """
+        lo = np.searchsorted(self.starts, query_starts - self.max_duration, side='left')
+        hi = np.searchsorted(self.starts, query_ends, side='left')
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        query_idx = np.repeat(np.arange(len(query_starts)), counts)
+        # Position within each query's candidate run, offset by the run's first index
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidate = np.repeat(lo, counts) + offsets
+        overlapping = self.ends[candidate] > query_starts[query_idx]
+        return query_idx[overlapping], self.ids[candidate[overlapping]]
+
+
+class CityEvents:
+    """
+    Immutable index of one city's events.
+
+    Events with coordinates are bucketed into a grid of `cell_size` degrees, each bucket
+    with its own interval index. Events without coordinates go to one of two extra
+    buckets: those naming a venue are matched against stop names, the rest are
+    city-wide (strikes, festivals) and affect every stop.
+    """
+
+    def __init__(self, events: List[Dict], cell_size: float):
+        self.events = events
+        self.cell_size = cell_size
+        starts = np.array([to_timestamp(e['start']) for e in events], dtype=np.float64)
+        ends = np.array([to_timestamp(e['end']) for e in events], dtype=np.float64)
+        self.lats = np.array([np.nan if e.get('lat') is None else float(e['lat']) for e in events])
+        self.lons = np.array([np.nan if e.get('lon') is None else float(e['lon']) for e in events])
+        self.venues = [str(e.get('venue') or '').strip().lower() for e in events]
+
+        buckets = defaultdict(list)
+        for i in range(len(events)):
+            cell = self.cell(self.lats[i], self.lons[i])
+            buckets[NAMED if cell is None and self.venues[i] else cell].append(i)
+        self.buckets: Dict[object, IntervalIndex] = {}
+        for cell, members in buckets.items():
+            ids = np.array(members, dtype=np.int64)
+            self.buckets[cell] = IntervalIndex(starts[ids], ends[ids], ids)
+        self.index = IntervalIndex(starts, ends, np.arange(len(events), dtype=np.int64))
+
+    def cell(self, lat: float, lon: float) -> Optional[Tuple[int, int]]:
+        if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+            return None
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size))
+
+    def between(self, start: float, end: float) -> List[Dict]:
+        _, ids = self.index.query(np.array([start]), np.array([end]))
+        return [self.events[i] for i in sorted(ids.tolist(), key=lambda i: self.events[i]['start'])]
+
+    def overlaps(self, stops: Sequence[Stop], radius_m: float) -> List[List[Dict]]:
+        """
+        Events overlapping each stop, in one pass over the touched buckets.
+
+        A stop with coordinates matches located events within `radius_m`; a stop without
+        them matches located events whose venue appears in its name. Every stop matches
+        venue-only events named in it and city-wide events overlapping its time.
+        """
+        matches: List[set] = [set() for _ in stops]
+        if not stops:
+            return []
+        starts = np.array([stop[0] for stop in stops], dtype=np.float64)
+        ends = np.array([stop[1] for stop in stops], dtype=np.float64)
+
+        # Group stops by the grid cells their radius reaches (cells narrow with latitude)
+        cell_m = self.cell_size * METRES_PER_DEGREE
+        by_cell = defaultdict(list)
+        unlocated = []
+        for position, (_, _, lat, lon, _) in enumerate(stops):
+            home = self.cell(lat, lon)
+            if home is None:
+                unlocated.append(position)
+                continue
+            ring_y = max(1, math.ceil(radius_m / cell_m))
+            ring_x = max(1, math.ceil(radius_m / (cell_m * max(0.01, math.cos(math.radians(lat))))))
+            for dy in range(-ring_y, ring_y + 1):
+                for dx in range(-ring_x, ring_x + 1):
+                    by_cell[(home[0] + dy, home[1] + dx)].append(position)
+        by_cell[None] = by_cell[NAMED] = list(range(len(stops)))
+
+        for cell, positions in by_cell.items():
+            index = self.buckets.get(cell)
+            if index is None:
+                continue
+            positions = np.array(positions, dtype=np.int64)
+            query_idx, ids = index.query(starts[positions], ends[positions])
+            owners = positions[query_idx]
+            if cell == NAMED:
+                keep = self._named(owners, ids, stops)
+                owners, ids = owners[keep], ids[keep]
+            elif cell is not None:
+                keep = self._within(owners, ids, stops, radius_m)
+                owners, ids = owners[keep], ids[keep]
+            for owner, event_id in zip(owners.tolist(), ids.tolist()):
+                matches[owner].add(event_id)
+
+        # Stops without coordinates: located events only when the venue is named in the stop
+        if unlocated:
+            positions = np.array(unlocated, dtype=np.int64)
+            query_idx, ids = self.index.query(starts[positions], ends[positions])
+            owners = positions[query_idx]
+            keep = ~np.isnan(self.lats[ids]) & self._named(owners, ids, stops)
+            for owner, event_id in zip(owners[keep].tolist(), ids[keep].tolist()):
+                matches[owner].add(event_id)
+
+        return [[self.events[i] for i in sorted(found)] for found in matches]
+
+    def _named(self, owners: np.ndarray, ids: np.ndarray, stops: Sequence[Stop]) -> np.ndarray:
+        names = [stop[4].lower() for stop in stops]
+        return np.array([bool(self.venues[e]) and self.venues[e] in names[o]
+                         for o, e in zip(owners.tolist(), ids.tolist())], dtype=bool)
+
+    def _within(self, owners: np.ndarray, ids: np.ndarray, stops: Sequence[Stop], radius_m: float) -> np.ndarray:
+        stop_lats = np.array([stops[i][2] for i in owners.tolist()], dtype=np.float64)
+        stop_lons = np.array([stops[i][3] for i in owners.tolist()], dtype=np.float64)
+        # Equirectangular distance is accurate to well under a percent at city scale
+        dy = (self.lats[ids] - stop_lats) * METRES_PER_DEGREE
+        dx = (self.lons[ids] - stop_lons) * METRES_PER_DEGREE * np.cos(np.radians(stop_lats))
+        return dx * dx + dy * dy <= radius_m * radius_m
+
+
+class EventStore:
+    """
+    Events and closures with start/end times and locations, indexed per city.
+
+    Bulk loads rebuild the affected cities' indexes and swap them in, so queries never
+    see a half-built index and never take a lock.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        self.cell_size = cell_size
+        self._events: Dict[str, List[Dict]] = defaultdict(list)
+        self._cities: Dict[str, CityEvents] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def city_key(city: str) -> str:
+        return city.strip().lower()
+
+    def load(self, events: Iterable[Dict]) -> int:
+        """
+        Add events in bulk.
+
+        Each event needs `city`, `name`, `start` and `end`; `lat`/`lon`, `venue`, `type`
+        (e.g. "closure" or "event") and `impact_level` are optional.
+
+        Returns:
+            int: Number of events added
+        """
+        added = defaultdict(list)
+        for event in events:
+            if not all(event.get(field) for field in ('city', 'name', 'start', 'end')):
+                continue
+            added[self.city_key(event['city'])].append(dict(event))
+        with self._lock:
+            for city, new_events in added.items():
+                self._events[city].extend(new_events)
+                self._cities[city] = CityEvents(self._events[city], self.cell_size)
+        return sum(len(new_events) for new_events in added.values())
+
+    def load_file(self, path: str) -> int:
+        """Load a JSON array or JSON-lines file of events."""
+        with open(path) as f:
+            text = f.read()
+        if text.lstrip().startswith('['):
+            return self.load(json.loads(text))
+        return self.load(json.loads(line) for line in text.splitlines() if line.strip())
+
+    def load_feed(self, url: str, timeout: float = 10.0) -> int:
+        """Load a JSON array of events from an HTTP feed."""
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return self.load(response.json())
+
+    def events_between(self, city: str, start, end) -> List[Dict]:
+        """Events in `city` overlapping [start, end), ordered by start."""
+        index = self._cities.get(self.city_key(city))
+        if index is None:
+            return []
+        return index.between(to_timestamp(start), to_timestamp(end))
+
+    @traced("events.schedule_conflicts")
+    def schedule_conflicts(self, city: str, date: str, schedule: List[Dict], radius_m: float = 500.0) -> List[List[Dict]]:
+        """
+        Events overlapping each stop of an itinerary, with one batched query.
+
+        Args:
+            city (str): City of the itinerary
+            date (str): Day of the itinerary (YYYY-MM-DD)
+            schedule (List[Dict]): Stops with `time` as "HH:MM-HH:MM" and optional `lat`/`lon`
+            radius_m (float): Distance within which a located event affects a stop
+
+        Returns:
+            List[List[Dict]]: Overlapping events per stop, in schedule order
+        """
+        index = self._cities.get(self.city_key(city))
+        if index is None:
+            return [[] for _ in schedule]
+        stops = [schedule_stop(date, item) for item in schedule]
+        located = [i for i, stop in enumerate(stops) if stop is not None]
+        found = index.overlaps([stops[i] for i in located], radius_m)
+        conflicts: List[List[Dict]] = [[] for _ in schedule]
+        for i, events in zip(located, found):
+            conflicts[i] = events
+        return conflicts
+
+
+def schedule_stop(date: str, item: Dict) -> Optional[Stop]:
+    """A schedule item as a Stop, or None when its time cannot be read."""
+    try:
+        start_text, end_text = [part.strip() for part in str(item.get('time', '')).split('-', 1)]
+        start = to_timestamp(f"{date}T{start_text}")
+        end = to_timestamp(f"{date}T{end_text}")
+    except ValueError:
+        return None
+    lat, lon = item.get('lat'), item.get('lon')
+    try:
+        lat, lon = (float(lat), float(lon)) if lat is not None and lon is not None else (None, None)
+    except (TypeError, ValueError):
+        lat, lon = None, None
+    name = f"{item.get('location', '')} {item.get('activity', '')}"
+    return start, max(end, start + 60.0), lat, lon, name
+
+
+@lru_cache()
+def get_event_store() -> EventStore:
+    """The process-wide event store, bulk loaded from the configured file and feed."""
+    store = EventStore(cell_size=settings.EVENTS_CELL_SIZE)
+    if settings.EVENTS_FILE:
+        try:
+            logger.info(f"Loaded {store.load_file(settings.EVENTS_FILE)} events from {settings.EVENTS_FILE}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load events from {settings.EVENTS_FILE}: {e}")
+    if settings.EVENTS_FEED_URL:
+        try:
+            logger.info(f"Loaded {store.load_feed(settings.EVENTS_FEED_URL)} events from the feed")
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Could not load the events feed: {e}")
+    return store
@@ -1,5 +1,7 @@
 from neo4j import GraphDatabase
 from config import settings
+from models.itinerary import Itinerary, pack, unpack
+from utils.tracing import traced
 
 class Neo4jClient:
     def __init__(self):
@@ -11,6 +13,7 @@ class Neo4jClient:
     def close(self):
         self.driver.close()
 
+    @traced("neo4j.create_user_preference", upstream="neo4j")
     def create_user_preference(self, user_id: str, entity: str, relationship: str, value: str):
         with self.driver.session() as session:
             query = """
@@ -22,6 +25,7 @@ class Neo4jClient:
             session.run(query, user_id=user_id, entity=entity, 
                        relationship=relationship, value=value)
 
+    @traced("neo4j.get_user_preferences", upstream="neo4j")
     def get_user_preferences(self, user_id: str):
         with self.driver.session() as session:
             query = """
@@ -31,15 +35,41 @@ class Neo4jClient:
             result = session.run(query, user_id=user_id)
             return [dict(record) for record in result]
 
-    def store_itinerary(self, user_id: str, city: str, places: list):
+    @traced("neo4j.store_itinerary", upstream="neo4j")
+    def store_itinerary(self, user_id: str, city: str, date: str, itinerary: Itinerary):
+        """Record the visited places and keep the full itinerary, packed, in the user's history."""
+        places = [stop.location for stop in itinerary.stops if stop.location]
         with self.driver.session() as session:
             query = """
             MERGE (u:User {id: $user_id})
             MERGE (c:City {name: $city})
+            CREATE (u)-[:PLANNED]->(i:Itinerary {date: $date, created_at: datetime(), payload: $payload})-[:IN]->(c)
             WITH u, c
             UNWIND $places as place
             MERGE (p:Place {name: place})
             MERGE (u)-[:VISITED]->(p)
             MERGE (p)-[:LOCATED_IN]->(c)
             """
-            session.run(query, user_id=user_id, city=city, places=places)
+            session.run(query, user_id=user_id, city=city, date=date,
+                       payload=pack(itinerary), places=places)
+
+    @traced("neo4j.get_user_history", upstream="neo4j")
+    def get_user_history(self, user_id: str, limit: int = 20):
+        with self.driver.session() as session:
+            query = """
+            MATCH (u:User {id: $user_id})-[:PLANNED]->(i:Itinerary)-[:IN]->(c:City)
+            RETURN c.name as city, i.date as date, toString(i.created_at) as created_at, i.payload as payload
+            ORDER BY i.created_at DESC
+            LIMIT $limit
+            """
+            result = session.run(query, user_id=user_id, limit=limit)
+            itineraries = [
+                {
+                    "city": record["city"],
+                    "date": record["date"],
+                    "created_at": record["created_at"],
+                    "itinerary": unpack(bytes(record["payload"]))
+                }
+                for record in result
+            ]
+        return {"itineraries": itineraries, "preferences": self.get_user_preferences(user_id)}
@@ -1,10 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import functools
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict
-from agents.user_interaction import UserInteractionAgent
+from pydantic import BaseModel, field_validator
+from typing import List, Optional, Dict, Tuple
+from agents.user_interaction import UserInteractionAgent, split_interests
 from agents.itinerary_generation import ItineraryGenerationAgent
+from agents.scenarios import BASELINE, SCENARIOS, ScenarioPlanner
+from agents.prefetch import Prefetcher
+from agents.llm_gateway import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from agents.weather import WeatherAgent
+from agents.news import NewsAgent
 from database.neo4j_client import Neo4jClient
+from models.itinerary import Itinerary, ItineraryResponse, pack, unpack
+from utils.cache import TTLCache
+from utils.tracing import record_cache, render_metrics
+from utils.logging_config import request_id_var, setup_logging
+from config import settings
+from utils.exceptions import LLMOverloadedError, UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -17,10 +39,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def configure_logging():
+    setup_logging(
+        level=settings.LOG_LEVEL,
+        log_dir=settings.LOG_DIR,
+        json_logs=settings.LOG_JSON,
+        sample_rates=settings.LOG_SAMPLE_RATES
+    )
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag every log record of a request with its id (taken from X-Request-ID when present)."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Initialize agents
-user_agent = UserInteractionAgent()
+prefetcher = Prefetcher(
+    max_workers=settings.PREFETCH_WORKERS,
+    budget=settings.PREFETCH_BUDGET,
+    ttl=settings.CITY_DATA_CACHE_TTL
+)
+user_agent = UserInteractionAgent(prefetcher=prefetcher)
 itinerary_agent = ItineraryGenerationAgent()
+# Scenarios are opt-in, so its worker processes are only spawned by the first scenario request
+scenario_planner = ScenarioPlanner(
+    itinerary_agent,
+    processes=settings.SCENARIO_PROCESSES,
+    threads=settings.SCENARIO_THREADS
+)
+weather_agent = WeatherAgent()
+news_agent = NewsAgent()
 db_client = Neo4jClient()
+# Requests that call the LLM run on their own threads, one per call the gateway can hold, so
+# waiting for LLM admission never fills the default pool that /weather and /news use
+LLM_REQUEST_THREADS = settings.LLM_MAX_CONCURRENCY + settings.LLM_MAX_QUEUE
+llm_executor = ThreadPoolExecutor(max_workers=LLM_REQUEST_THREADS, thread_name_prefix="llm-request")
+llm_request_slots = threading.BoundedSemaphore(LLM_REQUEST_THREADS)
+# Packed itineraries per plan request; decoded on every hit so callers never share stops
+itinerary_cache = TTLCache(maxsize=1024, ttl=settings.ITINERARY_CACHE_TTL)
+
+# Everything /generate-itinerary and /trip-bundle will read, fetched as soon as the dialog knows it
+prefetcher.register("attractions", ("city", "interests"),
+                    lambda city, interests: user_agent.suggest_attractions(city, split_interests(interests)))
+prefetcher.register("weather", ("city", "date"), weather_agent.get_forecast)
+prefetcher.register("hourly_forecast", ("city", "date"), weather_agent.get_hourly_forecast)
+prefetcher.register("news", ("city",), news_agent.get_news)
+# Only filled in once the dialog has stored the user's answers, so the warmed preferences include them
+prefetcher.register("preferences", ("city", "user_id"), lambda city, user_id: user_agent.get_preferences(user_id))
 
 class UserInput(BaseModel):
     user_id: str
@@ -35,6 +107,16 @@ class ItineraryRequest(BaseModel):
     interests: List[str]
     budget: Optional[float]
     starting_point: Optional[str]
+    # Alternative plans to compute alongside the baseline, e.g. ["wet_weather", "low_budget"]
+    scenarios: Optional[List[str]] = None
+    
+    @field_validator("scenarios")
+    @classmethod
+    def known_scenarios(cls, value):
+        unknown = [name for name in value or [] if name not in SCENARIOS]
+        if unknown:
+            raise ValueError(f"Unknown scenarios {unknown}; choose from {list(SCENARIOS)}")
+        return value
 
 @app.post("/process-input")
 async def process_input(user_input: UserInput):
@@ -44,45 +126,195 @@ async def process_input(user_input: UserInput):
             user_input.user_id,
             user_input.message
         )
-        print('extracted info:', extracted_info)
+        logger.debug(f"Extracted info: {extracted_info}")
         return {"status": "success", "data": extracted_info}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/generate-itinerary")
+@app.post("/generate-itinerary", response_class=ItineraryResponse)
 async def generate_itinerary(request: ItineraryRequest):
     """Generate a complete itinerary based on user preferences."""
+    # The LLM deadline counts from arrival, so time spent waiting for a worker thread is included
+    deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
     try:
-        # Get suggested attractions based on interests
-        attractions = user_agent.suggest_attractions(
-            request.city,
-            request.interests
-        )
-        
-        # Generate itinerary
-        itinerary = itinerary_agent.generate_itinerary(
-            city=request.city,
-            date=request.date,
-            start_time=request.start_time,
-            end_time=request.end_time,
-            attractions=attractions,
-            starting_point=request.starting_point,
-            budget=request.budget
-        )
-        
-        # Store the itinerary in the database
-        place_names = [stop['location'] for stop in itinerary['schedule']]
-        db_client.store_itinerary(request.user_id, request.city, place_names)
-        
-        return {"status": "success", "data": itinerary}
+        itinerary = await _run_llm_bound(_build_itinerary, request, deadline, admission_deadline=deadline)
+        return ItineraryResponse({"status": "success", "data": itinerary})
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _run_llm_bound(func, *args,
+                   admission_deadline: float,
+                   priority: int = PRIORITY_BATCH,
+                   **kwargs) -> asyncio.Future:
+    """
+    Run a request that calls the LLM on `llm_executor`.
+    
+    Admission is checked here on the event loop, at the priority of the request's first LLM
+    call, so a saturated gateway sheds the request before a thread is committed to it and
+    nothing queues inside the executor. `args` and `kwargs` are passed to `func` unchanged.
+    """
+    gateway = itinerary_agent.gateway
+    gateway.check_admission(priority=priority, deadline=admission_deadline)
+    if not llm_request_slots.acquire(blocking=False):
+        gateway.reject("request_threads_busy")
+    future = llm_executor.submit(functools.partial(func, *args, **kwargs))
+    future.add_done_callback(lambda _: llm_request_slots.release())
+    return asyncio.wrap_future(future)
+
+def _overloaded(error: LLMOverloadedError) -> HTTPException:
+    """503 telling the client when to retry, used when the LLM gateway sheds a request."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+def _build_itinerary(request: ItineraryRequest, deadline: Optional[float] = None) -> Itinerary:
+    """
+    Plan the itinerary, or reuse the one planned for the same request, and store it for the user.
+    
+    The baseline and every alternative scenario are cached separately, so asking for another
+    scenario of a plan already on screen only plans that scenario.
+    """
+    key = (
+        request.city.strip().lower(), request.date, request.start_time, request.end_time,
+        tuple(sorted(interest.lower() for interest in request.interests)),
+        request.budget, request.starting_point
+    )
+    cached = itinerary_cache.get(key)
+    record_cache("itinerary", cached is not None)
+    itinerary = unpack(cached) if cached is not None else None
+    
+    names = [name for name in dict.fromkeys(request.scenarios or ()) if name != BASELINE]
+    scenarios, missing = {}, []
+    for name in names:
+        cached = itinerary_cache.get((key, name))
+        record_cache("itinerary", cached is not None)
+        if cached is not None:
+            scenarios[name] = unpack(cached)
+        else:
+            missing.append(name)
+    
+    errors = {}
+    to_plan = ([BASELINE] if itinerary is None else []) + missing
+    if to_plan:
+        planned, errors = _plan_itinerary(request, to_plan, deadline)
+        if itinerary is None:
+            if BASELINE not in planned:
+                raise errors[BASELINE]
+            itinerary = planned.pop(BASELINE)
+            itinerary_cache.set(key, pack(itinerary))
+        # Failed scenarios are not cached, so a retry can fill them in
+        for name, plan in planned.items():
+            itinerary_cache.set((key, name), pack(plan))
+            scenarios[name] = plan
+    
+    if names:
+        itinerary.scenarios = {name: scenarios[name] for name in names if name in scenarios}
+        itinerary.scenario_errors = {name: str(error) for name, error in errors.items()}
+    
+    # Store the itinerary in the user's history
+    db_client.store_itinerary(request.user_id, request.city, request.date, itinerary)
+    
+    return itinerary
+
+def _plan_itinerary(request: ItineraryRequest,
+                    names: List[str],
+                    deadline: Optional[float] = None) -> Tuple[Dict[str, Itinerary], Dict[str, Exception]]:
+    """Suggest attractions and plan the baseline and/or alternative scenarios in `names`.
+    
+    Alternative scenarios are planned in parallel from the same candidates and forecast;
+    those that failed or missed the deadline are returned as errors.
+    """
+    # Get suggested attractions based on interests
+    attractions = user_agent.suggest_attractions(
+        request.city,
+        request.interests
+    )
+    
+    # Hourly forecast drives weather-aware slot placement
+    hourly_forecast = _get_hourly_forecast(request.city, request.date)
+    
+    # Closures and events of the day go into the prompt and are checked again afterwards
+    events = _get_day_events(request.city, request.date)
+    
+    plan = dict(
+        city=request.city,
+        date=request.date,
+        start_time=request.start_time,
+        end_time=request.end_time,
+        attractions=attractions,
+        starting_point=request.starting_point,
+        budget=request.budget,
+        hourly_forecast=hourly_forecast,
+        interests=request.interests,
+        events=events
+    )
+    
+    if names == [BASELINE]:
+        # Generate itinerary
+        itinerary = itinerary_agent.generate_itinerary(**plan, deadline=deadline)
+        if itinerary.error is not None:
+            raise ValueError(f"Could not parse the itinerary: {itinerary.error}")
+        planned, errors = {BASELINE: itinerary}, {}
+    else:
+        if deadline is None:
+            deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
+        planned, errors = scenario_planner.plan(plan, names, deadline)
+    
+    if events:
+        for itinerary in planned.values():
+            _flag_conflicts(request.city, request.date, itinerary)
+    
+    return planned, errors
+
+@app.post("/trip-bundle", response_class=ItineraryResponse)
+async def trip_bundle(request: ItineraryRequest):
+    """
+    Build the itinerary and fetch weather, news and user preferences concurrently.
+    
+    Each part runs with its own timeout; parts that fail or time out are reported
+    under `errors` and the remaining parts are still returned.
+    """
+    deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
+    parts = {
+        "itinerary": lambda: _build_itinerary(request, deadline),
+        "weather": lambda: weather_agent.get_forecast(request.city, request.date),
+        "news": lambda: news_agent.get_news(request.city),
+        "preferences": lambda: user_agent.get_preferences(request.user_id)
+    }
+    timeouts = settings.TRIP_BUNDLE_TIMEOUTS
+    
+    async def run_part(name: str, func):
+        timeout = timeouts.get(name, timeouts.get("default", 10.0))
+        running = _run_llm_bound(func, admission_deadline=deadline) if name == "itinerary" else asyncio.to_thread(func)
+        return await asyncio.wait_for(running, timeout=timeout)
+    
+    results = await asyncio.gather(
+        *(run_part(name, func) for name, func in parts.items()),
+        return_exceptions=True
+    )
+    
+    bundle = {"city": request.city, "date": request.date, "errors": {}}
+    for name, result in zip(parts, results):
+        if isinstance(result, BaseException):
+            bundle[name] = None
+            bundle["errors"][name] = "timed out" if isinstance(result, asyncio.TimeoutError) else str(result)
+        else:
+            bundle[name] = result
+    
+    status = "success" if not bundle["errors"] else "partial"
+    return ItineraryResponse({"status": status, "data": bundle})
     
 class ItineraryAdjustment(BaseModel):
     user_id: str
     current_itinerary: Dict
     adjustment_type: str
     adjustment_details: Dict
+    city: Optional[str] = None
+    date: Optional[str] = None
 
 class WeatherRequest(BaseModel):
     city: str
@@ -91,16 +323,25 @@ class WeatherRequest(BaseModel):
 class UserPreferences(BaseModel):
     user_id: str
 
-@app.post("/adjust-itinerary")
+@app.post("/adjust-itinerary", response_class=ItineraryResponse)
 async def adjust_itinerary(request: ItineraryAdjustment):
     """Adjust existing itinerary based on new requirements."""
+    deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE
     try:
-        adjusted_itinerary = itinerary_agent.adjust_itinerary(
+        hourly_forecast = await asyncio.to_thread(_get_hourly_forecast, request.city, request.date)
+        adjusted_itinerary = await _run_llm_bound(
+            itinerary_agent.adjust_itinerary,
+            admission_deadline=deadline,
+            priority=PRIORITY_INTERACTIVE,
             current_itinerary=request.current_itinerary,
             adjustment_type=request.adjustment_type,
-            adjustment_details=request.adjustment_details
+            adjustment_details=request.adjustment_details,
+            hourly_forecast=hourly_forecast,
+            deadline=deadline
         )
-        return {"status": "success", "data": adjusted_itinerary}
+        return ItineraryResponse({"status": "success", "data": adjusted_itinerary})
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -108,21 +349,48 @@ async def adjust_itinerary(request: ItineraryAdjustment):
 async def get_weather(city: str, date: str):
     """Get weather forecast for the specified city and date."""
     try:
-        from .agents.weather import WeatherAgent
-        weather_agent = WeatherAgent()
-        forecast = weather_agent.get_forecast(city, date)
+        forecast = await asyncio.to_thread(weather_agent.get_forecast, city, date)
         return {"status": "success", "data": forecast}
+    except UpstreamUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _get_hourly_forecast(city: Optional[str], date: Optional[str]) -> List[Dict]:
+    """Fetch the hourly forecast, planning without it if the weather API is unavailable."""
+    if not city or not date:
+        return []
+    try:
+        return weather_agent.get_hourly_forecast(city, date)['hourly_forecast']
+    except Exception:
+        return []
+
+def _get_day_events(city: str, date: str) -> List[Dict]:
+    """Closures and events overlapping the itinerary day, or none if the date cannot be read."""
+    try:
+        return news_agent.get_events(city, f"{date}T00:00", f"{date}T23:59")
+    except ValueError:
+        return []
+
+def _flag_conflicts(city: str, date: str, itinerary: Itinerary):
+    """Attach the closures and events overlapping each stop, found with one batched query."""
+    schedule = [stop.to_dict() for stop in itinerary.stops]
+    conflicts = news_agent.events.schedule_conflicts(city, date, schedule, settings.EVENTS_CONFLICT_RADIUS)
+    for stop, events in zip(itinerary.stops, conflicts):
+        if events:
+            stop.conflicts = [
+                {key: event[key] for key in ('name', 'type', 'start', 'end', 'venue') if key in event}
+                for event in events
+            ]
+
 @app.get("/news")
 async def get_news(city: str):
     """Get relevant news and events for the specified city."""
     try:
-        from .agents.news import NewsAgent
-        news_agent = NewsAgent()
-        news = news_agent.get_news(city)
+        news = await asyncio.to_thread(news_agent.get_news, city)
         return {"status": "success", "data": news}
+    except UpstreamUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -135,15 +403,20 @@ async def get_user_preferences(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/user-history/{user_id}")
+@app.get("/user-history/{user_id}", response_class=ItineraryResponse)
 async def get_user_history(user_id: str):
     """Get previous itineraries and preferences for a user."""
     try:
         history = db_client.get_user_history(user_id)
-        return {"status": "success", "data": history}
+        return ItineraryResponse({"status": "success", "data": history})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose span latencies, token usage, cache hits and upstream errors in Prometheus format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
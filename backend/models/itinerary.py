@@ -0,0 +1,311 @@
+import re
+import struct
+from typing import Dict, List, Optional
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+from utils.parsing import duration_minutes, parse_cost
+
+# Bump when the packed layout changes; older payloads are still decoded by version
+PACK_VERSION = 1
+# Integer columns packed per stop: start, end, duration, travel_time, cost
+_COLUMNS = 5
+_CLOCK = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?')
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+METRES_PER_MILE = 1609.344
+# Distance units as whole tokens, so 'minutes' or 'mixed' never read as miles
+_KILOMETRES = re.compile(r'\d\s*km\b|\bkilomet(?:re|er)s?\b')
+_METRES = re.compile(r'\d\s*m\b|\bmet(?:re|er)s?\b')
+_MILES = re.compile(r'\d\s*mi\b|\b(?:mi|miles?)\b')
+
+
+def clock_minutes(text: str) -> int:
+    """Parse '09:30', '9:30 AM' or '5pm' into minutes after midnight, or -1."""
+    match = _CLOCK.search(str(text or '').lower())
+    if not match:
+        return -1
+    hour, minute, suffix = int(match.group(1)) % 24, int(match.group(2) or 0), match.group(3)
+    if suffix and suffix.startswith('p') and hour < 12:
+        hour += 12
+    elif suffix and suffix.startswith('a') and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
+def format_clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}" if minutes >= 0 else ""
+
+
+def to_minutes(value) -> int:
+    """Parse 90, '90 minutes', '1.5 hours' or '1 hour 30 minutes' into whole minutes."""
+    return int(round(duration_minutes(value, default=0.0)))
+
+
+def to_cents(value) -> int:
+    """Parse 12.5, '$12.50' or 'Free' into cents."""
+    return int(round(parse_cost(value) * 100))
+
+
+def to_metres(value) -> int:
+    """Parse 6, '6 km', '800 m' or '3 miles' into metres; bare numbers are kilometres."""
+    if isinstance(value, (int, float)):
+        return int(round(value * 1000))
+    text = str(value or '').lower()
+    match = _NUMBER.search(text.replace(',', ''))
+    if not match:
+        return 0
+    amount = float(match.group(1))
+    if _KILOMETRES.search(text):
+        return int(round(amount * 1000))
+    if _METRES.search(text):
+        return int(round(amount))
+    if _MILES.search(text):
+        return int(round(amount * METRES_PER_MILE))
+    return int(round(amount * 1000))
+
+
+def to_coordinates(lat, lon) -> tuple:
+    """Parse an LLM's latitude and longitude into floats, or (None, None) when missing or invalid."""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, None
+    if (lat, lon) == (0.0, 0.0) or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
+
+
+class Stop:
+    """
+    One scheduled activity.
+
+    Times are minutes after midnight (-1 when unknown), durations minutes and costs
+    cents, so the numbers are parsed once instead of on every read.
+    """
+
+    __slots__ = ('start', 'end', 'activity', 'location', 'duration', 'travel_method', 'travel_time', 'cost',
+                 'lat', 'lon', 'route', 'conflicts')
+
+    def __init__(self,
+                 start: int = -1,
+                 end: int = -1,
+                 activity: str = "",
+                 location: str = "",
+                 duration: int = 0,
+                 travel_method: str = "",
+                 travel_time: int = 0,
+                 cost: int = 0,
+                 lat: Optional[float] = None,
+                 lon: Optional[float] = None,
+                 route: Optional[List] = None,
+                 conflicts: Optional[List[Dict]] = None):
+        self.start = start
+        self.end = end
+        self.activity = activity
+        self.location = location
+        self.duration = duration
+        self.travel_method = travel_method
+        self.travel_time = travel_time
+        self.cost = cost
+        self.lat = lat
+        self.lon = lon
+        self.route = route
+        self.conflicts = conflicts
+
+    @property
+    def time(self) -> str:
+        return f"{format_clock(self.start)}-{format_clock(self.end)}" if self.start >= 0 else ""
+
+    @classmethod
+    def from_dict(cls, item: Dict) -> 'Stop':
+        """Build a stop from the LLM's dict of strings or from `to_dict` output."""
+        start_text, _, end_text = str(item.get('time', '')).partition('-')
+        start, end = clock_minutes(start_text), clock_minutes(end_text)
+        duration = to_minutes(item.get('duration'))
+        if end < 0 <= start and duration:
+            end = start + duration
+        lat, lon = to_coordinates(item.get('lat'), item.get('lon'))
+        return cls(
+            start=start,
+            end=end,
+            activity=str(item.get('activity', '')),
+            location=str(item.get('location', '')),
+            duration=duration or max(0, end - start),
+            travel_method=str(item.get('travel_method', '')),
+            travel_time=to_minutes(item.get('travel_time')),
+            cost=to_cents(item.get('cost')),
+            lat=lat,
+            lon=lon,
+            route=item.get('route') or None,
+            conflicts=item.get('conflicts') or None
+        )
+
+    def to_dict(self) -> Dict:
+        """API shape: numbers in minutes and dollars, optional fields only when set."""
+        item = {
+            "time": self.time,
+            "activity": self.activity,
+            "location": self.location,
+            "duration": self.duration,
+            "travel_method": self.travel_method,
+            "travel_time": self.travel_time,
+            "cost": self.cost / 100
+        }
+        for name in ('lat', 'lon', 'route', 'conflicts'):
+            value = getattr(self, name)
+            if value is not None:
+                item[name] = value
+        return item
+
+    def extras(self) -> Optional[Dict]:
+        """Optional fields that are set, or None."""
+        found = {name: getattr(self, name) for name in ('lat', 'lon', 'route', 'conflicts')
+                 if getattr(self, name) is not None}
+        return found or None
+
+
+class Itinerary:
+    """
+    A planned day: its stops, totals in cents and metres, and any alternative plans.
+
+    `error` is set instead of stops when the LLM answer could not be parsed.
+    """
+
+    __slots__ = ('stops', 'total_cost', 'total_distance', 'scenarios', 'scenario_errors', 'error')
+
+    def __init__(self,
+                 stops: Optional[List[Stop]] = None,
+                 total_cost: int = 0,
+                 total_distance: int = 0,
+                 scenarios: Optional[Dict[str, 'Itinerary']] = None,
+                 scenario_errors: Optional[Dict[str, str]] = None,
+                 error: Optional[str] = None):
+        self.stops = stops or []
+        self.total_cost = total_cost
+        self.total_distance = total_distance
+        self.scenarios = scenarios
+        self.scenario_errors = scenario_errors
+        self.error = error
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Itinerary':
+        """Build an itinerary from the LLM's dict of strings or from `to_dict` output."""
+        if data.get('error') and not data.get('schedule'):
+            return cls(error=str(data['error']))
+        stops = [Stop.from_dict(item) for item in data.get('schedule') or []]
+        total_cost = data.get('total_cost')
+        scenarios = data.get('scenarios')
+        return cls(
+            stops=stops,
+            total_cost=to_cents(total_cost) if total_cost is not None else sum(stop.cost for stop in stops),
+            total_distance=to_metres(data.get('total_distance')),
+            scenarios={name: cls.from_dict(plan) for name, plan in scenarios.items()} if scenarios else None,
+            scenario_errors=data.get('scenario_errors') or None
+        )
+
+    def to_dict(self) -> Dict:
+        """API shape, as the frontend reads it: dollars and kilometres."""
+        if self.error is not None:
+            return {"error": self.error}
+        data = {
+            "schedule": [stop.to_dict() for stop in self.stops],
+            "total_cost": self.total_cost / 100,
+            "total_distance": self.total_distance / 1000
+        }
+        if self.scenarios is not None:
+            data["scenarios"] = {name: plan.to_dict() for name, plan in self.scenarios.items()}
+        if self.scenario_errors is not None:
+            data["scenario_errors"] = self.scenario_errors
+        return data
+
+    def to_prompt(self) -> str:
+        """One line per stop, for LLM prompts; far fewer tokens than the dict repr."""
+        lines = [
+            f"- {stop.time} {stop.activity} at {stop.location}, {stop.duration} min, "
+            f"{stop.travel_method} {stop.travel_time} min, ${stop.cost / 100:.2f}"
+            for stop in self.stops
+        ]
+        lines.append(f"Total: ${self.total_cost / 100:.2f}, {self.total_distance / 1000:.1f} km")
+        return "\n".join(lines)
+
+
+def pack(itinerary: Itinerary) -> bytes:
+    """
+    Encode an itinerary as msgpack for caches and history.
+
+    The integer fields of all stops go into one little-endian int32 block, and
+    strings into one list per field, instead of a map per stop.
+    """
+    return msgpack.packb(_to_packed(itinerary), use_bin_type=True)
+
+
+def _to_packed(itinerary: Itinerary) -> List:
+    stops = itinerary.stops
+    numbers = []
+    for stop in stops:
+        numbers.extend((stop.start, stop.end, stop.duration, stop.travel_time, stop.cost))
+    extras = {i: found for i, found in enumerate(stop.extras() for stop in stops) if found}
+    return [
+        PACK_VERSION,
+        itinerary.error,
+        itinerary.total_cost,
+        itinerary.total_distance,
+        struct.pack(f'<{len(numbers)}i', *numbers),
+        [stop.activity for stop in stops],
+        [stop.location for stop in stops],
+        [stop.travel_method for stop in stops],
+        extras,
+        {name: _to_packed(plan) for name, plan in itinerary.scenarios.items()} if itinerary.scenarios is not None else None,
+        itinerary.scenario_errors
+    ]
+
+
+def unpack(payload: bytes) -> Itinerary:
+    """Decode a payload written by `pack`."""
+    return _from_packed(msgpack.unpackb(payload, raw=False, strict_map_key=False))
+
+
+def _from_packed(fields: List) -> Itinerary:
+    version, error, total_cost, total_distance, block, activities, locations, methods, extras, scenarios, scenario_errors = fields
+    if version != PACK_VERSION:
+        raise ValueError(f"Unsupported itinerary payload version {version}")
+    numbers = struct.unpack(f'<{len(block) // 4}i', block)
+    stops = []
+    for i in range(len(activities)):
+        start, end, duration, travel_time, cost = numbers[i * _COLUMNS:(i + 1) * _COLUMNS]
+        stops.append(Stop(start, end, activities[i], locations[i], duration, methods[i], travel_time, cost,
+                          **extras.get(i, {})))
+    return Itinerary(
+        stops=stops,
+        total_cost=total_cost,
+        total_distance=total_distance,
+        scenarios={name: _from_packed(plan) for name, plan in scenarios.items()} if scenarios is not None else None,
+        scenario_errors=scenario_errors,
+        error=error
+    )
+
+
+def _default(value):
+    if isinstance(value, (Itinerary, Stop)):
+        return value.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serialize to JSON with orjson, encoding itineraries and stops in their API shape."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+loads = orjson.loads
+
+
+class ItineraryResponse(JSONResponse):
+    """
+    JSON response rendered by orjson.
+
+    Return it directly from an endpoint so FastAPI skips `jsonable_encoder`; itineraries
+    anywhere in the content are encoded straight from their slots.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
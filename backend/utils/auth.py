@@ -1,26 +1,49 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from ..config import settings
-from ..database.neo4j_client import Neo4jClient
+from config import settings
+from database.neo4j_client import Neo4jClient
+from utils.cache import TTLCache
+from utils.tracing import record_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 db_client = Neo4jClient()
 
+# Lifetime of issued tokens; revocations only need to be remembered this long
+TOKEN_LIFETIME = timedelta(days=1)
+
+# bcrypt releases the GIL, so a thread pool keeps hashing off the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.AUTH_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+
 class Auth:
     def __init__(self):
         self.secret = settings.SECRET_KEY
+        # token -> (user_id, revision) for tokens already verified against the database
+        self.token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
+        # Revoked tokens and users are remembered until their tokens would have expired anyway.
+        # Never size-bounded: evicting a revocation would silently make its token valid again.
+        self.revoked_tokens = TTLCache(maxsize=None, ttl=TOKEN_LIFETIME.total_seconds())
+        # user_id -> time of the latest revocation; tokens carry the value current when they were issued
+        self.revoked_users = TTLCache(maxsize=None, ttl=TOKEN_LIFETIME.total_seconds())
 
     def encode_token(self, user_id: str) -> str:
         """Generate JWT token."""
         payload = {
-            'exp': datetime.utcnow() + timedelta(days=1),
+            'exp': datetime.utcnow() + TOKEN_LIFETIME,
             'iat': datetime.utcnow(),
-            'sub': user_id
+            'sub': user_id,
+            # Revision of the user's tokens; `revoke_user` rejects every earlier one
+            'rev': self.revoked_users.get(user_id, 0.0)
         }
         return jwt.encode(
             payload,
@@ -30,9 +53,11 @@ class Auth:
 
     def decode_token(self, token: str) -> str:
         """Decode JWT token."""
+        return self._decode_payload(token)['sub']
+
+    def _decode_payload(self, token: str) -> dict:
         try:
-            payload = jwt.decode(token, self.secret, algorithms=['HS256'])
-            return payload['sub']
+            return jwt.decode(token, self.secret, algorithms=['HS256'])
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail='Token has expired')
         except jwt.InvalidTokenError:
@@ -46,22 +71,70 @@ class Auth:
         """Hash password."""
         return pwd_context.hash(password)
 
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password on the bcrypt thread pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, pwd_context.verify, plain_password, hashed_password)
+
+    async def get_password_hash_async(self, password: str) -> str:
+        """Hash password on the bcrypt thread pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
     async def authenticate_user(self, username: str, password: str) -> Optional[str]:
         """Authenticate user and return user_id if valid."""
-        user = db_client.get_user_by_username(username)
+        loop = asyncio.get_running_loop()
+        user = await loop.run_in_executor(None, db_client.get_user_by_username, username)
         if not user:
             return None
-        if not self.verify_password(password, user['hashed_password']):
+        if not await self.verify_password_async(password, user['hashed_password']):
             return None
         return user['id']
 
+    def revoke_token(self, token: str):
+        """Reject a single token from now on."""
+        self.token_cache.pop(token)
+        self.revoked_tokens.set(token, True)
+
+    def revoke_user(self, user_id: str):
+        """Reject every token issued to a user up to now (e.g. after a password change or deletion)."""
+        # Strictly increasing per user, so it never equals the revision of an earlier token
+        previous = self.revoked_users.get(user_id, 0.0)
+        self.revoked_users.set(user_id, max(time.time(), previous + 1e-6))
+
+    def _is_revoked(self, token: str, user_id: str, revision: float) -> bool:
+        if token in self.revoked_tokens:
+            return True
+        # Compares revisions rather than `iat`, which only has whole-second precision
+        return revision < self.revoked_users.get(user_id, 0.0)
+
     async def get_current_user(self, credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
         """Get current user from JWT token."""
         token = credentials.credentials
-        user_id = self.decode_token(token)
-        if not db_client.user_exists(user_id):
+
+        cached = self.token_cache.get(token)
+        record_cache('auth_token', cached is not None)
+        if cached is not None:
+            user_id, revision = cached
+            if self._is_revoked(token, user_id, revision):
+                self.token_cache.pop(token)
+                raise HTTPException(status_code=401, detail='Token has been revoked')
+            return user_id
+
+        payload = self._decode_payload(token)
+        user_id, revision = payload['sub'], payload.get('rev', 0.0)
+        if self._is_revoked(token, user_id, revision):
+            raise HTTPException(status_code=401, detail='Token has been revoked')
+
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, db_client.user_exists, user_id):
             raise HTTPException(
                 status_code=401,
                 detail='Invalid user'
             )
+
+        # Never cache a token beyond its own expiry
+        ttl = min(self.token_cache.ttl, payload['exp'] - time.time())
+        if ttl > 0:
+            self.token_cache.set(token, (user_id, revision), ttl=ttl)
         return user_id
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded cache with per-entry expiry.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached and
+    are treated as absent once their TTL has passed. With `maxsize=None` nothing is
+    ever evicted; entries only leave once expired, for state that must not be
+    forgotten early (e.g. revocations).
+    """
+
+    # Unbounded caches sweep expired entries whenever they double in size
+    _MIN_SWEEP = 1024
+
+    def __init__(self, maxsize: Optional[int] = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = self._MIN_SWEEP
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if self.maxsize is None:
+                if len(self._data) >= self._next_sweep:
+                    self._sweep(now)
+                return
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _sweep(self, now: float):
+        """Drop expired entries; caller holds the lock."""
+        for key in [key for key, (expires_at, _) in self._data.items() if expires_at <= now]:
+            del self._data[key]
+        self._next_sweep = max(self._MIN_SWEEP, 2 * len(self._data))
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        Concurrent misses for the same key compute it once; the others wait for that
+        result (e.g. a request arriving while a prefetch of the same key is running).
+
+        Returns:
+            Tuple[Any, bool]: The value and whether it was served without computing it here
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+        if not leader:
+            event.wait()
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value, True
+            # The leader failed; compute without coordination
+            return compute(), False
+        try:
+            value = compute()
+            self.set(key, value, ttl)
+            return value, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
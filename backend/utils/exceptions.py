@@ -25,3 +25,15 @@ class ValidationError(TourPlannerException):
 class ExternalAPIError(TourPlannerException):
     """Raised when there's an error with external API calls."""
     pass
+
+class LLMOverloadedError(TourPlannerException):
+    """Raised when an LLM call is shed because the gateway cannot serve it in time."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class UpstreamUnavailableError(TourPlannerException):
+    """Raised when an upstream API gave no usable answer in time and no stale copy exists."""
+    def __init__(self, message: str, upstream: str):
+        super().__init__(message)
+        self.upstream = upstream
@@ -1,28 +1,181 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+import re
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Request id of the request being handled, set by the request middleware in main.py
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id to every record.
+
+    Runs on the caller's side of the queue, where the request context is still available.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records for selected loggers.
+
+    `rates` maps a logger name (or prefix, e.g. 'agents') to the fraction of its
+    DEBUG records to keep. Records at INFO and above are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so 'agents.news' wins over 'agents'
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return rate >= 1.0 or random.random() < rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock `prepare` formats and copies every record on the caller's thread so
+    it can be pickled; the queue here never leaves the process, so that work is
+    skipped and only the enqueue happens on the request path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class TimedSizeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotate at the time boundary (midnight by default) or once the file exceeds `maxBytes`.
+
+    Rotated files are named `<file>.<date>.<sequence>`, the sequence growing with every
+    rollover, so several size rollovers on the same day never collide and the oldest
+    backups are the ones pruned.
+    """
+
+    _SEQUENCE = re.compile(r'\.(\d{6,})$')
+
+    def __init__(self, filename: str, maxBytes: int = 0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.maxBytes = maxBytes
+        self.namer = self._sequenced_name
+        # Continue after the backups left by a previous run
+        self._sequence = max((sequence for sequence, _ in self._backups()), default=0)
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if super().shouldRollover(record):
+            return 1
+        if self.maxBytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.maxBytes:
+                return 1
+        return 0
+
+    def _sequenced_name(self, default_name: str) -> str:
+        self._sequence += 1
+        return f"{default_name}.{self._sequence:06d}"
+
+    def _backups(self):
+        """(sequence, path) of every rotated file of this handler."""
+        directory, base = os.path.split(self.baseFilename)
+        prefix = base + '.'
+        backups = []
+        for name in os.listdir(directory or '.'):
+            match = self._SEQUENCE.search(name) if name.startswith(prefix) else None
+            if match:
+                backups.append((int(match.group(1)), os.path.join(directory, name)))
+        return backups
+
+    def getFilesToDelete(self):
+        """Rotated files beyond `backupCount`, oldest rollover first."""
+        backups = sorted(self._backups())
+        if len(backups) <= self.backupCount:
+            return []
+        return [path for _, path in backups[:len(backups) - self.backupCount]]
+
+
+def setup_logging(level: str = 'DEBUG',
+                  log_dir: str = 'logs',
+                  json_logs: bool = True,
+                  sample_rates: Optional[Dict[str, float]] = None,
+                  max_bytes: int = 10485760,
+                  backup_count: int = 5) -> logging.handlers.QueueListener:
+    """
+    Configure non-blocking logging for the application.
+
+    Log calls only put the record on an in-memory queue; a dedicated listener
+    thread formats it and writes it to the console and the rotating log file.
+
+    Args:
+        level (str): Root log level
+        log_dir (str): Directory for the log files
+        json_logs (bool): Write structured JSON lines instead of plain text to the file
+        sample_rates (Dict[str, float]): Fraction of DEBUG records to keep per logger
+        max_bytes (int): Size at which the log file is rotated early
+        backup_count (int): Number of rotated files to keep
+
+    Returns:
+        QueueListener: The running listener (stopped automatically at exit)
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
 
-def setup_logging():
-    """Configure logging for the application."""
     # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+    os.makedirs(log_dir, exist_ok=True)
 
     # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    if json_logs:
+        file_formatter = JsonFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+        )
     console_formatter = logging.Formatter(
         '%(levelname)s - %(message)s'
     )
 
-    # Create handlers
-    # File handler with rotation
-    file_handler = logging.handlers.RotatingFileHandler(
-        f'logs/tour_planner_{datetime.now().strftime("%Y%m%d")}.log',
-        maxBytes=10485760,  # 10MB
-        backupCount=5
+    # File handler rotating daily and by size
+    file_handler = TimedSizeRotatingFileHandler(
+        os.path.join(log_dir, 'tour_planner.log'),
+        maxBytes=max_bytes,
+        when='midnight',
+        backupCount=backup_count,
+        delay=True
     )
     file_handler.setFormatter(file_formatter)
     file_handler.setLevel(logging.DEBUG)
@@ -32,12 +185,37 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(logging.INFO)
 
-    # Create root logger
+    # Log calls only enqueue; the listener thread does the formatting and I/O
+    log_queue = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(log_queue)
+    if sample_rates:
+        _queue_handler.addFilter(SamplingFilter(sample_rates))
+    _queue_handler.addFilter(RequestContextFilter())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+
+    # Configure root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.setLevel(level)
+    root_logger.addHandler(_queue_handler)
 
     # Set specific levels for some loggers
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('neo4j').setLevel(logging.WARNING)
+
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,32 @@
+import re
+
+# A number, optionally the lower bound of a range such as '1-2' or '1 to 2'
+_AMOUNT = r'(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*\d+(?:\.\d+)?)?'
+_HOURS = re.compile(_AMOUNT + r'\s*(?:h|hrs?|hours?)(?![a-z])')
+_MINUTES = re.compile(_AMOUNT + r'\s*(?:m|mins?|minutes?)(?![a-z])')
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+
+
+def duration_minutes(value, default: float = 60.0) -> float:
+    """
+    Parse a duration into minutes.
+
+    Bare numbers (90, '90') are minutes; hour and minute parts are summed
+    ('1 hour 30 minutes', '1h30m'); ranges ('1-2 hours') count their lower bound.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').lower()
+    hours, minutes = _HOURS.search(text), _MINUTES.search(text)
+    if hours or minutes:
+        return (float(hours.group(1)) * 60.0 if hours else 0.0) + (float(minutes.group(1)) if minutes else 0.0)
+    match = _NUMBER.search(text)
+    return float(match.group(1)) if match else default
+
+
+def parse_cost(value) -> float:
+    """Parse '$25', '10-20', 'Free' or 12.5 into dollars (the lower bound of a range)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value or ''))
+    return float(match.group(1)) if match else 0.0
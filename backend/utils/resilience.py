@@ -0,0 +1,295 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from config import settings
+from utils.cache import TTLCache
+from utils.exceptions import UpstreamUnavailableError
+from utils.tracing import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = registry.gauge(
+    'tour_planner_circuit_state', 'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open).',
+    ('upstream',))
+HEDGED_REQUESTS = registry.counter(
+    'tour_planner_hedged_requests_total', 'Second attempts started after the hedge delay or a fast failure.',
+    ('upstream',))
+STALE_RESPONSES = registry.counter(
+    'tour_planner_stale_responses_total', 'Last known good responses served instead of a fresh one.',
+    ('upstream', 'reason'))
+
+_MISSING = object()
+
+# Set when a call in this context was answered with a stale fallback instead of a fresh result
+served_stale: ContextVar[bool] = ContextVar('served_stale', default=False)
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call durations."""
+
+    def __init__(self, window: int = 256):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The `q` quantile of the window, or None until `min_samples` calls have completed."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls are refused
+    for `reset_timeout` seconds. Then a single probe is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(_STATE_VALUES[CLOSED], name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; in half-open state only one probe at a time."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self.failures >= self.failure_threshold):
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        self._state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], self.name)
+
+
+class ResilientUpstream:
+    """
+    Deadline, hedging, circuit breaking and stale-while-revalidate for one upstream API.
+
+    `call(key, fetch)` runs `fetch(timeout)` with the time left before the deadline. If it
+    has not answered after the recent p95 latency, a second identical request is started
+    and the first answer wins. The last good result per key is kept; it is served when the
+    circuit is open, the deadline is missed or both attempts fail, and a background
+    refresh is started so the next caller gets fresh data.
+    """
+
+    def __init__(self,
+                 name: str,
+                 timeout: float = 3.0,
+                 hedge_quantile: float = 0.95,
+                 min_hedge_delay: float = 0.05,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 stale_ttl: float = 6 * 3600.0,
+                 max_workers: int = 16):
+        self.name = name
+        self.timeout = timeout
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.last_good = TTLCache(maxsize=4096, ttl=stale_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-upstream")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first attempt before hedging: the recent p95, at most half the timeout."""
+        observed = self.latency.quantile(self.hedge_quantile)
+        if observed is None:
+            return self.timeout / 2
+        return min(self.timeout / 2, max(self.min_hedge_delay, observed))
+
+    def call(self,
+             key: Hashable,
+             fetch: Callable[[float], T],
+             cacheable: Optional[Callable[[T], bool]] = None,
+             timeout: Optional[float] = None) -> T:
+        """
+        Fetch a fresh result for `key`, falling back to the last good one.
+
+        Args:
+            key (Hashable): Identifies the request for the stale cache and refresh deduplication
+            fetch (Callable): Performs one upstream request given its timeout in seconds
+            cacheable (Callable): Whether a result may be served later as stale (default: all)
+            timeout (float): Overrides the per-call deadline
+
+        Returns:
+            The fresh or stale result
+
+        Raises:
+            UpstreamUnavailableError: If no fresh result arrived in time and nothing stale is stored
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        if not self.breaker.allow():
+            return self._stale(key, fetch, cacheable, "circuit_open")
+
+        try:
+            return self._hedged(key, fetch, cacheable, deadline)
+        except TimeoutError:
+            return self._stale(key, fetch, cacheable, "deadline")
+        except Exception as e:
+            return self._stale(key, fetch, cacheable, "error", e)
+
+    def _hedged(self, key, fetch, cacheable, deadline: float):
+        pending = {self._executor.submit(self._attempt, key, fetch, cacheable, deadline)}
+        hedge_at = time.monotonic() + self.hedge_delay()
+        hedged = False
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                raise TimeoutError(f"{self.name} did not answer in time")
+            until = deadline if hedged else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=until - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            # Hedge once the p95 has passed, or retry straight away after a fast failure
+            if not hedged and (error is not None or time.monotonic() >= hedge_at) and self.breaker.allow():
+                hedged = True
+                HEDGED_REQUESTS.inc(self.name)
+                pending.add(self._executor.submit(self._attempt, key, fetch, cacheable, deadline))
+        raise error
+
+    def _attempt(self, key, fetch, cacheable, deadline: float):
+        start = time.monotonic()
+        try:
+            result = fetch(max(0.01, deadline - start))
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.latency.record(time.monotonic() - start)
+        self.breaker.record_success()
+        if cacheable is None or cacheable(result):
+            self.last_good.set(key, result)
+        return result
+
+    def _stale(self, key, fetch, cacheable, reason: str, error: Optional[Exception] = None):
+        self._refresh(key, fetch, cacheable)
+        value = self.last_good.get(key, _MISSING)
+        if value is _MISSING:
+            raise UpstreamUnavailableError(
+                f"{self.name} unavailable ({reason})" + (f": {error}" if error else ""), upstream=self.name
+            ) from error
+        STALE_RESPONSES.inc(self.name, reason)
+        served_stale.set(True)
+        logger.warning(f"Serving stale {self.name} response for {key!r} ({reason})")
+        return value
+
+    def _refresh(self, key, fetch, cacheable):
+        """Refresh `key` in the background, at most once at a time, when the circuit allows it."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if not self.breaker.allow():
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                # A refresh has no caller waiting on it, so it may take longer than the request deadline
+                self._attempt(key, fetch, cacheable, time.monotonic() + 2 * self.timeout)
+            except Exception as e:
+                logger.debug(f"Background refresh of {self.name} {key!r} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+
+def get_or_compute_fresh(cache: TTLCache,
+                         key: Hashable,
+                         compute: Callable[[], Any],
+                         stale_ttl: Optional[float] = None) -> Tuple[Any, bool]:
+    """
+    `cache.get_or_compute` for results fetched through a ResilientUpstream.
+
+    A result built from a stale fallback is kept for `stale_ttl` seconds only
+    (CITY_DATA_STALE_TTL by default) instead of the cache's full TTL, so it is not
+    passed off as fresh and the upstream's background refresh is picked up soon.
+    """
+    token = served_stale.set(False)
+    try:
+        value, hit = cache.get_or_compute(key, compute)
+        if not hit and served_stale.get():
+            cache.set(key, value, ttl=settings.CITY_DATA_STALE_TTL if stale_ttl is None else stale_ttl)
+        return value, hit
+    finally:
+        served_stale.reset(token)
+
+
+_upstreams: Dict[str, ResilientUpstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> ResilientUpstream:
+    """The process-wide resilience wrapper for upstream `name`, configured from settings."""
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = _upstreams[name] = ResilientUpstream(
+                name,
+                timeout=settings.UPSTREAM_TIMEOUTS.get(name, settings.UPSTREAM_TIMEOUTS.get("default", 3.0)),
+                hedge_quantile=settings.UPSTREAM_HEDGE_QUANTILE,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+                stale_ttl=settings.UPSTREAM_STALE_TTL
+            )
+        return upstream
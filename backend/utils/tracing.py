@@ -0,0 +1,239 @@
+import functools
+import logging
+import random
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """Monotonic counter, one value per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def get(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Gauge:
+    """Value that can go up and down, one value per label set."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labelvalues: str):
+        self._values[labelvalues] = value
+
+    def get(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self):
+        for labelvalues, value in list(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one set of buckets per label set."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()]
+        for labelvalues, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket", dict(labels, le=le), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for sample_name, labels, value in metric.samples():
+                if labels:
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{sample_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+SPAN_DURATION = registry.histogram(
+    'tour_planner_span_duration_seconds', 'Duration of traced operations.', ('span',))
+SPAN_ERRORS = registry.counter(
+    'tour_planner_span_errors_total', 'Traced operations that raised an exception.', ('span',))
+UPSTREAM_REQUESTS = registry.counter(
+    'tour_planner_upstream_requests_total', 'Outbound calls per upstream and outcome.', ('upstream', 'outcome'))
+LLM_TOKENS = registry.counter(
+    'tour_planner_llm_tokens_total', 'Tokens reported by LLM responses.', ('upstream', 'kind'))
+CACHE_REQUESTS = registry.counter(
+    'tour_planner_cache_requests_total', 'Cache lookups per cache and result.', ('cache', 'result'))
+
+
+class span:
+    """
+    Time a block of code and record it under `name`.
+
+    Usage:
+        with span("openai.chat", upstream="openai"):
+            ...
+
+    When `upstream` is given the outcome is also counted per upstream, so error
+    rates of OpenAI, the weather API, the news API and Neo4j can be told apart.
+    """
+
+    __slots__ = ('name', 'upstream', 'start')
+
+    def __init__(self, name: str, upstream: Optional[str] = None):
+        self.name = name
+        self.upstream = upstream
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = perf_counter() - self.start
+        SPAN_DURATION.observe(duration, self.name)
+        if exc_type is not None:
+            SPAN_ERRORS.inc(self.name)
+        if self.upstream is not None:
+            UPSTREAM_REQUESTS.inc(self.upstream, 'error' if exc_type is not None else 'ok')
+        if _sample_rate and random.random() < _sample_rate:
+            logger.debug(
+                "span %s took %.3f ms%s", self.name, duration * 1000,
+                f" and failed with {exc_type.__name__}" if exc_type is not None else ""
+            )
+        return False
+
+
+def traced(name: str, upstream: Optional[str] = None):
+    """Decorator form of `span`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, upstream):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(upstream: str, usage) -> None:
+    """Count prompt/completion tokens from an LLM `usage` block (dict or attribute style)."""
+    if not usage:
+        return
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.inc(upstream, kind.split('_')[0], amount=value)
+
+
+# Set while a speculative prefetch runs, so its cache fills are not counted as request misses
+prefetching: ContextVar[bool] = ContextVar('prefetching', default=False)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, 'prefetch' if prefetching.get() else ('hit' if hit else 'miss'))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+_sample_rate = settings.SPAN_LOG_SAMPLE_RATE
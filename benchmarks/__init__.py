@@ -0,0 +1,16 @@
+"""
+Benchmarks for the Tour Planner backend.
+
+Everything here runs against local stand-ins (stub OpenAI, weather and news
+servers plus an in-memory Neo4j client) so results are reproducible and do not
+depend on third-party latency or API keys.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# The backend modules import each other as top-level packages (`from config import settings`)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,96 @@
+"""
+Login storm and token verification benchmark for utils.auth.
+
+    python -m benchmarks.auth_bench [--logins N] [--neo4j-latency MS]
+
+Reports login throughput and, more importantly, event-loop lag measured by a
+ticker coroutine while the logins run: with bcrypt on the loop the ticker
+stalls for the whole storm, with the thread pool it keeps ticking.
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.fakes import InMemoryNeo4jClient
+from benchmarks.harness import print_table, save_results, summarize
+
+TICK = 0.005
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    """Record how late each 5 ms sleep wakes up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - start - TICK))
+
+
+async def login_storm(auth_module, auth, logins: int, off_loop: bool):
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+
+    async def blocking_login():
+        # The previous path: bcrypt verification inline in the coroutine
+        user = auth_module.db_client.get_user_by_username("bench")
+        return auth.verify_password("secret", user['hashed_password'])
+
+    async def one():
+        start = time.perf_counter()
+        if off_loop:
+            await auth.authenticate_user("bench", "secret")
+        else:
+            await blocking_login()
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+    return summarize(latencies, elapsed), summarize(lags)
+
+
+async def token_checks(auth, token: str, count: int, cached: bool):
+    from fastapi.security import HTTPAuthorizationCredentials
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    latencies = []
+    for _ in range(count):
+        if not cached:
+            auth.token_cache.clear()
+        start = time.perf_counter()
+        await auth.get_current_user(credentials)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--token-checks', type=int, default=500)
+    parser.add_argument('--neo4j-latency', type=float, default=2.0, help="Simulated Neo4j round-trip in ms")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    import database.neo4j_client as neo4j_client
+    neo4j_client.Neo4jClient = lambda: InMemoryNeo4jClient(args.neo4j_latency)
+    from utils import auth as auth_module
+
+    auth = auth_module.Auth()
+    auth_module.db_client.add_user("bench-id", "bench", auth.get_password_hash("secret"))
+    token = auth.encode_token("bench-id")
+
+    results = {}
+    for label, off_loop in (("login inline bcrypt", False), ("login bcrypt pool", True)):
+        logins, lag = asyncio.run(login_storm(auth_module, auth, args.logins, off_loop))
+        results[label] = logins
+        results[f"{label} - loop lag"] = lag
+    results["get_current_user uncached"] = asyncio.run(token_checks(auth, token, args.token_checks, cached=False))
+    results["get_current_user cached"] = asyncio.run(token_checks(auth, token, args.token_checks, cached=True))
+
+    print_table(results)
+    if not args.no_save:
+        print(f"Saved {save_results('auth', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/load-abc123-....json benchmarks/results/load-def456-....json
+"""
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> bool:
+    """Print per-benchmark deltas and return True if any latency regressed by more than `threshold` percent."""
+    regressed = False
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'benchmark':<40} " + " ".join(f"{metric:>22}" for metric in METRICS))
+    for name, stats in candidate['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        cells = []
+        for metric in METRICS:
+            old, new = before[metric], stats[metric]
+            change = 100.0 * (new - old) / old if old else 0.0
+            # Higher throughput is better; for latencies lower is better
+            worse = -change if metric == "throughput_rps" else change
+            if worse > threshold:
+                regressed = True
+            cells.append(f"{old:>8} -> {new:<8}{change:+6.1f}%")
+        print(f"{name:<40} " + " ".join(f"{cell:>22}" for cell in cells))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if compare(baseline, candidate, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import importlib
+import os
+import sys
+import threading
+import time
+import types
+from typing import Dict, Optional
+from benchmarks.fakes import InMemoryNeo4jClient, NullPretrained, StubPipeline
+from benchmarks.stubs import LatencyProfile, NewsStub, OpenAIStub, WeatherStub
+
+
+def start_stubs(openai: Optional[LatencyProfile] = None,
+                weather: Optional[LatencyProfile] = None,
+                news: Optional[LatencyProfile] = None,
+                openai_prompt_token_ms: float = 0.0) -> Dict:
+    """Start the three upstream stand-ins and point the backend settings at them."""
+    stubs = {
+        "openai": OpenAIStub(openai, prompt_token_ms=openai_prompt_token_ms).start(),
+        "weather": WeatherStub(weather).start(),
+        "news": NewsStub(news).start()
+    }
+    os.environ['OPENAI_API_BASE'] = stubs['openai'].api_base
+    os.environ['WEATHER_API_URL'] = stubs['weather'].api_url
+    os.environ['NEWS_API_URL'] = stubs['news'].api_url
+    os.environ.setdefault('OPENAI_API_KEY', 'stub-key')
+    os.environ.setdefault('WEATHER_API_KEY', 'stub-key')
+    os.environ.setdefault('NEWS_API_KEY', 'stub-key')
+    return stubs
+
+
+def stop_stubs(stubs: Dict):
+    for stub in stubs.values():
+        stub.stop()
+
+
+def load_backend(pipeline_latency_ms: float = 0.0):
+    """
+    Import `main` with the in-memory Neo4j client and the stub text-generation pipeline.
+
+    `transformers` is replaced by a stub module unless it was already imported.
+
+    Must be called after `start_stubs`, because the backend settings are read once at import time.
+    """
+    # The dialog agent imports transformers at module level; the benchmarks never load a model,
+    # so it does not have to be installed
+    if 'transformers' not in sys.modules:
+        transformers = types.ModuleType('transformers')
+        transformers.AutoTokenizer = transformers.AutoModelForCausalLM = NullPretrained
+        transformers.pipeline = lambda *args, **kwargs: StubPipeline(pipeline_latency_ms)
+        sys.modules['transformers'] = transformers
+
+    import database.neo4j_client as neo4j_client
+    neo4j_client.Neo4jClient = InMemoryNeo4jClient
+
+    import agents.user_interaction as user_interaction
+    user_interaction.Neo4jClient = InMemoryNeo4jClient
+    user_interaction.AutoTokenizer = NullPretrained
+    user_interaction.AutoModelForCausalLM = NullPretrained
+    user_interaction.pipeline = lambda *args, **kwargs: StubPipeline(pipeline_latency_ms)
+
+    # The dialog reads answers with input(); never block on the terminal during a benchmark
+    sys.stdin = open(os.devnull)
+
+    return importlib.import_module('main')
+
+
+class BackgroundServer:
+    """Run the FastAPI app with uvicorn in a daemon thread."""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8765):
+        import uvicorn
+        self.config = uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, name="uvicorn", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.config.host}:{self.config.port}"
+
+    def start(self, timeout: float = 10.0) -> 'BackgroundServer':
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start in time")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
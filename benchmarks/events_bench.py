@@ -0,0 +1,129 @@
+"""
+Event store: bulk load time and schedule conflict queries, naive vs indexed.
+
+    python -m benchmarks.events_bench [--events N] [--cities N] [--stops N]
+
+Synthetic events (closures, street events and city-wide strikes) are spread over a
+month and a city area. "naive scan" checks every event of the city against each
+stop in Python, "indexed, per stop" queries the event store once per stop, and
+"indexed, batched" flags the whole schedule with one `schedule_conflicts` call,
+as `/generate-itinerary` does.
+"""
+import argparse
+import math
+import random
+import time
+from benchmarks.harness import bench, print_table, save_results
+
+CENTER = (48.8566, 2.3522)
+DATE = "2030-06-15"
+
+
+def synthetic_events(count: int, cities: int, seed: int = 11) -> list:
+    """Events over June 2030: 70% located, 20% at a named venue, 10% city-wide."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        day = rng.randint(1, 30)
+        hour = rng.randint(6, 22)
+        start = f"2030-06-{day:02d}T{hour:02d}:{rng.choice(('00', '30'))}"
+        end_hour = min(23, hour + rng.randint(1, 4))
+        event = {
+            "city": f"City {i % cities}",
+            "name": f"Event {i}",
+            "start": start,
+            "end": f"2030-06-{day:02d}T{end_hour:02d}:59",
+            "type": rng.choice(("closure", "event", "roadworks"))
+        }
+        kind = rng.random()
+        if kind < 0.7:
+            event["lat"] = CENTER[0] + rng.uniform(-0.1, 0.1)
+            event["lon"] = CENTER[1] + rng.uniform(-0.15, 0.15)
+        elif kind < 0.9:
+            event["venue"] = f"Attraction {rng.randint(0, 400)}"
+        else:
+            event["type"] = "strike"
+        events.append(event)
+    return events
+
+
+def synthetic_schedule(stops: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    return [{
+        "time": f"{9 + i:02d}:00-{10 + i:02d}:00",
+        "activity": f"Visit attraction {i}",
+        "location": f"Attraction {rng.randint(0, 400)}",
+        "lat": CENTER[0] + rng.uniform(-0.05, 0.05),
+        "lon": CENTER[1] + rng.uniform(-0.07, 0.07)
+    } for i in range(stops)]
+
+
+def naive_conflicts(events: list, date: str, schedule: list, radius_m: float) -> list:
+    """Check every event against every stop, as a plain per-stop scan would."""
+    from database.event_store import METRES_PER_DEGREE, schedule_stop, to_timestamp
+    conflicts = []
+    for item in schedule:
+        start, end, lat, lon, name = schedule_stop(date, item)
+        found = []
+        for event in events:
+            if not (to_timestamp(event['start']) < end and to_timestamp(event['end']) > start):
+                continue
+            if event.get('lat') is not None:
+                dy = (event['lat'] - lat) * METRES_PER_DEGREE
+                dx = (event['lon'] - lon) * METRES_PER_DEGREE * math.cos(math.radians(lat))
+                if dx * dx + dy * dy > radius_m * radius_m:
+                    continue
+            elif event.get('venue') and event['venue'].lower() not in name.lower():
+                continue
+            found.append(event)
+        conflicts.append(found)
+    return conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--cities', type=int, default=5)
+    parser.add_argument('--stops', type=int, default=8)
+    parser.add_argument('--radius', type=float, default=500.0, help="Conflict radius in metres")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    from database.event_store import EventStore
+
+    events = synthetic_events(args.events, args.cities)
+    store = EventStore()
+    start = time.perf_counter()
+    store.load(events)
+    load_seconds = time.perf_counter() - start
+
+    city = "City 0"
+    city_events = [event for event in events if event["city"] == city]
+    schedule = synthetic_schedule(args.stops)
+
+    batched = store.schedule_conflicts(city, DATE, schedule, args.radius)
+    naive = naive_conflicts(city_events, DATE, schedule, args.radius)
+    assert [[e["name"] for e in found] for found in batched] == \
+        [[e["name"] for e in sorted(found, key=lambda e: int(e["name"].split()[1]))] for found in naive], \
+        "indexed and naive conflicts differ"
+
+    results = {
+        "naive scan": bench(lambda: naive_conflicts(city_events, DATE, schedule, args.radius),
+                            max(1, args.iterations // 100), warmup=1),
+        "indexed, per stop": bench(lambda: [store.schedule_conflicts(city, DATE, [item], args.radius)
+                                            for item in schedule], args.iterations, warmup=5),
+        "indexed, batched": bench(lambda: store.schedule_conflicts(city, DATE, schedule, args.radius),
+                                  args.iterations, warmup=5)
+    }
+    results["indexed, batched"]["load_seconds"] = round(load_seconds, 3)
+
+    print_table(results)
+    print(f"Loaded {args.events} events in {load_seconds:.2f}s; "
+          f"{sum(map(len, batched))} conflicts across {args.stops} stops")
+    if not args.no_save:
+        print(f"Saved {save_results('events', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from benchmarks.stubs import ATTRACTIONS_LITERAL
+from models.itinerary import pack, unpack
+
+
+class InMemoryNeo4jClient:
+    """Drop-in substitute for `Neo4jClient` that keeps the graph in process memory.
+
+    `latency_ms` adds a simulated round-trip to every query.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self._lock = threading.Lock()
+        self.preferences = defaultdict(dict)
+        self.visits = defaultdict(list)
+        self.users = {}
+
+    def close(self):
+        pass
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create_user_preference(self, user_id: str, entity: str, relationship: str, value: str):
+        self._round_trip()
+        with self._lock:
+            self.preferences[user_id][(entity, relationship)] = value
+
+    def get_user_preferences(self, user_id: str):
+        self._round_trip()
+        with self._lock:
+            return [
+                {"entity": entity, "relationship": relationship, "value": value}
+                for (entity, relationship), value in self.preferences.get(user_id, {}).items()
+            ]
+
+    def store_itinerary(self, user_id: str, city: str, date: str, itinerary):
+        self._round_trip()
+        payload = pack(itinerary)
+        with self._lock:
+            self.visits[user_id].append({"city": city, "date": date, "payload": payload})
+
+    def get_user_history(self, user_id: str):
+        self._round_trip()
+        with self._lock:
+            return {
+                "itineraries": [
+                    {"city": visit["city"], "date": visit["date"], "itinerary": unpack(visit["payload"])}
+                    for visit in reversed(self.visits.get(user_id, []))
+                ],
+                "preferences": [
+                    {"entity": entity, "relationship": relationship, "value": value}
+                    for (entity, relationship), value in self.preferences.get(user_id, {}).items()
+                ]
+            }
+
+    def add_user(self, user_id: str, username: str, hashed_password: str):
+        with self._lock:
+            self.users[user_id] = {"id": user_id, "username": username, "hashed_password": hashed_password}
+
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        self._round_trip()
+        with self._lock:
+            return next((user for user in self.users.values() if user['username'] == username), None)
+
+    def user_exists(self, user_id: str) -> bool:
+        self._round_trip()
+        with self._lock:
+            return user_id in self.users
+
+
+class StubPipeline:
+    """Stand-in for the gpt-neo text-generation pipeline used by `UserInteractionAgent`.
+
+    `latency_ms` simulates local generation time.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+
+    def __call__(self, prompt: str, **kwargs) -> List[Dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [{"generated_text": ATTRACTIONS_LITERAL}]
+
+
+class NullPretrained:
+    """Replaces `AutoTokenizer`/`AutoModelForCausalLM` so no model weights are loaded."""
+
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
@@ -0,0 +1,99 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from benchmarks import RESULTS_DIR
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None, errors: int = 0) -> Dict:
+    """
+    Summarize latencies (in seconds) into the figures stored in result files.
+
+    Args:
+        latencies (List[float]): Per-call latencies in seconds
+        elapsed (float): Wall-clock duration of the run, used for throughput
+        errors (int): Number of failed calls
+
+    Returns:
+        Dict: Count, throughput and p50/p95/p99/max latency in milliseconds
+    """
+    ordered = sorted(latencies)
+    total = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / total, 2) if total else 0.0,
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": round(1000 * percentile(ordered, 50), 4),
+        "p95_ms": round(1000 * percentile(ordered, 95), 4),
+        "p99_ms": round(1000 * percentile(ordered, 99), 4),
+        "max_ms": round(1000 * ordered[-1], 4) if ordered else 0.0
+    }
+
+
+def bench(func: Callable, iterations: int = 1000, warmup: int = 50) -> Dict:
+    """Time `func` individually for each iteration after a short warm-up."""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    clock = time.perf_counter
+    for _ in range(iterations):
+        start = clock()
+        func()
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, or 'unknown' outside a git tree."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(RESULTS_DIR),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def save_results(suite: str, results: Dict, config: Optional[Dict] = None) -> str:
+    """Write results to benchmarks/results/<suite>-<commit>-<timestamp>.json and return the path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{suite}-{commit}-{timestamp}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            "suite": suite,
+            "commit": commit,
+            "timestamp": timestamp,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "config": config or {},
+            "results": results
+        }, f, indent=2)
+    return path
+
+
+def print_table(results: Dict):
+    """Print one line per benchmark."""
+    print(f"{'benchmark':<40} {'count':>7} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'errors':>7} {'shed':>6}")
+    for name, stats in results.items():
+        print(
+            f"{name:<40} {stats['count']:>7} {stats['throughput_rps']:>10} "
+            f"{stats['p50_ms']:>10} {stats['p95_ms']:>10} {stats['p99_ms']:>10} {stats['errors']:>7} "
+            f"{stats.get('shed', '-'):>6}"
+        )
@@ -0,0 +1,144 @@
+"""
+Concurrent load driver for the FastAPI endpoints.
+
+By default the backend is started in-process against the local stand-ins:
+
+    python -m benchmarks.load --concurrency 16 --requests 200 --openai-latency 300
+
+Pass --url to drive an already running server instead.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import requests
+from benchmarks.environment import BackgroundServer, load_backend, start_stubs, stop_stubs
+from benchmarks.harness import print_table, save_results, summarize
+from benchmarks.stubs import LatencyProfile, ITINERARY_LITERAL
+
+ITINERARY_REQUEST = {
+    "user_id": "bench-user",
+    "city": "Paris",
+    "date": "2030-06-01",
+    "start_time": "09:00",
+    "end_time": "18:00",
+    "interests": ["museums", "parks", "food"],
+    "budget": 120.0,
+    "starting_point": "Gare du Nord"
+}
+
+
+def endpoints() -> Dict[str, Callable[[requests.Session, str], requests.Response]]:
+    """One request factory per endpoint."""
+    return {
+        "POST /process-input": lambda s, url: s.post(
+            f"{url}/process-input", json={"user_id": "bench-user", "message": "Plan a day in Paris"}),
+        "POST /generate-itinerary": lambda s, url: s.post(
+            f"{url}/generate-itinerary", json=ITINERARY_REQUEST),
+        "POST /adjust-itinerary": lambda s, url: s.post(f"{url}/adjust-itinerary", json={
+            "user_id": "bench-user",
+            "current_itinerary": eval(ITINERARY_LITERAL),
+            "adjustment_type": "time",
+            "adjustment_details": {"end_time": "16:00"}
+        }),
+        "GET /weather": lambda s, url: s.get(
+            f"{url}/weather", params={"city": "Paris", "date": ITINERARY_REQUEST['date']}),
+        "GET /news": lambda s, url: s.get(f"{url}/news", params={"city": "Paris"}),
+        "GET /user-preferences": lambda s, url: s.get(f"{url}/user-preferences/bench-user"),
+        "GET /user-history": lambda s, url: s.get(f"{url}/user-history/bench-user"),
+        "POST /trip-bundle": lambda s, url: s.post(f"{url}/trip-bundle", json=ITINERARY_REQUEST),
+        "GET /metrics": lambda s, url: s.get(f"{url}/metrics")
+    }
+
+
+def drive(url: str, name: str, call: Callable, total: int, concurrency: int) -> Dict:
+    """Issue `total` requests with `concurrency` workers, each with its own keep-alive session."""
+    local = threading.local()
+    latencies: List[float] = []
+    errors = shed = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors, shed
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = call(local.session, url).status_code
+        except requests.RequestException:
+            status = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            # 503 is admission control shedding load on purpose; count it apart from failures
+            if status == 503:
+                shed += 1
+            elif status is None or status >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"load-{name}") as pool:
+        list(pool.map(one, range(total)))
+    stats = summarize(latencies, time.perf_counter() - started, errors)
+    stats['shed'] = shed
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Drive an existing server instead of starting one in-process")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100, help="Requests per endpoint")
+    parser.add_argument('--only', nargs='*', help="Substrings of endpoint names to run")
+    parser.add_argument('--openai-latency', type=float, default=200.0, help="Stub OpenAI latency in ms")
+    parser.add_argument('--weather-latency', type=float, default=50.0, help="Stub weather API latency in ms")
+    parser.add_argument('--news-latency', type=float, default=80.0, help="Stub news API latency in ms")
+    parser.add_argument('--jitter', type=float, default=10.0, help="Jitter in ms applied to every stub")
+    parser.add_argument('--llm-max-concurrency', type=int, help="Backend LLM_MAX_CONCURRENCY for overload runs")
+    parser.add_argument('--llm-deadline', type=float, help="Backend LLM_REQUEST_DEADLINE in seconds")
+    parser.add_argument('--log-level', default='WARNING', help="Backend LOG_LEVEL, e.g. DEBUG to compare against WARNING")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    stubs, server = None, None
+    url = args.url
+    if not url:
+        os.environ['LOG_LEVEL'] = args.log_level
+        if args.llm_max_concurrency:
+            os.environ['LLM_MAX_CONCURRENCY'] = str(args.llm_max_concurrency)
+        if args.llm_deadline:
+            os.environ['LLM_REQUEST_DEADLINE'] = str(args.llm_deadline)
+        os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(), 'tour_planner_bench_logs'))
+        # Every request repeats the same plan; measure planning rather than the itinerary cache
+        os.environ.setdefault('ITINERARY_CACHE_TTL', '0')
+        stubs = start_stubs(
+            openai=LatencyProfile(args.openai_latency, args.jitter),
+            weather=LatencyProfile(args.weather_latency, args.jitter),
+            news=LatencyProfile(args.news_latency, args.jitter)
+        )
+        server = BackgroundServer(load_backend().app, port=args.port).start()
+        url = server.url
+
+    results = {}
+    try:
+        for name, call in endpoints().items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = drive(url, name, call, args.requests, args.concurrency)
+    finally:
+        if server:
+            server.stop()
+        if stubs:
+            stop_stubs(stubs)
+
+    print_table(results)
+    if not args.no_save:
+        print(f"Saved {save_results('load', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Request throughput on the event loop with logging off, with the previous
+synchronous file handler at DEBUG, and with the queue-based pipeline at DEBUG
+(with and without DEBUG sampling).
+
+    python -m benchmarks.logging_bench [--requests N] [--concurrency N] [--logs-per-request N]
+
+Each simulated request awaits a short upstream call and emits a handful of
+DEBUG/INFO records, like the agents do.
+"""
+import argparse
+import asyncio
+import logging
+import logging.handlers
+import os
+import tempfile
+import time
+from benchmarks.harness import print_table, save_results, summarize
+
+
+async def handle_request(logger: logging.Logger, index: int, logs_per_request: int, upstream_ms: float):
+    start = time.perf_counter()
+    logger.info("Handling request %d", index)
+    for step in range(logs_per_request):
+        logger.debug("Step %d of request %d with payload %s", step, index, {"city": "Paris", "step": step})
+    await asyncio.sleep(upstream_ms / 1000.0)
+    return time.perf_counter() - start
+
+
+async def drive(logger: logging.Logger, total: int, concurrency: int, logs_per_request: int, upstream_ms: float):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index):
+        async with semaphore:
+            latencies.append(await handle_request(logger, index, logs_per_request, upstream_ms))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def configure(mode: str, log_dir: str):
+    """Reset the root logger to one of the compared configurations."""
+    from utils import logging_config
+
+    logging_config.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+    elif mode == "sync-debug":
+        # The previous setup: a RotatingFileHandler written from the request path
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, 'sync.log'), maxBytes=10485760, backupCount=5)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+    elif mode.startswith("queue-debug"):
+        sample_rates = {"agents": 0.1} if mode.endswith("sampled") else None
+        logging_config.setup_logging(level='DEBUG', log_dir=log_dir, sample_rates=sample_rates)
+        # Keep the console quiet so the comparison is about the file path only
+        for handler in logging_config._listener.handlers:
+            if not isinstance(handler, logging.FileHandler):
+                handler.setLevel(logging.CRITICAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--logs-per-request', type=int, default=10)
+    parser.add_argument('--upstream-ms', type=float, default=1.0)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    logger = logging.getLogger("agents.bench")
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in ("off", "sync-debug", "queue-debug", "queue-debug-sampled"):
+            configure(mode, log_dir)
+            results[mode] = asyncio.run(
+                drive(logger, args.requests, args.concurrency, args.logs_per_request, args.upstream_ms))
+        configure("off", log_dir)
+
+    print_table(results)
+    if not args.no_save:
+        print(f"Saved {save_results('logging', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
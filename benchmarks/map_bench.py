@@ -0,0 +1,112 @@
+"""
+Map payload size and per-rerun render time, before and after the GeoJSON map.
+
+    python -m benchmarks.map_bench [--stops N] [--route-points N]
+
+"before" rebuilds a folium map with one Marker per stop and the full route
+PolyLine and serializes it on every rerun, as `display_map` used to. "after"
+is the frontend's own `render_map`: the simplified GeoJSON layer with fit-bounds,
+built once per itinerary hash; later reruns are a hash plus a `st.cache_data`
+lookup. Needs the frontend requirements (streamlit, folium) installed.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from benchmarks.harness import bench, print_table, save_results
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
+if FRONTEND_DIR not in sys.path:
+    sys.path.insert(0, FRONTEND_DIR)
+
+CENTER = (48.8566, 2.3522)
+
+
+def synthetic_schedule(stops: int, route_points: int, seed: int = 7) -> list:
+    """Stops around a city centre, each with a dense, slightly noisy street path from the previous one."""
+    rng = random.Random(seed)
+    schedule, previous = [], None
+    for i in range(stops):
+        angle = 2 * math.pi * i / stops
+        position = (CENTER[0] + 0.02 * math.sin(angle), CENTER[1] + 0.03 * math.cos(angle))
+        route = []
+        if previous is not None:
+            for step in range(1, route_points):
+                t = step / route_points
+                route.append([
+                    previous[0] + (position[0] - previous[0]) * t + rng.uniform(-2e-5, 2e-5),
+                    previous[1] + (position[1] - previous[1]) * t + rng.uniform(-2e-5, 2e-5)
+                ])
+        schedule.append({
+            "time": f"{9 + i:02d}:00-{10 + i:02d}:00",
+            "activity": f"Visit attraction {i}",
+            "location": f"Attraction {i}",
+            "lat": position[0],
+            "lon": position[1],
+            "route": route
+        })
+        previous = position
+    return schedule
+
+
+def render_before(schedule) -> str:
+    """The previous display_map: Markers plus the full PolyLine, fixed centre and zoom."""
+    import folium
+    m = folium.Map(location=[0, 0], zoom_start=13)
+    locations = []
+    for item in schedule:
+        locations.extend(item["route"])
+        location = [item["lat"], item["lon"]]
+        locations.append(location)
+        folium.Marker(location, popup=item["activity"], tooltip=item["location"]).add_to(m)
+    if locations:
+        folium.PolyLine(locations, weight=2, color='blue', opacity=0.8).add_to(m)
+    return m.get_root().render()
+
+
+def render_after(schedule) -> str:
+    """The frontend's render_map without its Streamlit cache, i.e. a first render."""
+    from frontend.app import render_map
+    return render_map.__wrapped__(None, schedule)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stops', type=int, default=8)
+    parser.add_argument('--route-points', type=int, default=400, help="Path points per leg")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    from frontend.app import render_map
+    from map_view import build_geojson, itinerary_hash
+    schedule = synthetic_schedule(args.stops, args.route_points)
+    itinerary = {"schedule": schedule}
+
+    def rerun_after():
+        return render_map(itinerary_hash(itinerary), schedule)
+
+    before_html = render_before(schedule)
+    after_html = render_after(schedule)
+    raw_points = sum(len(item["route"]) + 1 for item in schedule)
+    route = next(f for f in build_geojson(schedule)["features"] if f["geometry"]["type"] == "LineString")
+
+    results = {
+        "rerun before (rebuild + render)": bench(lambda: render_before(schedule), args.iterations, warmup=2),
+        "first render after (GeoJSON)": bench(lambda: render_after(schedule), args.iterations, warmup=2),
+        "rerun after (memoized)": bench(rerun_after, args.iterations * 20, warmup=1)
+    }
+    results["rerun before (rebuild + render)"]["payload_bytes"] = len(before_html.encode())
+    results["first render after (GeoJSON)"]["payload_bytes"] = len(after_html.encode())
+    results["first render after (GeoJSON)"]["route_points"] = len(route["geometry"]["coordinates"])
+
+    print_table(results)
+    print(f"Payload: {len(before_html.encode())} -> {len(after_html.encode())} bytes; "
+          f"route points: {raw_points} -> {len(route['geometry']['coordinates'])}")
+    if not args.no_save:
+        print(f"Saved {save_results('map', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmarks for the hot helper methods of the agents.
+
+    python -m benchmarks.micro [--iterations N] [--no-save]
+"""
+import argparse
+from benchmarks.environment import start_stubs, stop_stubs
+from benchmarks.harness import bench, print_table, save_results
+from benchmarks.stubs import ATTRACTIONS_LITERAL, ITINERARY_LITERAL, forecast_day, news_articles
+
+
+def run(iterations: int) -> dict:
+    from agents.itinerary_generation import ItineraryGenerationAgent
+    from agents.news import NewsAgent
+    from agents.weather import WeatherAgent
+    from utils.tracing import span
+
+    itinerary_agent = ItineraryGenerationAgent()
+    news_agent = NewsAgent()
+    weather_agent = WeatherAgent()
+
+    attractions = eval(ATTRACTIONS_LITERAL)
+    articles = news_articles(50)
+    day = forecast_day()
+
+    def spans_x1000():
+        for _ in range(1000):
+            with span("bench.noop"):
+                pass
+
+    return {
+        "format_attractions": bench(lambda: itinerary_agent._format_attractions(attractions), iterations),
+        "process_news": bench(lambda: news_agent._process_news(articles), iterations),
+        "generate_recommendations": bench(lambda: weather_agent._generate_recommendations(day), iterations),
+        # Includes the round-trip to the local OpenAI stand-in, like the real structuring call
+        "parse_itinerary": bench(lambda: itinerary_agent._parse_itinerary(ITINERARY_LITERAL), max(1, iterations // 10)),
+        # 1000 spans per call, so the millisecond figures read as microseconds per span
+        "span_overhead_x1000": bench(spans_x1000, max(1, iterations // 100), warmup=5)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--no-save', action='store_true', help="Print results without writing a JSON file")
+    args = parser.parse_args()
+
+    stubs = start_stubs()
+    try:
+        results = run(args.iterations)
+    finally:
+        stop_stubs(stubs)
+
+    print_table(results)
+    if not args.no_save:
+        print(f"Saved {save_results('micro', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
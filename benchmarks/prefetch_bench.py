@@ -0,0 +1,114 @@
+"""
+Itinerary latency after the last dialog answer, with and without speculative prefetch.
+
+    python -m benchmarks.prefetch_bench [--dialogs N] [--think-ms MS] [--pipeline-ms MS]
+
+Each dialog answers the seven slot questions with `--think-ms` between answers
+(standing in for the user typing), then builds the itinerary as /generate-itinerary
+does. With prefetch, attraction suggestions, forecasts and news are fetched while
+the remaining questions are answered; without it they are fetched after the last
+answer. Every dialog uses a new city so the caches start cold.
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import time
+from benchmarks.environment import load_backend, start_stubs, stop_stubs
+from benchmarks.harness import print_table, save_results, summarize
+from benchmarks.stubs import LatencyProfile
+
+CACHES = ("attractions", "weather_hourly", "weather_forecast", "news")
+
+
+def answers(city: str) -> dict:
+    return {
+        "city": city,
+        "date": "2030-06-01",
+        "start_time": "09:00",
+        "end_time": "18:00",
+        "interests": "museums, art",
+        "budget": "80",
+        "starting_point": "Central Station"
+    }
+
+
+def run_dialogs(main, tracing, label: str, dialogs: int, think: float, prefetch: bool) -> dict:
+    user_agent = main.user_agent
+    user_agent.prefetcher = main.prefetcher if prefetch else None
+    hits_before = {cache: tracing.CACHE_REQUESTS.get(cache, 'hit') for cache in CACHES}
+    misses_before = {cache: tracing.CACHE_REQUESTS.get(cache, 'miss') for cache in CACHES}
+    latencies = []
+    original_input = builtins.input
+    try:
+        for i in range(dialogs):
+            slots = answers(f"{label} City {i}")
+            queue = iter(slots.values())
+
+            def answer(prompt=""):
+                time.sleep(think)
+                return next(queue)
+
+            builtins.input = answer
+            with contextlib.redirect_stdout(io.StringIO()):
+                info = user_agent.process_initial_input(f"user-{label}-{i}", "")
+            request = main.ItineraryRequest(
+                user_id=f"user-{label}-{i}",
+                city=info["city"],
+                date=info["date"],
+                start_time=info["start_time"],
+                end_time=info["end_time"],
+                interests=main.split_interests(info["interests"]),
+                budget=float(info["budget"]),
+                starting_point=info["starting_point"]
+            )
+            # Latency the user sees after the last answer
+            start = time.perf_counter()
+            main._build_itinerary(request)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        builtins.input = original_input
+
+    stats = summarize(latencies)
+    hits = sum(tracing.CACHE_REQUESTS.get(cache, 'hit') - hits_before[cache] for cache in CACHES)
+    misses = sum(tracing.CACHE_REQUESTS.get(cache, 'miss') - misses_before[cache] for cache in CACHES)
+    stats["cache_hit_rate"] = round(hits / (hits + misses), 3) if hits + misses else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dialogs', type=int, default=10)
+    parser.add_argument('--think-ms', type=float, default=1000.0, help="Time between dialog answers")
+    parser.add_argument('--pipeline-ms', type=float, default=1500.0, help="Attraction suggestion latency")
+    parser.add_argument('--openai-latency', type=float, default=300.0)
+    parser.add_argument('--weather-latency', type=float, default=150.0)
+    parser.add_argument('--news-latency', type=float, default=200.0)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    stubs = start_stubs(
+        openai=LatencyProfile(args.openai_latency),
+        weather=LatencyProfile(args.weather_latency),
+        news=LatencyProfile(args.news_latency)
+    )
+    try:
+        main_module = load_backend(pipeline_latency_ms=args.pipeline_ms)
+        from utils import tracing
+        think = args.think_ms / 1000.0
+        results = {
+            "after last answer, no prefetch": run_dialogs(main_module, tracing, "cold", args.dialogs, think, False),
+            "after last answer, prefetch": run_dialogs(main_module, tracing, "warm", args.dialogs, think, True)
+        }
+    finally:
+        stop_stubs(stubs)
+
+    print_table(results)
+    for name, stats in results.items():
+        print(f"{name}: cache hit rate {stats['cache_hit_rate']:.0%}")
+    if not args.no_save:
+        print(f"Saved {save_results('prefetch', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
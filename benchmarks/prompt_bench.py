@@ -0,0 +1,107 @@
+"""
+Prompt size and generation latency with and without attraction pre-ranking.
+
+    python -m benchmarks.prompt_bench [--candidates N] [--prompt-token-ms MS]
+
+"full" sends every candidate in the previous verbose format; "ranked" sends the
+top-k candidates selected by AttractionRanker in the compact table. The OpenAI
+stand-in charges latency per prompt token, so the latency difference follows
+the token difference.
+"""
+import argparse
+from benchmarks.environment import start_stubs, stop_stubs
+from benchmarks.harness import bench, print_table, save_results
+from benchmarks.stubs import estimate_tokens
+
+CATEGORIES = ['Museum', 'Park', 'Art Gallery', 'Botanical Garden', 'Food Market', 'Historic Landmark',
+              'Shopping Street', 'River Cruise', 'Science Center', 'Viewpoint']
+INTERESTS = ['museums', 'art', 'food']
+
+
+def candidates(count: int) -> list:
+    return [
+        {
+            'name': f'{CATEGORIES[i % len(CATEGORIES)]} {i}',
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'duration': f'{45 + 15 * (i % 8)} minutes',
+            'cost': 5 * (i % 7),
+            'description': f'A well known {CATEGORIES[i % len(CATEGORIES)].lower()} in the old town'
+        }
+        for i in range(count)
+    ]
+
+
+def format_verbose(attractions: list) -> str:
+    """The previous prompt encoding: every candidate, one multi-line block each."""
+    return "\n".join(
+        f"- {a['name']}\n  Duration: {a['duration']}\n  Cost: ${a['cost']}\n  Category: {a['category']}\n"
+        for a in attractions
+    )
+
+
+class PassThroughRanker:
+    def rank(self, attractions, *args, **kwargs):
+        return attractions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--prompt-token-ms', type=float, default=0.5, help="Stub latency per prompt token")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    stubs = start_stubs(openai_prompt_token_ms=args.prompt_token_ms)
+    try:
+        from agents.itinerary_generation import ItineraryGenerationAgent
+
+        class UnrankedAgent(ItineraryGenerationAgent):
+            """Previous behaviour: no pre-ranking and the verbose encoding."""
+
+            def __init__(self):
+                super().__init__()
+                self.ranker = PassThroughRanker()
+
+            def _format_attractions(self, attractions):
+                return format_verbose(attractions)
+
+        agent = ItineraryGenerationAgent()
+        unranked_agent = UnrankedAgent()
+        attractions = candidates(args.candidates)
+        plan = dict(city="Paris", date="2030-06-01", start_time="09:00", end_time="18:00", budget=60.0)
+
+        ranked = agent.ranker.rank(attractions, INTERESTS, plan['budget'], plan['start_time'], plan['end_time'])
+        full_tokens = estimate_tokens(format_verbose(attractions))
+        ranked_tokens = estimate_tokens(agent._format_attractions(ranked))
+
+        # Generation with every candidate in the verbose encoding
+        stubs['openai'].prompt_tokens_seen.clear()
+        full = bench(lambda: unranked_agent.generate_itinerary(attractions=attractions, interests=INTERESTS, **plan),
+                     args.iterations, warmup=1)
+        full['prompt_tokens'] = max(stubs['openai'].prompt_tokens_seen)
+        full['candidate_tokens'] = full_tokens
+
+        # Generation with ranking and the compact encoding
+        stubs['openai'].prompt_tokens_seen.clear()
+        ranked_stats = bench(lambda: agent.generate_itinerary(attractions=attractions, interests=INTERESTS, **plan),
+                             args.iterations, warmup=1)
+        ranked_stats['prompt_tokens'] = max(stubs['openai'].prompt_tokens_seen)
+        ranked_stats['candidate_tokens'] = ranked_tokens
+        ranked_stats['candidates'] = len(ranked)
+
+        rank_cost = bench(lambda: agent.ranker.rank(attractions, INTERESTS, plan['budget'],
+                                                    plan['start_time'], plan['end_time']), 1000)
+    finally:
+        stop_stubs(stubs)
+
+    results = {"generate full prompt": full, "generate ranked prompt": ranked_stats, "rank only": rank_cost}
+    print_table(results)
+    print(f"Candidate tokens: {full_tokens} -> {ranked_tokens}; "
+          f"prompt tokens: {full['prompt_tokens']} -> {ranked_stats['prompt_tokens']}")
+    if not args.no_save:
+        print(f"Saved {save_results('prompt', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
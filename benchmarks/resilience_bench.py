@@ -0,0 +1,82 @@
+"""
+Tail latency and outage behaviour of the weather agent with and without the resilience layer.
+
+    python -m benchmarks.resilience_bench [--iterations N] [--tail-ratio R] [--tail-ms MS]
+
+The weather stand-in answers in ~50 ms but a fraction of requests take `--tail-ms`
+longer. "direct" is the previous behaviour (one request, no timeout); "resilient"
+hedges after the recent p95 and is bounded by the per-call deadline. The outage
+phase makes every stub request fail: direct calls error out, resilient calls are
+answered from the last good response while the circuit is open. Calls bypass
+the agent's fresh-result cache so every one reaches the upstream layer.
+"""
+import argparse
+import time
+from benchmarks.environment import start_stubs, stop_stubs
+from benchmarks.harness import print_table, save_results, summarize
+from benchmarks.stubs import LatencyProfile
+
+CITY, DATE = "Paris", "2030-06-01"
+
+
+class DirectUpstream:
+    """The previous path: a single request without timeout, hedging or fallback."""
+
+    def call(self, key, fetch, cacheable=None, timeout=None):
+        return fetch(None)
+
+
+def run(func, iterations: int) -> dict:
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=50.0, help="Stub weather latency in ms")
+    parser.add_argument('--tail-ratio', type=float, default=0.02, help="Fraction of slow stub responses")
+    parser.add_argument('--tail-ms', type=float, default=1000.0, help="Extra latency of slow responses")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    profile = LatencyProfile(args.latency, jitter_ms=5.0, tail_ratio=args.tail_ratio, tail_ms=args.tail_ms)
+    stubs = start_stubs(weather=profile)
+    results = {}
+    try:
+        from agents.weather import WeatherAgent
+        resilient = WeatherAgent()
+        direct = WeatherAgent()
+        direct.upstream = DirectUpstream()
+
+        # Warm the latency window so the hedge delay follows the observed p95
+        for _ in range(30):
+            resilient._fetch_forecast(CITY, DATE)
+
+        results["direct tail"] = run(lambda: direct._fetch_forecast(CITY, DATE), args.iterations)
+        results["resilient tail"] = run(lambda: resilient._fetch_forecast(CITY, DATE), args.iterations)
+
+        profile.error_ratio = 1.0
+        outage = max(20, args.iterations // 4)
+        results["direct outage"] = run(lambda: direct._fetch_forecast(CITY, DATE), outage)
+        results["resilient outage"] = run(lambda: resilient._fetch_forecast(CITY, DATE), outage)
+        breaker_state = resilient.upstream.breaker.state
+    finally:
+        stop_stubs(stubs)
+
+    print_table(results)
+    print(f"Circuit after the outage phase: {breaker_state}")
+    if not args.no_save:
+        print(f"Saved {save_results('resilience', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Itinerary serialization cost and payload size: untyped dicts vs the typed model.
+
+    python -m benchmarks.serialization_bench [--stops N] [--route-points N]
+
+"dict" is the previous path: the eval'd dict of strings, encoded for the API by
+FastAPI's `jsonable_encoder` plus `JSONResponse`, pickled for caches and repr'd
+into prompts. "typed" is `Itinerary`: `ItineraryResponse` (orjson) for the API,
+msgpack `pack`/`unpack` for caches and history, and `to_prompt` for prompts.
+"""
+import argparse
+import pickle
+import random
+from benchmarks.harness import bench, print_table, save_results
+
+CENTER = (48.8566, 2.3522)
+
+
+def llm_itinerary(stops: int, route_points: int, seed: int = 5) -> dict:
+    """An itinerary as `_parse_itinerary` used to return it: every number a string."""
+    rng = random.Random(seed)
+    schedule = []
+    for i in range(stops):
+        start = 9 * 60 + i * 75
+        item = {
+            "time": f"{start // 60:02d}:{start % 60:02d}-{(start + 60) // 60:02d}:{(start + 60) % 60:02d}",
+            "activity": f"Visit attraction {i}",
+            "location": f"Attraction {i}, {rng.randint(1, 200)} Rue de Rivoli",
+            "duration": "60 minutes",
+            "travel_method": rng.choice(("walk", "metro", "bus")),
+            "travel_time": f"{rng.randint(5, 25)} minutes",
+            "cost": f"${rng.randint(0, 30)}.{rng.choice(('00', '50'))}",
+            "lat": CENTER[0] + rng.uniform(-0.03, 0.03),
+            "lon": CENTER[1] + rng.uniform(-0.04, 0.04)
+        }
+        if route_points:
+            item["route"] = [[item["lat"] + rng.uniform(-0.01, 0.01), item["lon"] + rng.uniform(-0.01, 0.01)]
+                             for _ in range(route_points)]
+        schedule.append(item)
+    return {"schedule": schedule, "total_cost": "$96.50", "total_distance": "7.4 km"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stops', type=int, default=8)
+    parser.add_argument('--route-points', type=int, default=0, help="Path points per stop")
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from models.itinerary import Itinerary, ItineraryResponse, pack, unpack
+
+    data = llm_itinerary(args.stops, args.route_points)
+    itinerary = Itinerary.from_dict(data)
+    content = {"status": "success", "data": data}
+    typed_content = {"status": "success", "data": itinerary}
+    pickled, packed = pickle.dumps(data), pack(itinerary)
+    assert unpack(packed).to_dict() == itinerary.to_dict()
+
+    n = args.iterations
+    results = {
+        "api encode, dict": bench(lambda: JSONResponse(jsonable_encoder(content)).body, n),
+        "api encode, typed": bench(lambda: ItineraryResponse(typed_content).body, n),
+        "cache write, dict (pickle)": bench(lambda: pickle.dumps(data), n),
+        "cache write, typed (msgpack)": bench(lambda: pack(itinerary), n),
+        "cache read, dict (pickle)": bench(lambda: pickle.loads(pickled), n),
+        "cache read, typed (msgpack)": bench(lambda: unpack(packed), n),
+        "parse LLM dict into model": bench(lambda: Itinerary.from_dict(data), n)
+    }
+    sizes = {
+        "api, dict": len(JSONResponse(jsonable_encoder(content)).body),
+        "api, typed": len(ItineraryResponse(typed_content).body),
+        "cache, dict (pickle)": len(pickled),
+        "cache, typed (msgpack)": len(packed),
+        "prompt, dict repr": len(repr(data)),
+        "prompt, typed": len(itinerary.to_prompt())
+    }
+    results["parse LLM dict into model"]["payload_bytes"] = sizes
+
+    print_table(results)
+    for name, size in sizes.items():
+        print(f"{name}: {size} bytes")
+    if not args.no_save:
+        print(f"Saved {save_results('serialization', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
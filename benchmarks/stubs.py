@@ -0,0 +1,264 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Structured itinerary returned by the OpenAI stand-in; a Python literal, as `_parse_itinerary` evals it
+ITINERARY_LITERAL = repr({
+    'schedule': [
+        {
+            'time': f'{9 + 2 * i:02d}:00-{10 + 2 * i:02d}:30',
+            'activity': f'Visit attraction {i}',
+            'location': f'Attraction {i}',
+            'duration': '90',
+            'travel_method': 'walk',
+            'travel_time': '15',
+            'cost': str(10 + i)
+        }
+        for i in range(4)
+    ],
+    'total_cost': '46',
+    'total_distance': '6'
+})
+
+ATTRACTIONS_LITERAL = repr([
+    {
+        'name': f'Attraction {i}',
+        'category': ['Museum', 'Park', 'Gallery', 'Garden', 'Market', 'Landmark'][i % 6],
+        'duration': f'{60 + 30 * (i % 3)} minutes',
+        'cost': 5 * (i % 5),
+        'description': f'Popular spot number {i}'
+    }
+    for i in range(12)
+])
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of `text`: exact with tiktoken when installed, otherwise ~4 characters per token."""
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except ImportError:
+        return max(1, len(text) // 4)
+
+
+class LatencyProfile:
+    """Configurable response delay: a base latency with jitter and an occasional slow tail."""
+
+    def __init__(self,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 tail_ratio: float = 0.0,
+                 tail_ms: float = 0.0,
+                 error_ratio: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_ratio = tail_ratio
+        self.tail_ms = tail_ms
+        self.error_ratio = error_ratio
+
+    def delay(self) -> float:
+        """Seconds to wait before answering."""
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if self.tail_ratio and random.random() < self.tail_ratio:
+            delay += self.tail_ms
+        return max(0.0, delay) / 1000.0
+
+    def should_fail(self) -> bool:
+        return bool(self.error_ratio) and random.random() < self.error_ratio
+
+
+class StubServer:
+    """Threaded local HTTP server answering with canned JSON after a configurable delay."""
+
+    name = "stub"
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or LatencyProfile()
+        self.requests_served = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                stub._handle(self, json.loads(body or b'{}'))
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: Optional[Dict]):
+        time.sleep(self.profile.delay())
+        self.requests_served += 1
+        if self.profile.should_fail():
+            status, payload = 503, {"error": "stub failure"}
+        else:
+            status, payload = self.respond(urlparse(handler.path).path, body)
+        data = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def respond(self, path: str, body: Optional[Dict]):
+        """Return (status, payload) for a request path."""
+        raise NotImplementedError
+
+
+class OpenAIStub(StubServer):
+    """Stand-in for the OpenAI chat completions endpoint.
+
+    `prompt_token_ms` adds latency per prompt token, so shorter prompts answer faster as they do upstream.
+    """
+
+    name = "openai"
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, prompt_token_ms: float = 0.0, **kwargs):
+        super().__init__(profile, **kwargs)
+        self.prompt_token_ms = prompt_token_ms
+        self.prompt_tokens_seen = []
+
+    def respond(self, path, body):
+        if not path.endswith('/chat/completions'):
+            return 404, {"error": f"unknown path {path}"}
+        prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in (body or {}).get('messages', []))
+        self.prompt_tokens_seen.append(prompt_tokens)
+        if self.prompt_token_ms:
+            time.sleep(prompt_tokens * self.prompt_token_ms / 1000.0)
+        return 200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": (body or {}).get('model', 'gpt-3.5-turbo'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": ITINERARY_LITERAL},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": estimate_tokens(ITINERARY_LITERAL),
+                "total_tokens": prompt_tokens + estimate_tokens(ITINERARY_LITERAL)
+            }
+        }
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.url}/v1"
+
+
+class WeatherStub(StubServer):
+    """Stand-in for weatherapi.com `forecast.json`."""
+
+    name = "weather"
+
+    def respond(self, path, body):
+        if not path.endswith('/forecast.json'):
+            return 404, {"error": f"unknown path {path}"}
+        return 200, weather_payload()
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/v1"
+
+
+class NewsStub(StubServer):
+    """Stand-in for newsapi.org `everything`."""
+
+    name = "news"
+
+    def respond(self, path, body):
+        if not path.endswith('/everything'):
+            return 404, {"error": f"unknown path {path}"}
+        articles = news_articles(20)
+        return 200, {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/v2"
+
+
+def forecast_day() -> Dict:
+    """A single weatherapi.com `day` block."""
+    return {
+        "maxtemp_c": 31.0,
+        "mintemp_c": 18.0,
+        "avgtemp_c": 24.5,
+        "condition": {"text": "Patchy rain possible"},
+        "daily_chance_of_rain": 65,
+        "avghumidity": 70,
+        "uv": 8.0
+    }
+
+
+def weather_payload(date: Optional[str] = None) -> Dict:
+    """A full forecast.json payload with 24 hourly entries."""
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    hours = [
+        {
+            "time": f"{date} {hour:02d}:00",
+            "temp_c": 18.0 + 10.0 * max(0, 1 - abs(hour - 14) / 8),
+            "condition": {"text": "Light rain" if 11 <= hour <= 13 else "Partly cloudy"},
+            "chance_of_rain": 80 if 11 <= hour <= 13 else 10
+        }
+        for hour in range(24)
+    ]
+    return {
+        "location": {"name": "Stub City"},
+        "forecast": {"forecastday": [{"date": date, "day": forecast_day(), "hour": hours}]}
+    }
+
+
+def news_articles(count: int) -> list:
+    """Synthetic newsapi.org articles with a mix of relevant and irrelevant items."""
+    topics = [
+        ("Museum closure announced", "The city museum is closed for maintenance"),
+        ("Festival weekend", "A music festival brings visitors downtown"),
+        ("Road construction on Main St", "Expect delays due to construction"),
+        ("Local election results", "Council seats were decided yesterday"),
+        ("Transport strike planned", "Public transport workers announce a strike")
+    ]
+    now = datetime.now()
+    articles = []
+    for i in range(count):
+        title, description = topics[i % len(topics)]
+        articles.append({
+            "title": f"{title} #{i}",
+            "description": description,
+            "publishedAt": (now - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": {"name": "Stub News"},
+            "url": f"https://news.example/{i}"
+        })
+    return articles
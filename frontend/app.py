@@ -1,16 +1,93 @@
 import streamlit as st
 import requests
 import json
+import hashlib
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 import pandas as pd
+from map_view import build_geojson, fit_bounds, itinerary_hash
 
 # Configure the app
 st.set_page_config(page_title="Tour Planner", layout="wide")
 
 # Constants
 API_URL = "http://localhost:8000"
+PLAN_FIELDS = ["city", "date", "start_time", "end_time", "interests"]
+# Alternative plans the user can opt into; each one costs extra LLM calls, so none are requested by default
+SCENARIOS = {
+    "baseline": "Recommended",
+    "wet_weather": "If it rains",
+    "low_budget": "Lower budget",
+    "fewer_stops": "Relaxed pace"
+}
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so backend calls reuse pooled keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def plan_hash(plan):
+    """Stable hash of a plan request, used as the bundle cache key."""
+    return hashlib.sha1(json.dumps(plan, sort_keys=True).encode()).hexdigest()
+
+class PartialBundle(Exception):
+    """A trip bundle with failed or timed-out parts; raised so `st.cache_data` does not keep it."""
+    
+    def __init__(self, bundle):
+        super().__init__(", ".join(bundle.get("errors", {})))
+        self.bundle = bundle
+
+@st.cache_data(ttl=900, show_spinner="Planning your trip...")
+def fetch_trip_bundle(plan_key, _plan):
+    """Fetch itinerary, weather, news and preferences in one backend round-trip.
+    
+    Memoized on `plan_key` so Streamlit reruns for the same plan never hit the backend again.
+    Partial bundles raise `PartialBundle` instead, so the missing parts are retried on the
+    next rerun, matching the backend, which never caches partial results either.
+    """
+    response = get_session().post(f"{API_URL}/trip-bundle", json=_plan, timeout=90)
+    response.raise_for_status()
+    body = response.json()
+    if body.get("status") != "success" or body["data"].get("errors"):
+        raise PartialBundle(body["data"])
+    return body["data"]
+
+@st.cache_data(ttl=900, show_spinner="Planning the alternative...")
+def fetch_scenario(plan_key, name, _plan):
+    """Fetch one alternative plan of a trip.
+    
+    Memoized per plan and scenario, so ticking another alternative only plans that one; the
+    backend reuses the cached baseline and any scenario it has already planned.
+    """
+    response = get_session().post(
+        f"{API_URL}/generate-itinerary", json=dict(_plan, scenarios=[name]), timeout=90
+    )
+    response.raise_for_status()
+    data = response.json()["data"]
+    scenario = (data.get("scenarios") or {}).get(name)
+    if not scenario:
+        # Raised rather than returned, so a failed scenario is retried on the next rerun
+        raise ValueError((data.get("scenario_errors") or {}).get(name, "not planned"))
+    return scenario
+
+def with_scenarios(bundle, plan, names):
+    """Attach the selected alternative plans to the bundle's itinerary."""
+    itinerary = bundle.get("itinerary")
+    if not names or not itinerary or "schedule" not in itinerary:
+        return bundle
+    scenarios = {}
+    for name in names:
+        try:
+            scenarios[name] = fetch_scenario(plan_hash(plan), name, plan)
+        except Exception as e:
+            st.warning(f"Could not plan \"{SCENARIOS.get(name, name)}\": {e}")
+    return dict(bundle, itinerary=dict(itinerary, scenarios=scenarios))
 
 def initialize_session_state():
     """Initialize session state variables."""
@@ -20,6 +97,10 @@ def initialize_session_state():
         st.session_state.chat_history = []
     if 'current_itinerary' not in st.session_state:
         st.session_state.current_itinerary = None
+    if 'current_plan' not in st.session_state:
+        st.session_state.current_plan = None
+    if 'scenarios' not in st.session_state:
+        st.session_state.scenarios = []
 
 def login_page():
     """Display login page."""
@@ -52,6 +133,28 @@ def display_chat_interface():
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
     
+    # Alternative plans are opt-in: each one is another full planning call
+    st.sidebar.multiselect(
+        "Also plan alternatives",
+        [name for name in SCENARIOS if name != "baseline"],
+        format_func=SCENARIOS.get,
+        key="scenarios"
+    )
+    
+    # Display the trip for the current plan (served from cache on reruns)
+    if st.session_state.current_plan:
+        plan = st.session_state.current_plan
+        try:
+            try:
+                bundle = fetch_trip_bundle(plan_hash(plan), plan)
+            except PartialBundle as partial:
+                bundle = partial.bundle
+            bundle = with_scenarios(bundle, plan, st.session_state.scenarios)
+            st.session_state.current_itinerary = bundle.get("itinerary")
+            display_trip(bundle)
+        except Exception as e:
+            st.error(f"Unable to plan the trip: {str(e)}")
+    
     # Chat input
     if prompt := st.chat_input("Type your message here..."):
         # Add user message to chat history
@@ -59,7 +162,7 @@ def display_chat_interface():
         
         # Process user input
         try:
-            response = requests.post(
+            response = get_session().post(
                 f"{API_URL}/process-input",
                 json={"user_id": st.session_state.user_id, "message": prompt}
             )
@@ -67,9 +170,10 @@ def display_chat_interface():
             if response.status_code == 200:
                 data = response.json()
                 
-                if "itinerary" in data["data"]:
-                    st.session_state.current_itinerary = data["data"]["itinerary"]
-                    display_itinerary(data["data"]["itinerary"])
+                # Once every slot is filled, plan the trip with a single bundle request
+                info = data["data"]
+                if all(info.get(field) for field in PLAN_FIELDS):
+                    st.session_state.current_plan = build_plan(info)
                 
                 # Add assistant response to chat history
                 st.session_state.chat_history.append({
@@ -84,12 +188,40 @@ def display_chat_interface():
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
 
-def display_itinerary(itinerary):
-    """Display the current itinerary."""
+def build_plan(info):
+    """Build the /trip-bundle request from the extracted dialog slots."""
+    interests = info["interests"]
+    if isinstance(interests, str):
+        interests = [interest.strip() for interest in interests.split(",") if interest.strip()]
+    try:
+        budget = float(str(info.get("budget", "")).strip("$ ")) if info.get("budget") else None
+    except ValueError:
+        budget = None
+    return {
+        "user_id": st.session_state.user_id,
+        "city": info["city"],
+        "date": info["date"],
+        "start_time": info["start_time"],
+        "end_time": info["end_time"],
+        "interests": interests,
+        "budget": budget,
+        "starting_point": info.get("starting_point") or None
+    }
+
+def display_trip(bundle):
+    """Display the itinerary, map, weather and news from a trip bundle."""
+    for part, error in bundle.get("errors", {}).items():
+        st.warning(f"Could not load {part}: {error}")
+    
+    itinerary = bundle.get("itinerary")
+    if not itinerary or "schedule" not in itinerary:
+        return
+    
     st.subheader("Your Itinerary")
+    itinerary = select_scenario(itinerary)
     
     # Create tabs for different views
-    tab1, tab2, tab3 = st.tabs(["Schedule", "Map", "Weather"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Schedule", "Map", "Weather", "News"])
     
     with tab1:
         # Display schedule
@@ -98,13 +230,16 @@ def display_itinerary(itinerary):
                 st.write(f"🏛️ Location: {item['location']}")
                 st.write(f"⏱️ Duration: {item['duration']} minutes")
                 st.write(f"🚗 Travel: {item['travel_method']} ({item['travel_time']} min)")
-                st.write(f"💰 Cost: ${item['cost']}")
+                st.write(f"💰 Cost: ${item['cost']:.2f}")
+                for event in item.get('conflicts', []):
+                    st.warning(f"{event.get('type', 'event').title()}: {event['name']} "
+                               f"({str(event['start'])[11:16]}-{str(event['end'])[11:16]})")
         
         # Display totals
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Cost", f"${itinerary['total_cost']}")
+            st.metric("Total Cost", f"${itinerary['total_cost']:.2f}")
         with col2:
             st.metric("Total Distance", f"{itinerary['total_distance']} km")
     
@@ -114,54 +249,70 @@ def display_itinerary(itinerary):
     
     with tab3:
         # Display weather
-        display_weather(itinerary.get("city"), itinerary.get("date"))
+        display_weather(bundle.get("city"), bundle.get("date"), bundle.get("weather"))
+    
+    with tab4:
+        # Display news
+        display_news(bundle.get("news"))
+
+def select_scenario(itinerary):
+    """Let the user switch between the alternative plans already in the bundle."""
+    alternatives = {name: plan for name, plan in itinerary.get("scenarios", {}).items()
+                    if plan and "schedule" in plan}
+    if not alternatives:
+        return itinerary
+    options = ["baseline"] + [name for name in SCENARIOS if name in alternatives]
+    choice = st.radio("Plan", options, format_func=lambda name: SCENARIOS.get(name, name), horizontal=True)
+    return itinerary if choice == "baseline" else alternatives[choice]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_map(itinerary_key, _schedule):
+    """Render the map page for a schedule as HTML.
+    
+    Memoized on `itinerary_key`, so reruns reuse the page until the stops change.
+    """
+    geojson = build_geojson(_schedule)
+    bounds = fit_bounds(geojson)
+    if bounds is None:
+        return None
+    m = folium.Map(tiles="OpenStreetMap")
+    folium.GeoJson(
+        geojson,
+        name="Itinerary",
+        style_function=lambda feature: {"color": "blue", "weight": 2, "opacity": 0.8},
+        tooltip=folium.GeoJsonTooltip(fields=["name", "time"], labels=False)
+    ).add_to(m)
+    m.fit_bounds(bounds, max_zoom=16)
+    return m.get_root().render()
 
 def display_map(itinerary):
-    """Display a folium map with the itinerary locations."""
-    # Create a base map centered on the first location
-    m = folium.Map(location=[0, 0], zoom_start=13)  # Default location
-    
-    # Add markers for each location
-    locations = []
-    for item in itinerary["schedule"]:
-        # In a real app, you would geocode the locations
-        # This is a placeholder using dummy coordinates
-        location = [0, 0]  # Replace with actual coordinates
-        locations.append(location)
-        
-        folium.Marker(
-            location,
-            popup=item["activity"],
-            tooltip=item["location"]
-        ).add_to(m)
-    
-    # Draw path between locations
-    if locations:
-        folium.PolyLine(
-            locations,
-            weight=2,
-            color='blue',
-            opacity=0.8
-        ).add_to(m)
-    
-    # Display the map
-    folium_static(m)
-
-def display_weather(city, date):
-    """Display weather information."""
-    if city and date:
-        try:
-            response = requests.get(f"{API_URL}/weather", params={"city": city, "date": date})
-            if response.status_code == 200:
-                weather_data = response.json()["data"]
-                st.write(f"Weather forecast for {city} on {date}:")
-                st.write(f"Temperature: {weather_data['temperature']}°C")
-                st.write(f"Conditions: {weather_data['conditions']}")
-                st.write(f"Recommendation: {weather_data['recommendation']}")
-            else:
-                st.warning("Unable to fetch weather data.")
-        except Exception as e:
-            st.error(f"Error fetching weather data: {str(e)}")
+    """Display the itinerary stops and route on a map fitted to their bounds."""
+    html = render_map(itinerary_hash(itinerary), itinerary["schedule"])
+    if html is None:
+        st.info("No coordinates are available for these stops yet.")
+        return
+    components.html(html, height=500)
+
+def display_weather(city, date, weather_data):
+    """Display weather information from the trip bundle."""
+    if not weather_data:
+        st.warning("Unable to fetch weather data.")
+        return
+    st.write(f"Weather forecast for {city} on {date}:")
+    temperature = weather_data["temperature"]
+    st.write(f"Temperature: {temperature['min']}°C - {temperature['max']}°C")
+    st.write(f"Conditions: {weather_data['conditions']}")
+    for recommendation in weather_data.get("recommendations", []):
+        st.write(f"Recommendation: {recommendation}")
+
+def display_news(news):
+    """Display news relevant to the trip from the trip bundle."""
+    if not news:
+        st.info("No relevant news for this trip.")
+        return
+    for article in news:
+        st.markdown(f"**[{article['title']}]({article['url']})** ({article['impact_level']} impact)")
+        st.caption(f"{article['source']} · {article['date']}")
 
 def main():
     initialize_session_state()
@@ -0,0 +1,132 @@
+"""
+Pure helpers for the itinerary map: a compact GeoJSON payload and its bounds.
+
+Kept free of Streamlit and folium so the payload can be built, cached and
+measured on its own.
+"""
+import hashlib
+import json
+import math
+
+# ~11 m at the equator; route vertices closer than this to the simplified line are dropped
+DEFAULT_TOLERANCE = 1e-4
+# 5 decimals is ~1 m, plenty for a city map
+COORDINATE_PRECISION = 5
+# Smallest span of the fitted bounds in degrees (~500 m), so a single stop is not zoomed onto a point
+MIN_BOUNDS_SPAN = 0.005
+
+def itinerary_hash(itinerary):
+    """Stable hash of the schedule, so the map is rebuilt only when the stops change."""
+    schedule = (itinerary or {}).get("schedule", [])
+    return hashlib.sha1(json.dumps(schedule, sort_keys=True, default=str).encode()).hexdigest()
+
+def stop_coordinates(item):
+    """(lat, lon) of a schedule item, or None when the stop has no usable coordinates."""
+    if "lat" in item and "lon" in item:
+        lat, lon = item["lat"], item["lon"]
+    elif "latitude" in item and "longitude" in item:
+        lat, lon = item["latitude"], item["longitude"]
+    elif isinstance(item.get("coordinates"), (list, tuple)) and len(item["coordinates"]) == 2:
+        lat, lon = item["coordinates"]
+    else:
+        return None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    # The previous placeholder put every stop at (0, 0); treat it as missing
+    if (lat, lon) == (0.0, 0.0) or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def simplify(points, tolerance=DEFAULT_TOLERANCE):
+    """Douglas-Peucker simplification of a list of (lat, lon) points, keeping both ends."""
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (ay, ax), (by, bx) = points[first], points[last]
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            py, px = points[i]
+            if length:
+                distance = abs(dy * px - dx * py + bx * ay - by * ax) / length
+            else:
+                distance = math.hypot(px - ax, py - ay)
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+def _lon_lat(point):
+    lat, lon = point
+    return [round(lon, COORDINATE_PRECISION), round(lat, COORDINATE_PRECISION)]
+
+def build_geojson(schedule, tolerance=DEFAULT_TOLERANCE):
+    """
+    Build a FeatureCollection with one Point per located stop and one simplified route.
+
+    A stop may carry the path from the previous stop under `route` (a list of
+    [lat, lon] pairs); otherwise the route is drawn straight between the stops.
+    """
+    features = []
+    route = []
+    for item in schedule:
+        position = stop_coordinates(item)
+        if position is None:
+            continue
+        for point in item.get("route") or []:
+            if isinstance(point, (list, tuple)) and len(point) == 2:
+                route.append((float(point[0]), float(point[1])))
+        route.append(position)
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": _lon_lat(position)},
+            "properties": {"name": item.get("location", ""), "time": item.get("time", "")}
+        })
+
+    route = simplify(route, tolerance)
+    if len(route) > 1:
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [_lon_lat(point) for point in route]},
+            "properties": {"name": "Route", "time": ""}
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+def fit_bounds(geojson):
+    """
+    [[south, west], [north, east]] covering every feature, or None for an empty collection.
+
+    Each side is widened around its centre to at least MIN_BOUNDS_SPAN degrees.
+    """
+    lats, lons = [], []
+    for feature in geojson["features"]:
+        geometry = feature["geometry"]
+        coordinates = [geometry["coordinates"]] if geometry["type"] == "Point" else geometry["coordinates"]
+        for lon, lat in coordinates:
+            lats.append(lat)
+            lons.append(lon)
+    if not lats:
+        return None
+    south, north = _padded(min(lats), max(lats))
+    west, east = _padded(min(lons), max(lons))
+    return [[south, west], [north, east]]
+
+def _padded(low, high):
+    missing = MIN_BOUNDS_SPAN - (high - low)
+    if missing <= 0:
+        return low, high
+    return low - missing / 2, high + missing / 2
+
+def compact_json(geojson):
+    """GeoJSON text without whitespace, as embedded in the map page."""
+    return json.dumps(geojson, separators=(",", ":"))
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+FRONTEND_DIR = os.path.join(ROOT_DIR, 'frontend')
+
+# The backend modules import each other as top-level packages (`from config import settings`)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+# The endpoint tests reuse the benchmark fakes
+if ROOT_DIR not in sys.path:
+    sys.path.insert(1, ROOT_DIR)
+# The frontend's pure helpers (`map_view`) are tested without Streamlit
+if FRONTEND_DIR not in sys.path:
+    sys.path.append(FRONTEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def backend():
+    """The `main` module, wired to the in-memory Neo4j client and the stub text-generation pipeline."""
+    from benchmarks.environment import load_backend
+    stdin = sys.stdin
+    try:
+        return load_backend()
+    finally:
+        sys.stdin = stdin
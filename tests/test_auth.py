@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from utils import auth as auth_module
+from utils.auth import Auth
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    monkeypatch.setattr(auth_module.db_client, 'user_exists', lambda user_id: True, raising=False)
+    return Auth()
+
+
+def current_user(auth, token):
+    credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+    return asyncio.run(auth.get_current_user(credentials))
+
+
+def test_token_issued_right_after_revocation_is_accepted(auth):
+    before = auth.encode_token('alice')
+    assert current_user(auth, before) == 'alice'
+
+    auth.revoke_user('alice')
+    # Same second as the revocation: `iat` alone could not tell these two apart
+    after = auth.encode_token('alice')
+
+    with pytest.raises(HTTPException) as error:
+        current_user(auth, before)
+    assert error.value.status_code == 401
+    assert current_user(auth, after) == 'alice'
+
+
+def test_revoking_again_rejects_tokens_issued_in_between(auth):
+    auth.revoke_user('bob')
+    first = auth.encode_token('bob')
+    auth.revoke_user('bob')
+    second = auth.encode_token('bob')
+
+    with pytest.raises(HTTPException):
+        current_user(auth, first)
+    assert current_user(auth, second) == 'bob'
+
+
+def test_revocations_expire_with_the_token_lifetime(auth):
+    assert auth.revoked_users.ttl == auth_module.TOKEN_LIFETIME.total_seconds()
+    assert auth.revoked_tokens.ttl == auth_module.TOKEN_LIFETIME.total_seconds()
+
+
+def test_revoked_token_is_rejected_from_cache(auth):
+    token = auth.encode_token('carol')
+    assert current_user(auth, token) == 'carol'
+    auth.revoke_token(token)
+    with pytest.raises(HTTPException):
+        current_user(auth, token)
+
+
+def test_revocations_survive_churn_and_a_cleared_token_cache(auth, monkeypatch):
+    monkeypatch.setattr(auth_module.settings, 'AUTH_TOKEN_CACHE_SIZE', 10)
+    auth = Auth()
+    token = auth.encode_token('dave')
+    assert current_user(auth, token) == 'dave'
+    auth.revoke_token(token)
+    auth.revoke_user('erin')
+    erin = 'erin-token-issued-before'
+    for i in range(50):
+        auth.revoke_token(f"other-{i}")
+        auth.revoke_user(f"user-{i}")
+    auth.token_cache.clear()
+
+    with pytest.raises(HTTPException):
+        current_user(auth, token)
+    assert auth._is_revoked(erin, 'erin', 0.0)
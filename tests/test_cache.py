@@ -0,0 +1,87 @@
+import threading
+import time
+from utils.cache import TTLCache
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a", "gone") == "gone"
+
+
+def test_unbounded_cache_never_evicts_but_sweeps_expired(monkeypatch):
+    monkeypatch.setattr(TTLCache, "_MIN_SWEEP", 8)
+    cache = TTLCache(maxsize=None, ttl=60)
+    for i in range(5):
+        cache.set(("old", i), i, ttl=0.01)
+    time.sleep(0.02)
+    for i in range(100):
+        cache.set(i, i)
+    assert all(cache.get(i) == i for i in range(100))
+    assert len(cache) == 100
+
+
+
+def test_get_or_compute_runs_once_for_concurrent_misses():
+    cache = TTLCache(ttl=60)
+    calls, release = [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [("value", False)] + [("value", True)] * 4
+    assert cache.get_or_compute("k", compute) == ("value", True)
+
+
+def test_get_or_compute_waiters_recompute_when_the_leader_fails():
+    cache = TTLCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(1)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def leader():
+        try:
+            cache.get_or_compute("k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait(1)
+    follower = []
+    waiter = threading.Thread(target=lambda: follower.append(cache.get_or_compute("k", lambda: "fallback")))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    thread.join()
+    waiter.join()
+    assert len(errors) == 1
+    assert follower == [("fallback", False)]
+    assert "k" not in cache._inflight
@@ -0,0 +1,175 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from models.itinerary import Itinerary
+
+PLAN = {
+    "user_id": "alice",
+    "city": "Paris",
+    "date": "2030-06-15",
+    "start_time": "09:00",
+    "end_time": "18:00",
+    "interests": ["museums"],
+    "budget": None,
+    "starting_point": None
+}
+ITINERARY = Itinerary.from_dict({
+    "schedule": [{"time": "09:00-10:00", "activity": "Louvre", "location": "Rue de Rivoli",
+                  "duration": "60", "travel_method": "walk", "travel_time": "10", "cost": "$22"}],
+    "total_cost": "$22",
+    "total_distance": "1 km"
+})
+
+
+@pytest.fixture
+def client(backend):
+    return TestClient(backend.app)
+
+
+@pytest.fixture
+def trip_parts(backend, monkeypatch):
+    """Fast stand-ins for the four /trip-bundle parts; tests override the ones they need."""
+    monkeypatch.setattr(backend, "_build_itinerary", lambda request, deadline=None: ITINERARY)
+    monkeypatch.setattr(backend.weather_agent, "get_forecast", lambda city, date: {"conditions": "Sunny"})
+    monkeypatch.setattr(backend.news_agent, "get_news", lambda city: [{"title": "Festival"}])
+    monkeypatch.setattr(backend.user_agent, "get_preferences", lambda user_id: [{"value": "museums"}])
+    return backend
+
+
+def test_trip_bundle_all_parts_succeed(client, trip_parts):
+    response = client.post("/trip-bundle", json=PLAN)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    data = body["data"]
+    assert data["errors"] == {}
+    assert data["itinerary"]["schedule"][0]["activity"] == "Louvre"
+    assert data["weather"] == {"conditions": "Sunny"}
+    assert data["news"] == [{"title": "Festival"}]
+    assert data["preferences"] == [{"value": "museums"}]
+
+
+def test_trip_bundle_reports_a_slow_part_as_timed_out(client, trip_parts, monkeypatch):
+    backend = trip_parts
+    monkeypatch.setitem(backend.settings.TRIP_BUNDLE_TIMEOUTS, "news", 0.05)
+    monkeypatch.setattr(backend.news_agent, "get_news", lambda city: time.sleep(0.5) or [])
+    body = client.post("/trip-bundle", json=PLAN).json()
+    assert body["status"] == "partial"
+    assert body["data"]["news"] is None
+    assert body["data"]["errors"] == {"news": "timed out"}
+    assert body["data"]["weather"] == {"conditions": "Sunny"}
+    assert body["data"]["itinerary"]["schedule"]
+
+
+def test_trip_bundle_keeps_other_parts_when_one_fails(client, trip_parts, monkeypatch):
+    backend = trip_parts
+
+    def failing(request, deadline=None):
+        raise ValueError("Could not parse the itinerary")
+
+    monkeypatch.setattr(backend, "_build_itinerary", failing)
+    body = client.post("/trip-bundle", json=PLAN).json()
+    assert body["status"] == "partial"
+    assert body["data"]["itinerary"] is None
+    assert body["data"]["errors"] == {"itinerary": "Could not parse the itinerary"}
+    assert body["data"]["preferences"] == [{"value": "museums"}]
+
+
+def test_adjust_itinerary_forwards_the_deadline_at_interactive_priority(client, backend, monkeypatch):
+    from agents.llm_gateway import PRIORITY_INTERACTIVE
+    admitted, calls = [], []
+    check_admission = backend.itinerary_agent.gateway.check_admission
+
+    def record_admission(**kwargs):
+        admitted.append(kwargs)
+        return check_admission(**kwargs)
+
+    def adjust(**kwargs):
+        calls.append(kwargs)
+        return ITINERARY
+
+    monkeypatch.setattr(backend.itinerary_agent.gateway, "check_admission", record_admission)
+    monkeypatch.setattr(backend.itinerary_agent, "adjust_itinerary", adjust)
+    response = client.post("/adjust-itinerary", json={
+        "user_id": "alice",
+        "current_itinerary": ITINERARY.to_dict(),
+        "adjustment_type": "time",
+        "adjustment_details": {"end_time": "16:00"}
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["schedule"][0]["activity"] == "Louvre"
+    assert admitted[0]["priority"] == PRIORITY_INTERACTIVE
+    assert calls[0]["deadline"] == admitted[0]["deadline"]
+    assert calls[0]["adjustment_details"] == {"end_time": "16:00"}
+
+
+def test_generate_itinerary_runs_on_the_llm_executor(client, trip_parts):
+    response = client.post("/generate-itinerary", json=PLAN)
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["total_cost"] == 22.0
+
+
+@pytest.fixture
+def planner(backend, monkeypatch):
+    """Record which plans `_build_itinerary` asks for, with the baseline and scenarios cached separately."""
+    backend.itinerary_cache.clear()
+    calls = []
+
+    def plan(request, names, deadline=None):
+        calls.append(list(names))
+        planned = {name: Itinerary.from_dict(dict(ITINERARY.to_dict(), total_cost=len(calls))) for name in names
+                   if name != "low_budget"}
+        errors = {"low_budget": TimeoutError("did not finish in time")} if "low_budget" in names else {}
+        return planned, errors
+
+    monkeypatch.setattr(backend, "_plan_itinerary", plan)
+    monkeypatch.setattr(backend.db_client, "store_itinerary", lambda *args: None)
+    yield calls
+    backend.itinerary_cache.clear()
+
+
+def test_adding_a_scenario_only_plans_that_scenario(backend, planner):
+    request = backend.ItineraryRequest(**PLAN)
+    baseline = backend._build_itinerary(request)
+    assert planner == [["baseline"]] and baseline.scenarios is None
+
+    with_rain = backend._build_itinerary(request.model_copy(update={"scenarios": ["wet_weather"]}))
+    assert planner == [["baseline"], ["wet_weather"]]
+    assert with_rain.total_cost == baseline.total_cost
+    assert list(with_rain.scenarios) == ["wet_weather"] and with_rain.scenario_errors == {}
+
+    both = backend._build_itinerary(request.model_copy(update={"scenarios": ["fewer_stops", "wet_weather"]}))
+    assert planner[-1] == ["fewer_stops"]
+    assert set(both.scenarios) == {"fewer_stops", "wet_weather"}
+
+
+def test_failed_scenarios_are_retried(backend, planner):
+    request = backend.ItineraryRequest(**dict(PLAN, scenarios=["low_budget", "wet_weather"]))
+    first = backend._build_itinerary(request)
+    assert planner == [["baseline", "low_budget", "wet_weather"]]
+    assert list(first.scenarios) == ["wet_weather"]
+    assert "low_budget" in first.scenario_errors
+
+    backend._build_itinerary(request)
+    assert planner[-1] == ["low_budget"]
+
+
+def test_startup_does_not_spawn_scenario_workers(backend, monkeypatch):
+    monkeypatch.setattr(backend, "setup_logging", lambda **kwargs: None)
+    with TestClient(backend.app):
+        pass
+    assert backend.scenario_planner._pool is None
+
+
+def test_preferences_are_prefetched_and_refreshed_by_the_dialog(backend):
+    tasks = {name: (slots, func) for name, slots, func in backend.prefetcher._tasks}
+    slots, warm = tasks["preferences"]
+    # Needs the user id, which the dialog only adds once the answers are stored
+    assert slots == ("city", "user_id")
+    user_agent = backend.user_agent
+    assert warm("Oslo", "zoe") == []
+    assert "zoe" in user_agent.preferences_cache
+
+    user_agent._store_preferences("zoe", {"interests": ["art"], "budget": "50"})
+    assert "zoe" not in user_agent.preferences_cache
+    assert {p["value"] for p in user_agent.get_preferences("zoe")} == {"art", "50"}
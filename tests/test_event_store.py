@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from database.event_store import EventStore, IntervalIndex, to_timestamp
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_interval_index_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, 1000, 300).astype(np.float64)
+    ends = starts + rng.integers(0, 120, 300)
+    index = IntervalIndex(starts, ends, np.arange(300, dtype=np.int64))
+    query_starts = rng.integers(-50, 1050, 40).astype(np.float64)
+    query_ends = query_starts + rng.integers(1, 200, 40)
+
+    query_idx, ids = index.query(query_starts, query_ends)
+    found = sorted(zip(query_idx.tolist(), ids.tolist()))
+    expected = sorted((q, i) for q in range(40) for i in range(300)
+                      if starts[i] < query_ends[q] and ends[i] > query_starts[q])
+    assert found == expected
+
+
+def test_empty_index_returns_nothing():
+    empty = np.empty(0)
+    query_idx, ids = IntervalIndex(empty, empty, np.empty(0, dtype=np.int64)).query(np.array([0.0]), np.array([1.0]))
+    assert len(query_idx) == len(ids) == 0
+
+
+@pytest.fixture
+def host_timezone(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_times_are_read_on_the_wall_clock_regardless_of_host(host_timezone):
+    expected = datetime(2030, 6, 15, 9, 30, tzinfo=timezone.utc).timestamp()
+    assert to_timestamp("2030-06-15T09:30") == expected
+    assert to_timestamp("2030-06-15T09:30Z") == expected
+    assert to_timestamp(datetime(2030, 6, 15, 9, 30)) == expected
+    # The offset is dropped, not applied: schedules carry local times without one
+    assert to_timestamp("2030-06-15T09:30+02:00") == expected
+    assert to_timestamp(datetime(2030, 6, 15, 9, 30, tzinfo=timezone(timedelta(hours=-4)))) == expected
+
+
+def test_offset_event_matches_the_local_stop_at_the_same_wall_time():
+    store = EventStore()
+    store.load([{"city": "Paris", "name": "Concert", "start": "2030-06-15T19:00+02:00",
+                 "end": "2030-06-15T21:00+02:00", "lat": 48.8606, "lon": 2.3376}])
+    schedule = [
+        {"time": "17:00-18:00", "location": "Louvre", "lat": 48.8606, "lon": 2.3376},
+        {"time": "19:30-20:30", "location": "Louvre", "lat": 48.8606, "lon": 2.3376}
+    ]
+    conflicts = store.schedule_conflicts("Paris", "2030-06-15", schedule)
+    assert [[event["name"] for event in found] for found in conflicts] == [[], ["Concert"]]
+
+
+def test_schedule_conflicts_by_place_and_time():
+    store = EventStore()
+    store.load([
+        {"city": "Paris", "name": "Closure", "start": "2030-06-15T09:00Z", "end": "2030-06-15T12:00Z",
+         "lat": 48.8606, "lon": 2.3376, "type": "closure"},
+        {"city": "Paris", "name": "Far away", "start": "2030-06-15T09:00", "end": "2030-06-15T12:00",
+         "lat": 48.9, "lon": 2.45},
+        {"city": "Paris", "name": "Tour", "start": "2030-06-15T14:00", "end": "2030-06-15T15:00",
+         "venue": "Orsay"},
+        {"city": "Paris", "name": "Strike", "start": "2030-06-15T16:30", "end": "2030-06-15T18:00",
+         "type": "strike"}
+    ])
+    schedule = [
+        {"time": "10:00-11:00", "location": "Louvre", "lat": 48.8607, "lon": 2.3377},
+        {"time": "14:30-15:30", "location": "Musée d'Orsay"},
+        {"time": "16:00-17:00", "location": "Eiffel Tower", "lat": 48.8584, "lon": 2.2945},
+        {"time": "sometime", "location": "Louvre"}
+    ]
+    conflicts = store.schedule_conflicts("paris", "2030-06-15", schedule)
+    assert [[event["name"] for event in found] for found in conflicts] == [["Closure"], ["Tour"], ["Strike"], []]
+    assert store.schedule_conflicts("Lyon", "2030-06-15", schedule) == [[], [], [], []]
@@ -0,0 +1,91 @@
+import pytest
+from models.itinerary import Itinerary, Stop, dumps, loads, pack, to_metres, unpack
+
+LLM_ITINERARY = {
+    "schedule": [
+        {"time": "9:00 AM-10:30 AM", "activity": "Louvre", "location": "Rue de Rivoli", "duration": "1 hour 30 minutes",
+         "travel_method": "walk", "travel_time": "10 minutes", "cost": "$22.00", "lat": "48.8606", "lon": "2.3376"},
+        {"time": "11:00-12:00", "activity": "Seine walk", "location": "Quai", "duration": "60",
+         "travel_method": "walk", "travel_time": "5", "cost": "Free",
+         "conflicts": [{"name": "Closure", "start": "2030-06-15T11:00", "end": "2030-06-15T12:00"}]},
+        {"time": "1pm", "activity": "Lunch", "location": "Marais", "duration": "1.5 hours",
+         "travel_method": "metro", "travel_time": "15 min", "cost": "10-20",
+         "route": [[48.85, 2.35], [48.86, 2.36]]}
+    ],
+    "total_cost": "$32.00",
+    "total_distance": "2.5 km, about 30 minutes"
+}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (6, 6000),
+    ("2.5 km, about 30 minutes", 2500),
+    ("5 km (mixed walking and metro)", 5000),
+    ("3 miles", 4828),
+    ("2mi", 3219),
+    ("1 mile, 20 minutes", 1609),
+    ("800 m", 800),
+    ("800 metres", 800),
+    ("12 kilometers", 12000),
+    ("1,200 m", 1200),
+    ("7.4", 7400),
+    ("about 40 minutes", 40000),
+    (None, 0),
+])
+def test_to_metres(value, expected):
+    assert to_metres(value) == expected
+
+
+def test_from_dict_parses_llm_strings():
+    itinerary = Itinerary.from_dict(LLM_ITINERARY)
+    louvre, walk, lunch = itinerary.stops
+    assert (louvre.start, louvre.end, louvre.duration, louvre.cost) == (540, 630, 90, 2200)
+    assert (walk.duration, walk.travel_time, walk.cost) == (60, 5, 0)
+    assert (lunch.start, lunch.end, lunch.cost) == (780, 870, 1000)
+    assert (itinerary.total_cost, itinerary.total_distance) == (3200, 2500)
+
+
+def test_pack_round_trip():
+    itinerary = Itinerary.from_dict(LLM_ITINERARY)
+    itinerary.scenarios = {"wet_weather": Itinerary.from_dict(dict(LLM_ITINERARY, schedule=LLM_ITINERARY["schedule"][:1]))}
+    itinerary.scenario_errors = {"low_budget": "timed out"}
+    restored = unpack(pack(itinerary))
+    assert restored.to_dict() == itinerary.to_dict()
+    assert restored.stops[0].lat == 48.8606 and restored.stops[2].route == [[48.85, 2.35], [48.86, 2.36]]
+    assert unpack(pack(Itinerary(error="bad answer"))).to_dict() == {"error": "bad answer"}
+
+
+def test_pack_rejects_unknown_versions():
+    import msgpack
+    payload = msgpack.unpackb(pack(Itinerary()), raw=False)
+    payload[0] = 99
+    with pytest.raises(ValueError):
+        unpack(msgpack.packb(payload))
+
+
+def test_json_round_trip():
+    itinerary = Itinerary.from_dict(LLM_ITINERARY)
+    body = dumps({"status": "success", "data": itinerary})
+    decoded = loads(body)
+    assert decoded["data"] == itinerary.to_dict()
+    assert Itinerary.from_dict(decoded["data"]).to_dict() == itinerary.to_dict()
+    assert loads(dumps({1: Stop(activity="x")})) == {"1": Stop(activity="x").to_dict()}
+
+
+def test_stop_keeps_llm_coordinates():
+    stop = Stop.from_dict({"time": "09:00-10:00", "activity": "Louvre", "lat": "48.8606", "lon": "2.3376"})
+    assert (stop.lat, stop.lon) == (48.8606, 2.3376)
+    assert stop.to_dict()["lat"] == 48.8606
+
+
+def test_unusable_coordinates_are_dropped_not_fatal():
+    data = {"schedule": [
+        {"time": "09:00-10:00", "activity": "A", "lat": "unknown", "lon": "unknown"},
+        {"time": "10:00-11:00", "activity": "B", "lat": 0, "lon": 0},
+        {"time": "11:00-12:00", "activity": "C", "lat": 48.86},
+        {"time": "12:00-13:00", "activity": "D", "lat": 123.0, "lon": 2.3}
+    ]}
+    itinerary = Itinerary.from_dict(data)
+    assert itinerary.error is None
+    assert all(stop.lat is None and stop.lon is None for stop in itinerary.stops)
+    assert all("lat" not in item for item in itinerary.to_dict()["schedule"])
@@ -0,0 +1,102 @@
+import threading
+import time
+import pytest
+from agents.llm_gateway import PRIORITY_BATCH, PRIORITY_FOLLOW_UP, LLMGateway, TokenBucket
+from utils.exceptions import LLMOverloadedError
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+class Blocker:
+    """Occupies the gateway's only slot until released."""
+
+    def __init__(self, gateway):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=gateway.call, args=(self._run, 10))
+        self.thread.start()
+        self.started.wait(2)
+
+    def _run(self):
+        self.started.set()
+        self.release.wait(2)
+        return "blocked"
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(per_minute=60)
+    bucket.consume(60)
+    assert bucket.time_until(1) == pytest.approx(1.0, abs=0.05)
+    bucket.consume(-30)
+    assert bucket.time_until(30) == pytest.approx(0.0, abs=0.05)
+
+
+def test_sheds_when_queue_is_full():
+    gateway = LLMGateway(max_concurrency=1, max_queue=2)
+    blocker = Blocker(gateway)
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(gateway.call(lambda: "ok", 10)))
+               for _ in range(2)]
+    for waiter in waiters:
+        waiter.start()
+    wait_until(lambda: len(gateway._queue) == 2)
+
+    with pytest.raises(LLMOverloadedError) as error:
+        gateway.call(lambda: "late", 10)
+    assert "queue_full" in str(error.value)
+    assert error.value.retry_after >= 1.0
+    with pytest.raises(LLMOverloadedError):
+        gateway.check_admission()
+
+    blocker.release.set()
+    for thread in waiters + [blocker.thread]:
+        thread.join(2)
+    assert results == ["ok", "ok"]
+    gateway.check_admission()
+
+
+def test_higher_priority_is_served_first():
+    gateway = LLMGateway(max_concurrency=1, max_queue=8)
+    blocker = Blocker(gateway)
+    order = []
+    batch = threading.Thread(target=gateway.call, args=(lambda: order.append("batch"), 10, PRIORITY_BATCH))
+    batch.start()
+    wait_until(lambda: len(gateway._queue) == 1)
+    follow_up = threading.Thread(target=gateway.call, args=(lambda: order.append("follow_up"), 10, PRIORITY_FOLLOW_UP))
+    follow_up.start()
+    wait_until(lambda: len(gateway._queue) == 2)
+
+    blocker.release.set()
+    for thread in (batch, follow_up, blocker.thread):
+        thread.join(2)
+    assert order == ["follow_up", "batch"]
+
+
+def test_sheds_calls_whose_deadline_cannot_be_met():
+    gateway = LLMGateway(max_concurrency=1, requests_per_minute=60, max_queue=8)
+    gateway.requests.consume(60)
+    with pytest.raises(LLMOverloadedError) as error:
+        gateway.call(lambda: "ok", 10, deadline=time.monotonic() + 0.1)
+    assert "deadline_unreachable" in str(error.value)
+
+
+def test_queued_call_is_shed_when_its_deadline_passes():
+    gateway = LLMGateway(max_concurrency=1, max_queue=8)
+    blocker = Blocker(gateway)
+    with pytest.raises(LLMOverloadedError) as error:
+        gateway.call(lambda: "ok", 10, deadline=time.monotonic() + 0.05)
+    assert "deadline_expired" in str(error.value)
+    assert not gateway._queue
+    blocker.release.set()
+    blocker.thread.join(2)
+
+
+def test_token_budget_settles_to_reported_usage():
+    gateway = LLMGateway(tokens_per_minute=1000)
+    gateway.call(lambda: {"total_tokens": 100}, 400, usage=lambda result: result["total_tokens"])
+    assert gateway.tokens.tokens == pytest.approx(900, abs=5)
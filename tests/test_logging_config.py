@@ -0,0 +1,50 @@
+import logging
+import os
+from utils.logging_config import TimedSizeRotatingFileHandler
+
+
+def make_handler(path, max_bytes, backup_count):
+    handler = TimedSizeRotatingFileHandler(str(path), maxBytes=max_bytes, when='midnight',
+                                           backupCount=backup_count, delay=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+
+def emit(handler, count, start=0):
+    for i in range(start, start + count):
+        handler.emit(logging.LogRecord('test', logging.INFO, __file__, 1, f"record {i:03d}", None, None))
+
+
+def records(path):
+    with open(path) as f:
+        return [int(line.split()[1]) for line in f if line.strip()]
+
+
+def test_size_rollover_keeps_newest_backups(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = make_handler(log_file, max_bytes=60, backup_count=2)
+    emit(handler, 100)
+    handler.close()
+
+    backups = sorted(name for name in os.listdir(tmp_path) if name != 'app.log')
+    assert len(backups) == 2
+    kept = [r for name in backups for r in records(tmp_path / name)] + records(log_file)
+    # The current file and the two newest backups hold the most recent records, in order
+    assert kept == list(range(kept[0], 100))
+    assert kept[0] > 80
+
+
+def test_sequence_continues_across_restarts(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = make_handler(log_file, max_bytes=60, backup_count=3)
+    emit(handler, 20)
+    handler.close()
+
+    handler = make_handler(log_file, max_bytes=60, backup_count=3)
+    emit(handler, 20, start=20)
+    handler.close()
+
+    backups = sorted(name for name in os.listdir(tmp_path) if name != 'app.log')
+    assert len(backups) == 3
+    kept = [r for name in backups for r in records(tmp_path / name)] + records(log_file)
+    assert kept == list(range(kept[0], 40))
@@ -0,0 +1,96 @@
+import math
+import pytest
+from map_view import MIN_BOUNDS_SPAN, build_geojson, fit_bounds, itinerary_hash, simplify, stop_coordinates
+
+
+def distance_to_segment(point, a, b):
+    (py, px), (ay, ax), (by, bx) = point, a, b
+    dx, dy = bx - ax, by - ay
+    length = math.hypot(dx, dy)
+    return abs(dy * px - dx * py + bx * ay - by * ax) / length if length else math.hypot(px - ax, py - ay)
+
+
+def test_simplify_keeps_endpoints_and_drops_collinear_points():
+    points = [(48.0, 2.0 + i * 0.001) for i in range(50)]
+    assert simplify(points) == [points[0], points[-1]]
+    assert simplify(points[:2]) == points[:2]
+    assert simplify([]) == []
+
+
+def test_simplify_respects_the_tolerance():
+    points = [(48.0 + 0.0004 * math.sin(i / 3), 2.0 + i * 0.001) for i in range(60)]
+    tolerance = 1e-4
+    kept = simplify(points, tolerance)
+    assert kept[0] == points[0] and kept[-1] == points[-1]
+    assert len(kept) < len(points)
+    # Every dropped point lies within the tolerance of the simplified segment that replaced it
+    positions = [points.index(point) for point in kept]
+    for first, last in zip(positions, positions[1:]):
+        for point in points[first + 1:last]:
+            assert distance_to_segment(point, points[first], points[last]) <= tolerance
+
+
+def test_simplify_keeps_a_corner_beyond_the_tolerance():
+    points = [(0.0, 0.0), (0.0, 0.001), (0.001, 0.001)]
+    assert simplify(points, tolerance=1e-4) == points
+
+
+@pytest.mark.parametrize("item", [
+    {"lat": 0, "lon": 0},
+    {"lat": 48.8},
+    {"lat": "north", "lon": 2.3},
+    {"lat": 95.0, "lon": 2.3},
+    {"lat": 48.8, "lon": -190.0},
+    {"coordinates": [48.8]},
+    {},
+])
+def test_unusable_coordinates_are_missing(item):
+    assert stop_coordinates(item) is None
+
+
+def test_coordinate_aliases():
+    assert stop_coordinates({"latitude": "48.8", "longitude": "2.3"}) == (48.8, 2.3)
+    assert stop_coordinates({"coordinates": [48.8, 2.3]}) == (48.8, 2.3)
+
+
+def test_geojson_only_has_located_stops():
+    schedule = [
+        {"location": "Louvre", "time": "09:00-10:00", "lat": 48.860611, "lon": 2.337644},
+        {"location": "Nowhere", "time": "10:00-11:00", "lat": 0, "lon": 0},
+        {"location": "Unknown", "time": "11:00-12:00"},
+        {"location": "Orsay", "time": "12:00-13:00", "lat": 48.86, "lon": 2.3266,
+         "route": [[48.8605, 2.334], [48.8602, 2.33], "bad"]},
+    ]
+    geojson = build_geojson(schedule)
+    points = [f for f in geojson["features"] if f["geometry"]["type"] == "Point"]
+    assert [f["properties"]["name"] for f in points] == ["Louvre", "Orsay"]
+    # GeoJSON is [lon, lat], rounded to ~1 m
+    assert points[0]["geometry"]["coordinates"] == [2.33764, 48.86061]
+    route = next(f for f in geojson["features"] if f["geometry"]["type"] == "LineString")
+    assert route["geometry"]["coordinates"][0] == [2.33764, 48.86061]
+    assert route["geometry"]["coordinates"][-1] == [2.3266, 48.86]
+
+
+def test_no_located_stops_gives_no_bounds():
+    geojson = build_geojson([{"location": "Unknown"}, {"lat": 0, "lon": 0}])
+    assert geojson["features"] == []
+    assert fit_bounds(geojson) is None
+
+
+def test_single_stop_bounds_are_padded_around_it():
+    (south, west), (north, east) = fit_bounds(build_geojson([{"lat": 48.86, "lon": 2.3376}]))
+    assert north - south == pytest.approx(MIN_BOUNDS_SPAN)
+    assert east - west == pytest.approx(MIN_BOUNDS_SPAN)
+    assert (south + north) / 2 == pytest.approx(48.86)
+    assert (west + east) / 2 == pytest.approx(2.3376)
+
+
+def test_wide_bounds_are_not_padded():
+    geojson = build_geojson([{"lat": 48.80, "lon": 2.30}, {"lat": 48.90, "lon": 2.40}])
+    assert fit_bounds(geojson) == [[48.8, 2.3], [48.9, 2.4]]
+
+
+def test_itinerary_hash_changes_with_the_stops():
+    itinerary = {"schedule": [{"lat": 48.86, "lon": 2.33}]}
+    assert itinerary_hash(itinerary) == itinerary_hash({"schedule": [{"lon": 2.33, "lat": 48.86}]})
+    assert itinerary_hash(itinerary) != itinerary_hash({"schedule": [{"lat": 48.87, "lon": 2.33}]})
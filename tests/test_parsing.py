@@ -0,0 +1,34 @@
+import pytest
+from utils.parsing import duration_minutes, parse_cost
+
+
+@pytest.mark.parametrize("value, expected", [
+    (90, 90.0),
+    (1.5, 1.5),
+    ("90", 90.0),
+    ("90 minutes", 90.0),
+    ("45 min", 45.0),
+    ("2 hours", 120.0),
+    ("1.5 hours", 90.0),
+    ("2h", 120.0),
+    ("1 hour 30 minutes", 90.0),
+    ("1h30m", 90.0),
+    ("1-2 hours", 60.0),
+    ("30-45 minutes", 30.0),
+    ("about 3 hrs", 180.0),
+])
+def test_duration_minutes(value, expected):
+    assert duration_minutes(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "a while"])
+def test_duration_minutes_default(value):
+    assert duration_minutes(value) == 60.0
+    assert duration_minutes(value, default=0.0) == 0.0
+
+
+def test_parse_cost():
+    assert parse_cost("$25") == 25.0
+    assert parse_cost("10-20") == 10.0
+    assert parse_cost("Free") == 0.0
+    assert parse_cost(12.5) == 12.5
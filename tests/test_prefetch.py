@@ -0,0 +1,117 @@
+import threading
+import pytest
+from agents.prefetch import PREFETCH_TASKS, Prefetcher
+from utils.tracing import prefetching
+
+
+class Recorder:
+    """Task that records its calls and blocks until released."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, *values):
+        self.calls.append((values, prefetching.get()))
+        self.started.set()
+        assert self.release.wait(2)
+        return values
+
+
+@pytest.fixture
+def prefetcher():
+    prefetcher = Prefetcher(max_workers=1, budget=16, ttl=60)
+    yield prefetcher
+    prefetcher._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def drain(prefetcher, *tasks):
+    for task in tasks:
+        task.release.set()
+    prefetcher._executor.submit(lambda: None).result(2)
+
+
+def test_tasks_start_once_their_slots_are_filled(prefetcher):
+    weather = Recorder("weather")
+    prefetcher.register("weather", ("city", "date"), weather)
+    assert prefetcher.observe("alice", {"city": "Paris"}) == 0
+    assert prefetcher.observe("alice", {"city": "Paris", "date": "2030-06-15"}) == 1
+    drain(prefetcher, weather)
+    # Prefetched work is flagged so its cache fills are not counted as request misses
+    assert weather.calls == [(("Paris", "2030-06-15"), True)]
+
+
+def test_identical_tasks_are_deduplicated_while_running_and_after(prefetcher):
+    news = Recorder("news")
+    prefetcher.register("news", ("city",), news)
+    deduplicated = PREFETCH_TASKS.get("news", "deduplicated")
+    assert prefetcher.observe("alice", {"city": "Paris"}) == 1
+    assert prefetcher.observe("bob", {"city": " paris "}) == 0
+    drain(prefetcher, news)
+    assert prefetcher.observe("carol", {"city": "Paris"}) == 0
+    assert len(news.calls) == 1
+    assert PREFETCH_TASKS.get("news", "deduplicated") == deduplicated + 2
+
+
+def test_city_change_cancels_queued_tasks(prefetcher):
+    first, second = Recorder("first"), Recorder("second")
+    prefetcher.register("first", ("city",), first)
+    prefetcher.register("second", ("city",), second)
+    cancelled = PREFETCH_TASKS.get("second", "cancelled")
+    assert prefetcher.observe("alice", {"city": "Paris"}) == 2
+    assert first.started.wait(2)
+
+    # "second" for Paris is still queued behind the running "first" and nobody else wants it
+    assert prefetcher.observe("alice", {"city": "Rome"}) == 2
+    drain(prefetcher, first, second)
+    assert [values for values, _ in first.calls] == [("Paris",), ("Rome",)]
+    assert [values for values, _ in second.calls] == [("Rome",)]
+    assert PREFETCH_TASKS.get("second", "cancelled") == cancelled + 1
+
+
+def test_queued_tasks_another_session_wants_are_kept(prefetcher):
+    first, second = Recorder("first"), Recorder("second")
+    prefetcher.register("first", ("city",), first)
+    prefetcher.register("second", ("city",), second)
+    prefetcher.observe("alice", {"city": "Paris"})
+    prefetcher.observe("bob", {"city": "Paris"})
+    assert first.started.wait(2)
+    prefetcher.observe("alice", {"city": "Rome"})
+    drain(prefetcher, first, second)
+    assert ("Paris",) in [values for values, _ in second.calls]
+
+
+def test_budget_caps_queued_and_running_tasks():
+    prefetcher = Prefetcher(max_workers=1, budget=2, ttl=60)
+    tasks = [Recorder(f"task{i}") for i in range(3)]
+    for task in tasks:
+        prefetcher.register(task.name, ("city",), task)
+    over_budget = PREFETCH_TASKS.get("task2", "over_budget")
+    try:
+        assert prefetcher.observe("alice", {"city": "Paris"}) == 2
+        assert PREFETCH_TASKS.get("task2", "over_budget") == over_budget + 1
+        drain(prefetcher, *tasks)
+        assert tasks[2].calls == []
+        # The budget frees up once the tasks finish
+        assert prefetcher.observe("alice", {"city": "Paris"}) == 1
+        drain(prefetcher, *tasks)
+        assert len(tasks[2].calls) == 1
+    finally:
+        prefetcher._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_failed_tasks_can_run_again(prefetcher):
+    calls = []
+
+    def failing(city):
+        calls.append(city)
+        raise ConnectionError("down")
+
+    prefetcher.register("news", ("city",), failing)
+    prefetcher.observe("alice", {"city": "Paris"})
+    prefetcher._executor.submit(lambda: None).result(2)
+    prefetcher.observe("alice", {"city": "Paris"})
+    prefetcher._executor.submit(lambda: None).result(2)
+    assert calls == ["Paris", "Paris"]
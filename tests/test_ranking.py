@@ -0,0 +1,25 @@
+from agents.ranking import AttractionRanker, format_compact
+
+
+def attraction(name, duration, cost=0, category="Museum"):
+    return {"name": name, "duration": duration, "cost": cost, "category": category}
+
+
+def test_bare_minutes_fit_the_day():
+    ranker = AttractionRanker(top_k=4)
+    candidates = [attraction("Louvre", 90), attraction("Orsay", "90"), attraction("Marathon", "10 hours")]
+    selected = ranker.rank(candidates, ["museum"], None, "09:00", "18:00")
+    assert [a["name"] for a in selected] == ["Louvre", "Orsay"]
+
+
+def test_ranking_respects_budget_and_window():
+    ranker = AttractionRanker(top_k=8, travel_minutes=0)
+    candidates = [attraction(f"Museum {i}", "2 hours", cost=10) for i in range(6)]
+    selected = ranker.rank(candidates, ["museum"], 25, "09:00", "17:00")
+    # $25 buys two $10 visits; the 8-hour window alone would allow four
+    assert len(selected) == 2
+
+
+def test_format_compact_uses_minutes():
+    table = format_compact([attraction("Louvre", "1 hour 30 minutes", "$17"), attraction("Orsay", 90, 16)])
+    assert table.splitlines() == ["name|minutes|usd|category", "Louvre|90|17|Museum", "Orsay|90|16|Museum"]
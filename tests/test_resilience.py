@@ -0,0 +1,125 @@
+import threading
+import time
+import pytest
+from utils.exceptions import UpstreamUnavailableError
+from utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker, ResilientUpstream
+
+
+def test_latency_quantile_needs_enough_samples():
+    tracker = LatencyTracker()
+    for i in range(19):
+        tracker.record(i / 100)
+    assert tracker.quantile(0.95) is None
+    tracker.record(0.19)
+    assert tracker.quantile(0.95) == pytest.approx(0.19)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test-open", failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("test-probe", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_hedges_a_slow_first_attempt():
+    upstream = ResilientUpstream("test-hedge", timeout=1.0, min_hedge_delay=0.01)
+    for _ in range(20):
+        upstream.latency.record(0.01)
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return "slow" if first else "hedged"
+
+    start = time.monotonic()
+    assert upstream.call("key", fetch) == "hedged"
+    assert time.monotonic() - start < 0.3
+    assert len(calls) == 2
+
+
+def test_serves_stale_when_upstream_fails():
+    upstream = ResilientUpstream("test-stale", timeout=0.5, failure_threshold=100)
+    assert upstream.call("key", lambda timeout: "fresh") == "fresh"
+
+    def failing(timeout):
+        raise ConnectionError("down")
+
+    assert upstream.call("key", failing) == "fresh"
+    with pytest.raises(UpstreamUnavailableError):
+        upstream.call("other", failing)
+
+
+def test_open_circuit_serves_stale_without_calling_upstream():
+    upstream = ResilientUpstream("test-circuit", timeout=0.5, failure_threshold=1, reset_timeout=60)
+    upstream.call("key", lambda timeout: "fresh")
+    upstream.breaker.record_failure()
+    calls = []
+    assert upstream.call("key", lambda timeout: calls.append(timeout) or "new") == "fresh"
+    assert calls == []
+
+
+def test_uncacheable_results_are_not_served_stale():
+    upstream = ResilientUpstream("test-cacheable", timeout=0.5, failure_threshold=100)
+    upstream.call("key", lambda timeout: {"error": "partial"}, cacheable=lambda result: "error" not in result)
+
+    def failing(timeout):
+        raise ConnectionError("down")
+
+    with pytest.raises(UpstreamUnavailableError):
+        upstream.call("key", failing)
+
+
+def test_deadline_miss_falls_back_to_stale():
+    upstream = ResilientUpstream("test-deadline", timeout=0.1, failure_threshold=100)
+    upstream.call("key", lambda timeout: "fresh")
+    start = time.monotonic()
+    assert upstream.call("key", lambda timeout: time.sleep(0.5) or "late") == "fresh"
+    assert time.monotonic() - start < 0.3
+
+
+def test_stale_fallbacks_are_cached_briefly():
+    from utils.cache import TTLCache
+    from utils.resilience import get_or_compute_fresh
+    upstream = ResilientUpstream("test-stale-cache", timeout=0.5, failure_threshold=100)
+    cache = TTLCache(ttl=600)
+    fresh, _ = get_or_compute_fresh(cache, "a", lambda: upstream.call("a", lambda timeout: "fresh"))
+    assert fresh == "fresh" and cache._data["a"][0] - time.monotonic() > 500
+
+    def failing(timeout):
+        raise ConnectionError("down")
+
+    cache.clear()
+    value, hit = get_or_compute_fresh(cache, "a", lambda: upstream.call("a", failing), stale_ttl=0.05)
+    assert (value, hit) == ("fresh", False)
+    assert cache.get("a") == "fresh"
+    time.sleep(0.06)
+    # Gone soon after, so the next request sees the background refresh instead
+    assert "a" not in cache
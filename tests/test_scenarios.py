@@ -0,0 +1,68 @@
+import time
+from concurrent.futures.process import BrokenProcessPool
+from agents.scenarios import BASELINE, MIN_LOW_BUDGET, ScenarioPlanner, scenario_request
+
+
+class BrokenPool:
+    def __init__(self):
+        self.shutdown_calls = []
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+
+
+class Ranker:
+    top_k = 6
+
+
+class Agent:
+    ranker = Ranker()
+
+    def build_prompt(self, **params):
+        return f"prompt for {params['city']}"
+
+
+def test_broken_pool_is_shut_down_and_replaced():
+    planner = ScenarioPlanner(Agent())
+    broken = planner._pool = BrokenPool()
+    prompt = planner._prepare(BASELINE, {"city": "Paris"}, time.monotonic() + 1)
+    assert prompt == "prompt for Paris"
+    assert broken.shutdown_calls == [(False, True)]
+    assert planner._pool is None
+
+
+def test_only_the_broken_pool_is_dropped():
+    planner = ScenarioPlanner(Agent())
+    broken = planner._pool = BrokenPool()
+    replacement = object()
+    original = broken.submit
+
+    def submit(*args, **kwargs):
+        # Another scenario already replaced the pool while this one was failing
+        planner._pool = replacement
+        return original(*args, **kwargs)
+
+    broken.submit = submit
+    planner._prepare(BASELINE, {"city": "Paris"}, time.monotonic() + 1)
+    assert planner._pool is replacement
+
+
+def test_fewer_stops_halves_the_candidates():
+    params = scenario_request("fewer_stops", {"city": "Paris", "attractions": []}, 6)
+    assert params["top_k"] == 3 and "Relaxed" in params["notes"]
+
+
+def test_low_budget_keeps_a_positive_budget_when_everything_is_free():
+    free = [{"name": f"Park {i}", "cost": "Free"} for i in range(4)]
+    params = scenario_request("low_budget", {"city": "Paris", "attractions": free, "budget": None}, 6)
+    assert params["budget"] == MIN_LOW_BUDGET
+
+
+def test_low_budget_never_exceeds_the_users_budget():
+    attractions = [{"name": "Museum", "cost": "$20"}]
+    assert scenario_request("low_budget", {"attractions": attractions, "budget": 3.0}, 6)["budget"] == 3.0
+    assert scenario_request("low_budget", {"attractions": attractions, "budget": 100.0}, 6)["budget"] == 50.0
+    assert scenario_request("low_budget", {"attractions": attractions, "budget": None}, 6)["budget"] == 10.0
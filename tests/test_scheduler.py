@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from agents.scheduler import WeatherAwareScheduler, parse_hour
+
+
+def forecast(rain_hours=(), temps=None, hours=24):
+    return [{"time": f"2030-06-15 {hour:02d}:00",
+             "temp_c": 20.0 if temps is None else temps[hour],
+             "rain_chance": 90 if hour in rain_hours else 0} for hour in range(hours)]
+
+
+PARK = {"name": "Park", "category": "Park", "duration": "2 hours"}
+MUSEUM = {"name": "Museum", "category": "Museum", "duration": "2 hours"}
+
+
+def test_matrix_penalises_only_outdoor_rows():
+    scheduler = WeatherAwareScheduler()
+    temps, rain = scheduler.forecast_arrays(forecast(rain_hours={10}, temps=[20.0] * 12 + [37.0] * 12))
+    scores = scheduler.suitability_matrix([PARK, MUSEUM], temps, rain)
+    assert scores.shape == (2, 24)
+    assert np.all(scores[1] == 1.0)
+    assert scores[0, 9] == 1.0
+    assert scores[0, 10] == pytest.approx(1.0 - 0.8 * 0.9)
+    assert scores[0, 13] == pytest.approx(1.0 - 0.2)
+    assert scores.min() >= 0.0 and scores.max() <= 1.0
+
+
+def test_outdoor_stop_gets_the_dry_hours_and_indoor_absorbs_the_rain():
+    slots = WeatherAwareScheduler().plan_slots([MUSEUM, PARK], forecast(rain_hours={9, 10}), "9:00", "13:00")
+    by_name = {slot["name"]: slot for slot in slots}
+    assert by_name["Park"]["start"] == "11:00" and by_name["Park"]["outdoor"]
+    assert by_name["Museum"]["start"] == "09:00" and not by_name["Museum"]["outdoor"]
+    assert [slot["start"] for slot in slots] == ["09:00", "11:00"]
+
+
+def test_outdoor_stop_avoids_uncomfortable_heat():
+    temps = [20.0] * 12 + [38.0] * 12
+    slots = WeatherAwareScheduler().plan_slots([PARK], forecast(temps=temps), "9am", "6pm")
+    assert slots[0]["start"] < "12:00"
+
+
+def test_slots_stay_inside_the_day_window():
+    slots = WeatherAwareScheduler().plan_slots([PARK, MUSEUM], forecast(rain_hours=set(range(12))), "14:00", "18:00")
+    for slot in slots:
+        assert "14:00" <= slot["start"] and slot["end"] <= "18:00"
+
+
+def test_stops_that_do_not_fit_are_left_out():
+    attractions = [dict(MUSEUM, name=f"Museum {i}") for i in range(4)] + [dict(PARK, duration="30 hours")]
+    slots = WeatherAwareScheduler().plan_slots(attractions, forecast(), "9:00", "13:00")
+    assert len(slots) == 2
+    assert {slot["name"] for slot in slots} <= {f"Museum {i}" for i in range(4)}
+
+
+@pytest.mark.parametrize("hourly, start, end", [
+    ([], "9:00", "18:00"),
+    (forecast(hours=6), "9:00", "18:00"),
+    (forecast(hours=12), "9:00", "18:00"),
+    (forecast(), "18:00", "9:00"),
+    (forecast(), None, None),
+])
+def test_empty_partial_or_inverted_windows_do_not_raise(hourly, start, end):
+    slots = WeatherAwareScheduler().plan_slots([PARK, MUSEUM], hourly, start, end)
+    assert all(int(slot["end"][:2]) <= len(hourly) for slot in slots)
+
+
+def test_parse_hour():
+    assert parse_hour("09:30", 0) == 9
+    assert parse_hour("5 PM", 0) == 17
+    assert parse_hour("12am", 5) == 0
+    assert parse_hour(None, 9) == 9
@@ -0,0 +1,98 @@
+import logging
+import pytest
+from utils import tracing
+from utils.tracing import SPAN_DURATION, SPAN_ERRORS, UPSTREAM_REQUESTS, Histogram, Registry, span, traced
+
+
+def rendered(registry):
+    return registry.render().splitlines()
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.5, 2.0):
+        histogram.observe(value, "/a")
+    assert rendered(registry) == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="0.5"} 4',
+        'latency_seconds_bucket{route="/a",le="1.0"} 4',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 5',
+        'latency_seconds_sum{route="/a"} 2.95',
+        'latency_seconds_count{route="/a"} 5',
+    ]
+
+
+def test_counters_gauges_and_registration_are_shared():
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests.", ("outcome",))
+    assert registry.counter("requests_total", "Requests.", ("outcome",)) is counter
+    counter.inc("ok")
+    counter.inc("ok", amount=2)
+    registry.gauge("queue_depth", "Depth.").set(3)
+    lines = rendered(registry)
+    assert 'requests_total{outcome="ok"} 3.0' in lines
+    assert "# TYPE queue_depth gauge" in lines and "queue_depth 3" in lines
+    assert registry.render().endswith("\n")
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("odd_total", "Odd labels.", ("name",)).inc('say "hi"\\\nbye')
+    assert 'odd_total{name="say \\"hi\\"\\\\\\nbye"} 1.0' in rendered(registry)
+
+
+def test_histogram_without_observations_renders_only_headers():
+    registry = Registry()
+    registry.register(Histogram("empty_seconds", "Nothing yet."))
+    assert rendered(registry) == ["# HELP empty_seconds Nothing yet.", "# TYPE empty_seconds histogram"]
+
+
+def test_span_counts_errors_per_span_and_upstream():
+    name = "test.span_errors"
+    errors, failed_calls = SPAN_ERRORS.get(name), UPSTREAM_REQUESTS.get("test-upstream", "error")
+    calls, ok_calls = SPAN_DURATION.count(name), UPSTREAM_REQUESTS.get("test-upstream", "ok")
+    with span(name, upstream="test-upstream"):
+        pass
+    with pytest.raises(ValueError):
+        with span(name, upstream="test-upstream"):
+            raise ValueError("boom")
+    assert SPAN_DURATION.count(name) == calls + 2
+    assert SPAN_ERRORS.get(name) == errors + 1
+    assert UPSTREAM_REQUESTS.get("test-upstream", "ok") == ok_calls + 1
+    assert UPSTREAM_REQUESTS.get("test-upstream", "error") == failed_calls + 1
+
+
+def test_traced_records_the_wrapped_call():
+    @traced("test.traced")
+    def work(x):
+        """Doubles x."""
+        return x * 2
+
+    before = SPAN_DURATION.count("test.traced")
+    assert work(2) == 4
+    assert work.__doc__ == "Doubles x."
+    assert SPAN_DURATION.count("test.traced") == before + 1
+
+
+@pytest.mark.parametrize("rate, logged", [(0.0, 0), (1.0, 5)])
+def test_span_logging_follows_the_sample_rate(monkeypatch, caplog, rate, logged):
+    monkeypatch.setattr(tracing, "_sample_rate", rate)
+    with caplog.at_level(logging.DEBUG, logger=tracing.__name__):
+        for _ in range(5):
+            with span("test.sampled"):
+                pass
+    assert len([r for r in caplog.records if "test.sampled" in r.getMessage()]) == logged
+
+
+def test_partial_sample_rate_logs_a_fraction(monkeypatch, caplog):
+    monkeypatch.setattr(tracing, "_sample_rate", 0.5)
+    draws = iter([0.1, 0.9, 0.4, 0.6])
+    monkeypatch.setattr(tracing.random, "random", lambda: next(draws))
+    with caplog.at_level(logging.DEBUG, logger=tracing.__name__):
+        for _ in range(4):
+            with span("test.partial"):
+                pass
+    assert len([r for r in caplog.records if "test.partial" in r.getMessage()]) == 2